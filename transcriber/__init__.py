@@ -6,12 +6,31 @@ Standalone Anwendung für Audio-Transkription
 __version__ = "1.0.0"
 __author__ = "Simavi Team"
 
-from .transcriber import WhisperTranscriber
-from .diarization import SpeakerDiarizer
-from .export import ExportManager
+import importlib
+
+# Klassen werden erst beim ersten Zugriff importiert (PEP 562), damit
+# "import transcriber" nicht Torch, Whisper, pyannote und reportlab lädt
+_LAZY_ATTRIBUTES = {
+    "WhisperTranscriber": ".transcriber",
+    "SpeakerDiarizer": ".diarization",
+    "ExportManager": ".export"
+}
 
 __all__ = [
     "WhisperTranscriber",
     "SpeakerDiarizer",
     "ExportManager"
 ]
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        module = importlib.import_module(_LAZY_ATTRIBUTES[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_ATTRIBUTES))
@@ -4,25 +4,91 @@ Standalone Audio Transcriber mit Sprechertrennung
 Hauptanwendung mit Gradio UI
 """
 
+import time
+
+# Startzeit für den Startbericht (vor allen weiteren Importen)
+_STARTED = time.perf_counter()
+
 import os
+import sys
+import threading
 import gradio as gr
 from pathlib import Path
 from dotenv import load_dotenv
 from transcriber import WhisperTranscriber
 from diarization import SpeakerDiarizer
 from export import ExportManager
+from pipeline import TranscriptionPipeline, apply_patches
+from cache import default_cache
+from jobs import JobQueue, DONE, FAILED, CANCELLED
+from live import LiveTranscriber, resample
+from metrics import registry, start_metrics_server
 import tempfile
 
 # Load environment variables
 load_dotenv()
 
+_IMPORTS_DONE = time.perf_counter()
+
+# Module, die erst bei Bedarf geladen werden sollten
+HEAVY_MODULES = ("torch", "whisper", "pyannote.audio", "reportlab")
+
 class TranscriberApp:
     def __init__(self):
         self.transcriber = WhisperTranscriber()
         self.diarizer = SpeakerDiarizer()
         self.export_manager = ExportManager()
+        self.pipeline = TranscriptionPipeline(
+            self.transcriber,
+            self.diarizer,
+            cache=default_cache()
+        )
         self.temp_dir = tempfile.mkdtemp()
 
+        # Persistente Auftragswarteschlange (TRANSCRIBER_JOB_QUEUE=0 für
+        # direkte Verarbeitung im Request)
+        self.jobs = None
+        if os.getenv("TRANSCRIBER_JOB_QUEUE", "1") != "0":
+            self.jobs = JobQueue(self.pipeline.run)
+
+        # Live-Ausgabe läuft direkt im Request, nicht über die Warteschlange
+        self.stream_slots = threading.BoundedSemaphore(
+            int(os.getenv("TRANSCRIBER_CONCURRENCY", "1"))
+        )
+
+        # Konfigurierte Modelle vorab laden (TRANSCRIBER_PRELOAD_MODELS)
+        self.transcriber.pool.preload()
+
+        self.register_metrics()
+
+    def register_metrics(self):
+        """Meldet Cache, Warteschlange und Modell-Pool beim Metrik-Endpunkt an"""
+        cache = self.pipeline.cache
+        if cache is not None:
+            registry.register_callback(
+                "cache_hits_total", "Treffer im Ergebnis-Cache",
+                lambda: cache.hits, metric_type="counter"
+            )
+            registry.register_callback(
+                "cache_misses_total", "Fehlzugriffe im Ergebnis-Cache",
+                lambda: cache.misses, metric_type="counter"
+            )
+            registry.register_callback(
+                "cache_hit_ratio", "Trefferquote des Ergebnis-Caches",
+                lambda: cache.hits / (cache.hits + cache.misses)
+                if cache.hits + cache.misses else None
+            )
+
+        if self.jobs is not None:
+            registry.register_callback(
+                "job_queue_depth", "Wartende Aufträge", self.jobs.queue_depth
+            )
+
+        registry.register_callback(
+            "models_loaded", "Geladene Whisper-Modelle",
+            lambda: len(self.transcriber.pool.stats())
+        )
+
     def process_audio(
         self,
         audio_file,
@@ -39,33 +105,18 @@ class TranscriberApp:
             if audio_file is None:
                 return "Bitte laden Sie eine Audiodatei hoch.", None, None
 
-            progress(0.1, desc="Lade Audio...")
-
-            # Transkription mit Whisper
-            progress(0.2, desc="Transkribiere Audio...")
-            transcription_result = self.transcriber.transcribe(
+            final_text, transcription_result = self.pipeline.run(
                 audio_file,
                 model_size=model_size,
-                language=language
+                language=language,
+                enable_diarization=enable_diarization,
+                num_speakers=num_speakers,
+                progress=progress
             )
 
             if not transcription_result:
                 return "Fehler bei der Transkription.", None, None
 
-            # Optional: Sprechertrennung
-            if enable_diarization:
-                progress(0.6, desc="Führe Sprechertrennung durch...")
-                diarization_result = self.diarizer.diarize(
-                    audio_file,
-                    transcription_result,
-                    num_speakers=num_speakers
-                )
-                final_text = diarization_result
-            else:
-                final_text = transcription_result["text"]
-
-            progress(1.0, desc="Fertig!")
-
             # Erstelle Vorschau
             preview = self._format_preview(final_text)
 
@@ -74,27 +125,293 @@ class TranscriberApp:
         except Exception as e:
             return f"Fehler: {str(e)}", None, None
 
-    def _format_preview(self, text):
+    def transcribe(
+        self,
+        audio_file,
+        model_size,
+        language,
+        enable_diarization,
+        num_speakers,
+        streaming,
+        preview_model="aus",
+        progress=gr.Progress()
+    ):
+        """
+        Startet eine Transkription in zwei Durchgängen, als Live-Ausgabe,
+        über die Auftragswarteschlange oder direkt
+
+        Yields:
+            Tuple (Auftrags-ID, Vorschau, Endergebnis, Whisper-Ergebnis)
+        """
+        params = (audio_file, model_size, language, enable_diarization, num_speakers)
+
+        if preview_model and preview_model not in ("aus", model_size):
+            # Läuft wie die Live-Ausgabe im Handler, nicht in der Warteschlange
+            with self.stream_slots:
+                for update in self.process_audio_two_pass(
+                    *params, preview_model, progress=progress
+                ):
+                    yield ("", *update)
+        elif streaming:
+            with self.stream_slots:
+                for update in self.process_audio_stream(*params, progress=progress):
+                    yield ("", *update)
+        elif self.jobs is not None:
+            job_id, message = self.submit_job(*params)
+            yield job_id, message, None, None
+            if job_id:
+                yield (job_id, *self.wait_for_job(job_id, progress=progress))
+        else:
+            yield ("", *self.process_audio(*params, progress=progress))
+
+    def process_audio_stream(
+        self,
+        audio_file,
+        model_size,
+        language,
+        enable_diarization,
+        num_speakers,
+        progress=gr.Progress()
+    ):
+        """
+        Verarbeitet eine Audiodatei und zeigt Segmente an, sobald Whisper
+        einen Abschnitt fertig hat
+
+        Yields:
+            Tuple (Vorschau, Endergebnis, Whisper-Ergebnis); die beiden
+            letzten sind erst in der letzten Ausgabe gesetzt
+        """
+        if audio_file is None:
+            yield "Bitte laden Sie eine Audiodatei hoch.", None, None
+            return
+
+        for update in self.pipeline.stream(
+            audio_file,
+            model_size=model_size,
+            language=language,
+            enable_diarization=enable_diarization,
+            num_speakers=num_speakers
+        ):
+            progress(update["progress"], desc=update["desc"])
+
+            if not update.get("done"):
+                # Sprecher stehen erst nach der Sprechertrennung fest
+                yield self._format_preview(update["preview"], default_speaker="…"), None, None
+            elif update["transcription"] is None:
+                yield "Fehler bei der Transkription.", None, None
+            else:
+                final_text = update["final"]
+                yield self._format_preview(final_text), final_text, update["transcription"]
+
+    def process_audio_two_pass(
+        self,
+        audio_file,
+        model_size,
+        language,
+        enable_diarization,
+        num_speakers,
+        preview_model,
+        progress=gr.Progress()
+    ):
+        """
+        Zeigt sofort eine Vorschau des kleinen Modells und ersetzt danach
+        fensterweise die Segmente, die das gewählte Modell anders erkennt
+
+        Vorschau-Zeilen und Zwischenstand werden nur an den geänderten
+        Segmenten angepasst; Fenster ohne Änderung lösen keine Ausgabe aus.
+
+        Yields:
+            Tuple (Vorschau, Zwischenstand bzw. Endergebnis, Whisper-Ergebnis).
+            Das Whisper-Ergebnis ist erst mit dem Endergebnis gesetzt und gibt
+            damit den Export frei.
+        """
+        if audio_file is None:
+            yield "Bitte laden Sie eine Audiodatei hoch.", None, None
+            return
+
+        # Zwischenstand: Vorschau-Segmente und ihre formatierten Zeilen
+        intermediate = {"segments": []}
+        lines = []
+        separator = "\n\n" if enable_diarization else ""
+
+        for update in self.pipeline.two_pass(
+            audio_file,
+            model_size=model_size,
+            preview_model=preview_model,
+            language=language,
+            enable_diarization=enable_diarization,
+            num_speakers=num_speakers
+        ):
+            progress(update["progress"], desc=update["desc"])
+
+            if update.get("done"):
+                if update["transcription"] is None:
+                    yield "Fehler bei der Transkription.", None, None
+                else:
+                    final_text = update["final"]
+                    yield self._format_preview(final_text), final_text, update["transcription"]
+                continue
+
+            patches = update["patches"]
+            if not patches:
+                continue
+            apply_patches(intermediate["segments"], patches)
+            apply_patches(lines, [
+                (index, removed, [
+                    self._format_segment(segment, enable_diarization, default_speaker="…")
+                    for segment in segments
+                ])
+                for index, removed, segments in patches
+            ])
+            yield separator.join(lines), intermediate, None
+
+    def submit_job(
+        self,
+        audio_file,
+        model_size,
+        language,
+        enable_diarization,
+        num_speakers
+    ):
+        """
+        Reiht eine Audiodatei in die Auftragswarteschlange ein
+
+        Returns:
+            Tuple (Auftrags-ID, Statusmeldung)
+        """
+        if audio_file is None:
+            return "", "Bitte laden Sie eine Audiodatei hoch."
+
+        try:
+            job_id = self.jobs.submit(
+                audio_file,
+                model_size=model_size,
+                language=language,
+                enable_diarization=enable_diarization,
+                num_speakers=num_speakers
+            )
+            return job_id, f"Auftrag {job_id} eingereiht..."
+        except Exception as e:
+            return "", f"Fehler: {str(e)}"
+
+    def wait_for_job(self, job_id, progress=gr.Progress()):
+        """
+        Wartet auf einen Auftrag und liefert dessen Ergebnis
+
+        Funktioniert auch für Aufträge aus einer früheren Sitzung, z.B.
+        nach einem Verbindungsabbruch im Browser.
+
+        Returns:
+            Tuple (Vorschau, Endergebnis, Whisper-Ergebnis)
+        """
+        job_id = (job_id or "").strip()
+        if not job_id:
+            return "Bitte geben Sie eine Auftrags-ID an.", None, None
+
+        seen = self.jobs.changes
+        while True:
+            status = self.jobs.status(job_id)
+            if status is None:
+                return f"Unbekannter Auftrag: {job_id}", None, None
+
+            if status["status"] == DONE:
+                result = self.jobs.result(job_id)
+                preview = self._format_preview(result["final"])
+                return preview, result["final"], result["transcription"]
+            if status["status"] == FAILED:
+                return f"Fehler: {status['error']}", None, None
+            if status["status"] == CANCELLED:
+                return "Auftrag abgebrochen.", None, None
+
+            if "queue_position" in status:
+                progress(0, desc=f"Wartet (Position {status['queue_position'] + 1})")
+            else:
+                progress(status["progress"], desc=status["message"] or "Läuft...")
+            # Wacht bei Fortschritt oder Abschluss sofort auf (z.B. Cache-Treffer),
+            # sonst spätestens nach einer Sekunde für Aufträge anderer Prozesse
+            seen = self.jobs.wait_for_change(seen, timeout=1)
+
+    def cancel_job(self, job_id):
+        """Bricht einen Auftrag ab"""
+        job_id = (job_id or "").strip()
+        if job_id and self.jobs.cancel(job_id):
+            return f"Abbruch von Auftrag {job_id} angefordert."
+        return "Auftrag läuft nicht oder ist unbekannt."
+
+    def live_stream(self, chunk, session, model_size, language):
+        """
+        Verarbeitet einen Mikrofon-Chunk der Live-Transkription
+
+        Returns:
+            Tuple (angezeigter Text, Sitzung)
+        """
+        if chunk is None:
+            return gr.update(), session
+
+        sample_rate, samples = chunk
+        if session is None:
+            session = LiveTranscriber(
+                self.transcriber,
+                model_size=model_size,
+                language=language
+            )
+
+        session.insert_audio(resample(samples, sample_rate))
+        try:
+            session.process()
+        except Exception as e:
+            print(f"Fehler bei der Live-Transkription: {str(e)}")
+
+        return self._format_live(session), session
+
+    def live_finish(self, session):
+        """Schreibt den Rest der Aufnahme fest und beendet die Sitzung"""
+        if session is None:
+            return gr.update(), None
+
+        try:
+            session.finish()
+        except Exception as e:
+            print(f"Fehler bei der Live-Transkription: {str(e)}")
+        return session.text, None
+
+    def _format_live(self, session):
+        """Festgeschriebener Text plus unbestätigter Rest"""
+        if session.partial_text:
+            return f"{session.text}\n\n… {session.partial_text}".strip()
+        return session.text
+
+    def _format_preview(self, text, default_speaker="Unbekannt"):
         """Formatiert Text für die Vorschau"""
         if isinstance(text, dict):
             # Mit Sprechertrennung
-            formatted = []
-            for segment in text.get("segments", []):
-                speaker = segment.get("speaker", "Unbekannt")
-                content = segment.get("text", "")
-                start = segment.get("start", 0)
-                end = segment.get("end", 0)
-                formatted.append(
-                    f"[{start:.2f}s - {end:.2f}s] {speaker}: {content}"
-                )
-            return "\n\n".join(formatted)
+            return "\n\n".join(
+                self._format_segment(segment, True, default_speaker)
+                for segment in text.get("segments", [])
+            )
         else:
             # Ohne Sprechertrennung
             return text
 
-    def export_to_pdf(self, text_data, filename="transcription"):
-        """Exportiert die Transkription als PDF"""
-        if text_data is None:
+    def _format_segment(self, segment, with_speaker, default_speaker="Unbekannt"):
+        """Formatiert ein Segment für die Vorschau"""
+        if not with_speaker:
+            return segment.get("text", "")
+        speaker = segment.get("speaker", default_speaker)
+        content = segment.get("text", "")
+        start = segment.get("start", 0)
+        end = segment.get("end", 0)
+        return f"[{start:.2f}s - {end:.2f}s] {speaker}: {content}"
+
+    def export_to_pdf(self, text_data, raw_result=None, filename="transcription"):
+        """
+        Exportiert die Transkription als PDF
+
+        Ohne Whisper-Ergebnis (z.B. während der Verfeinerung in zwei
+        Durchgängen) liegt noch kein Endergebnis vor und es wird nichts
+        exportiert.
+        """
+        if text_data is None or raw_result is None:
             return None
 
         try:
@@ -107,9 +424,15 @@ class TranscriberApp:
             print(f"PDF Export Fehler: {str(e)}")
             return None
 
-    def export_to_txt(self, text_data, filename="transcription"):
-        """Exportiert die Transkription als TXT"""
-        if text_data is None:
+    def export_to_txt(self, text_data, raw_result=None, filename="transcription"):
+        """
+        Exportiert die Transkription als TXT
+
+        Ohne Whisper-Ergebnis (z.B. während der Verfeinerung in zwei
+        Durchgängen) liegt noch kein Endergebnis vor und es wird nichts
+        exportiert.
+        """
+        if text_data is None or raw_result is None:
             return None
 
         try:
@@ -183,12 +506,35 @@ class TranscriberApp:
                             outputs=[num_speakers]
                         )
 
+                    streaming = gr.Checkbox(
+                        label="Live-Ausgabe",
+                        value=os.getenv("TRANSCRIBER_STREAMING", "0") == "1",
+                        info="Zeigt den Text abschnittsweise, sobald er fertig ist"
+                    )
+
+                    preview_model = gr.Dropdown(
+                        choices=["aus", "tiny", "base"],
+                        value=os.getenv("TRANSCRIBER_PREVIEW_MODEL", "aus") or "aus",
+                        label="Vorschau-Modell",
+                        info="Zeigt zuerst ein schnelles Ergebnis und verfeinert es "
+                             "danach mit der gewählten Modellgröße"
+                    )
+
                     transcribe_btn = gr.Button(
                         "🎯 Transkribieren",
                         variant="primary",
                         size="lg"
                     )
 
+                    with gr.Accordion("Auftrag", open=False, visible=self.jobs is not None):
+                        job_id = gr.Textbox(
+                            label="Auftrags-ID",
+                            info="Mit dieser ID lässt sich das Ergebnis später erneut abrufen"
+                        )
+                        with gr.Row():
+                            fetch_btn = gr.Button("🔄 Ergebnis abrufen")
+                            cancel_btn = gr.Button("⛔ Abbrechen")
+
                 with gr.Column(scale=2):
                     # Output Section
                     gr.Markdown("## Ergebnis")
@@ -213,35 +559,96 @@ class TranscriberApp:
                             visible=True
                         )
 
+            with gr.Accordion("🎤 Live-Transkription (Mikrofon)", open=False):
+                gr.Markdown(
+                    "Der Text erscheint während der Aufnahme. Bestätigter "
+                    "Text steht oben, der noch unsichere Rest nach „…“."
+                )
+                live_audio = gr.Audio(
+                    label="Mikrofon",
+                    sources=["microphone"],
+                    type="numpy",
+                    streaming=True
+                )
+                live_text = gr.Textbox(
+                    label="Live-Transkription",
+                    lines=8,
+                    show_copy_button=True
+                )
+
             # Versteckte States für interne Daten
             transcription_data = gr.State()
             raw_result = gr.State()
+            live_session = gr.State()
 
             # Event Handlers
+            audio_inputs = [
+                audio_input,
+                model_size,
+                language,
+                enable_diarization,
+                num_speakers
+            ]
+            if self.jobs is not None:
+                # Die Verarbeitung läuft in den Workern der Warteschlange
+                # (bzw. für die Live-Ausgabe begrenzt über stream_slots),
+                # die Handler warten nur und brauchen kein Limit
+                concurrency_limit = None
+            else:
+                # Mehrere gleichzeitige Anfragen erlauben (z.B. für die
+                # Batch-Engine)
+                concurrency_limit = int(os.getenv("TRANSCRIBER_CONCURRENCY", "1"))
+
             transcribe_btn.click(
-                fn=self.process_audio,
-                inputs=[
-                    audio_input,
-                    model_size,
-                    language,
-                    enable_diarization,
-                    num_speakers
-                ],
-                outputs=[output_text, transcription_data, raw_result]
+                fn=self.transcribe,
+                inputs=audio_inputs + [streaming, preview_model],
+                outputs=[job_id, output_text, transcription_data, raw_result],
+                concurrency_limit=concurrency_limit
             )
 
+            if self.jobs is not None:
+                fetch_btn.click(
+                    fn=self.wait_for_job,
+                    inputs=[job_id],
+                    outputs=[output_text, transcription_data, raw_result],
+                    concurrency_limit=None
+                )
+
+                cancel_btn.click(
+                    fn=self.cancel_job,
+                    inputs=[job_id],
+                    outputs=[output_text]
+                )
+
             export_pdf_btn.click(
                 fn=self.export_to_pdf,
-                inputs=[transcription_data],
+                inputs=[transcription_data, raw_result],
                 outputs=[pdf_download]
             )
 
             export_txt_btn.click(
                 fn=self.export_to_txt,
-                inputs=[transcription_data],
+                inputs=[transcription_data, raw_result],
                 outputs=[txt_download]
             )
 
+            live_audio.start_recording(
+                fn=lambda: ("", None),
+                outputs=[live_text, live_session]
+            )
+
+            live_audio.stream(
+                fn=self.live_stream,
+                inputs=[live_audio, live_session, model_size, language],
+                outputs=[live_text, live_session]
+            )
+
+            live_audio.stop_recording(
+                fn=self.live_finish,
+                inputs=[live_session],
+                outputs=[live_text, live_session]
+            )
+
             # Beispiele
             gr.Markdown("## 💡 Tipps")
             gr.Markdown(
@@ -259,11 +666,39 @@ class TranscriberApp:
         return interface
 
 
+def print_startup_report(timings):
+    """
+    Gibt die Dauer der Startphasen und die bereits geladenen schweren
+    Module aus
+
+    Args:
+        timings: Liste von (Phase, Sekunden)
+    """
+    print("Startzeit:")
+    for stage, seconds in timings:
+        print(f"  {stage:<18} {seconds:6.2f}s")
+    print(f"  {'Gesamt':<18} {sum(s for _, s in timings):6.2f}s")
+
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+    print(f"  Bereits geladen:   {', '.join(loaded) or 'keine schweren Module'}")
+
+
 def main():
     """Startet die Anwendung"""
+    init_started = time.perf_counter()
     app = TranscriberApp()
+    ui_started = time.perf_counter()
     interface = app.create_interface()
 
+    print_startup_report([
+        ("Importe", _IMPORTS_DONE - _STARTED),
+        ("Initialisierung", ui_started - init_started),
+        ("UI-Aufbau", time.perf_counter() - ui_started)
+    ])
+
+    # Prometheus-Endpunkt neben der UI (TRANSCRIBER_METRICS_PORT)
+    start_metrics_server()
+
     # Starte Server
     interface.launch(
         server_name="0.0.0.0",
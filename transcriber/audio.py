@@ -0,0 +1,266 @@
+"""
+Audio-Ingest Modul
+
+Dekodiert Audiodateien genau einmal zu 16 kHz mono float32, damit Whisper
+und pyannote denselben Puffer verwenden können.
+"""
+
+import os
+import subprocess
+import wave
+from typing import Any, Dict, List, Optional, Tuple, Union
+import numpy as np
+
+try:
+    from .metrics import stage
+except ImportError:
+    from metrics import stage
+
+# Whisper und pyannote arbeiten beide mit 16 kHz (whisper.audio.SAMPLE_RATE;
+# hier fest eingetragen, damit das Modul ohne Torch/Whisper importierbar ist)
+SAMPLE_RATE = 16000
+
+# Dateipfad oder bereits dekodierte Waveform
+AudioInput = Union[str, np.ndarray]
+
+
+def load_audio(audio_path: str) -> np.ndarray:
+    """
+    Dekodiert und resampelt eine Audiodatei (über FFmpeg)
+
+    WAV-Dateien, die bereits 16 kHz mono 16 bit sind, werden direkt gelesen,
+    ohne einen FFmpeg-Prozess zu starten.
+
+    Args:
+        audio_path: Pfad zur Audiodatei
+
+    Returns:
+        Waveform als 1D-Array (16 kHz, mono, float32)
+    """
+    print(f"Dekodiere {audio_path}...")
+    with stage("decode"):
+        audio = _read_pcm_wav(audio_path)
+        if audio is not None:
+            return audio
+
+        import whisper
+
+        return whisper.load_audio(audio_path, sr=SAMPLE_RATE)
+
+
+def _read_pcm_wav(audio_path: str) -> Optional[np.ndarray]:
+    """
+    Liest eine WAV-Datei im Zielformat (16 kHz, mono, 16 bit PCM)
+
+    Returns:
+        Waveform wie whisper.load_audio oder None für andere Formate
+    """
+    if not str(audio_path).lower().endswith(".wav"):
+        return None
+    try:
+        with wave.open(str(audio_path), "rb") as f:
+            if (
+                f.getframerate() != SAMPLE_RATE
+                or f.getnchannels() != 1
+                or f.getsampwidth() != 2
+            ):
+                return None
+            frames = f.readframes(f.getnframes())
+    except (OSError, EOFError, wave.Error):
+        return None
+    return np.frombuffer(frames, np.int16).astype(np.float32) / 32768.0
+
+
+def probe_duration(audio_path: str) -> Optional[float]:
+    """
+    Ermittelt die Dauer einer Audiodatei ohne sie zu dekodieren (FFprobe)
+
+    Args:
+        audio_path: Pfad zur Audiodatei
+
+    Returns:
+        Dauer in Sekunden oder None, falls FFprobe sie nicht bestimmen kann
+    """
+    try:
+        output = subprocess.run(
+            [
+                "ffprobe", "-v", "error",
+                "-show_entries", "format=duration",
+                "-of", "default=noprint_wrappers=1:nokey=1",
+                audio_path
+            ],
+            capture_output=True,
+            check=True,
+            text=True,
+            timeout=30
+        ).stdout
+        return float(output.strip())
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return None
+
+
+def estimate_duration(audio_path: str) -> float:
+    """
+    Schätzt die Dauer einer Audiodatei für die Priorisierung
+
+    Args:
+        audio_path: Pfad zur Audiodatei
+
+    Returns:
+        Dauer in Sekunden (FFprobe, sonst grob aus der Dateigröße bei
+        128 kbit/s geschätzt)
+    """
+    duration = probe_duration(audio_path)
+    if duration is None:
+        duration = os.path.getsize(audio_path) / 16000
+    return duration
+
+
+def ensure_waveform(audio: AudioInput) -> np.ndarray:
+    """
+    Gibt eine Waveform zurück und dekodiert nur, falls ein Pfad übergeben wurde
+
+    Args:
+        audio: Pfad zur Audiodatei oder dekodierte Waveform
+
+    Returns:
+        Waveform als 1D-Array (16 kHz, mono, float32)
+    """
+    if isinstance(audio, np.ndarray):
+        return audio
+    return load_audio(audio)
+
+
+def to_pyannote_input(audio: np.ndarray) -> Dict[str, Any]:
+    """
+    Verpackt eine Waveform für die pyannote Pipeline (ohne Kopie)
+
+    Args:
+        audio: Waveform (16 kHz, mono, float32)
+
+    Returns:
+        Dictionary mit 'waveform' (Tensor der Form (1, Samples)) und
+        'sample_rate'
+    """
+    import torch
+
+    waveform = torch.from_numpy(audio).unsqueeze(0)
+    return {"waveform": waveform, "sample_rate": SAMPLE_RATE}
+
+
+def get_duration(audio: np.ndarray) -> float:
+    """
+    Berechnet die Dauer einer Waveform
+
+    Args:
+        audio: Waveform (16 kHz)
+
+    Returns:
+        Dauer in Sekunden
+    """
+    return len(audio) / SAMPLE_RATE
+
+
+def describe_audio(audio: AudioInput) -> str:
+    """
+    Erstellt eine kurze Beschreibung für Log-Ausgaben
+
+    Args:
+        audio: Pfad zur Audiodatei oder dekodierte Waveform
+
+    Returns:
+        Dateipfad oder Dauer der Waveform
+    """
+    if isinstance(audio, np.ndarray):
+        return f"Audio ({get_duration(audio):.1f}s)"
+    return str(audio)
+
+
+def frame_energy_db(audio: np.ndarray, frame_seconds: float = 0.03) -> np.ndarray:
+    """
+    Berechnet die Energie pro Frame
+
+    Args:
+        audio: Waveform (16 kHz)
+        frame_seconds: Framelänge in Sekunden
+
+    Returns:
+        RMS-Energie pro Frame in dB
+    """
+    frame_length = max(1, int(frame_seconds * SAMPLE_RATE))
+    num_frames = len(audio) // frame_length
+    if num_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+
+    frames = audio[:num_frames * frame_length].reshape(num_frames, frame_length)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+    return 20.0 * np.log10(rms + 1e-10)
+
+
+def find_split_points(
+    audio: np.ndarray,
+    chunk_seconds: float,
+    search_seconds: float = 15.0,
+    frame_seconds: float = 0.03
+) -> List[int]:
+    """
+    Sucht Schnittpunkte in Sprechpausen nahe der gewünschten Chunklänge
+
+    Args:
+        audio: Waveform (16 kHz)
+        chunk_seconds: Gewünschte Chunklänge in Sekunden
+        search_seconds: Suchradius um jede Zielposition in Sekunden (wird auf
+            weniger als die halbe Chunklänge begrenzt)
+        frame_seconds: Framelänge der Energieanalyse
+
+    Returns:
+        Sortierte Schnittpositionen in Samples (ohne Anfang und Ende)
+    """
+    energy = frame_energy_db(audio, frame_seconds)
+    frame_length = int(frame_seconds * SAMPLE_RATE)
+    frames_per_chunk = max(int(chunk_seconds / frame_seconds), 1)
+    # Ein Suchradius ab der halben Chunklänge würde wieder bis zum vorherigen
+    # Schnittpunkt reichen und ihn erneut finden
+    search_frames = min(int(search_seconds / frame_seconds), (frames_per_chunk - 1) // 2)
+
+    split_points = []
+    previous = 0
+    target = frames_per_chunk
+    while target < len(energy) - search_frames - 1:
+        # Schnittpunkte liegen immer strikt hinter dem vorherigen
+        lo = max(target - search_frames, previous + 1)
+        hi = min(target + search_frames + 1, len(energy) - 1)
+        # Leisester Frame im Suchfenster
+        best = lo + int(np.argmin(energy[lo:hi]))
+        split_points.append(best * frame_length)
+        previous = best
+        target = best + frames_per_chunk
+
+    return split_points
+
+
+def split_audio(
+    audio: np.ndarray,
+    chunk_seconds: float,
+    overlap_seconds: float = 0.0
+) -> List[Tuple[int, int, int, int]]:
+    """
+    Teilt eine Waveform an Sprechpausen in Chunks
+
+    Args:
+        audio: Waveform (16 kHz)
+        chunk_seconds: Gewünschte Chunklänge in Sekunden
+        overlap_seconds: Zusätzlicher Kontext auf beiden Seiten eines Chunks
+
+    Returns:
+        Liste von (start, end, context_start, context_end) in Samples.
+        [start, end) ist der Bereich, für den der Chunk zuständig ist,
+        [context_start, context_end) der tatsächlich dekodierte Ausschnitt.
+    """
+    boundaries = [0] + find_split_points(audio, chunk_seconds) + [len(audio)]
+    overlap = int(overlap_seconds * SAMPLE_RATE)
+
+    return [
+        (start, end, max(0, start - overlap), min(len(audio), end + overlap))
+        for start, end in zip(boundaries[:-1], boundaries[1:])
+    ]
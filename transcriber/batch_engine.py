@@ -0,0 +1,462 @@
+"""
+Batch-Engine: transkribiert mehrere Dateien gleichzeitig mit einem Modell
+
+Die Engine sammelt 30-Sekunden-Fenster aus allen wartenden Aufträgen, führt
+den Encoder auf einem gemeinsamen Batch-Tensor aus und dekodiert die Fenster
+im Gleichschritt. Die Ergebnisse werden pro Auftrag wieder zusammengesetzt.
+
+Mit Feature-Cache werden Mel-Fenster, Encoder-Ausgaben und erkannte Sprache
+pro Aufnahme wiederverwendet; ein Auftrag kann außerdem mehrere Tasks
+(Transkription und Übersetzung) aus einem Encoder-Durchlauf dekodieren.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import torch
+import whisper
+from whisper.audio import N_SAMPLES
+from whisper.tokenizer import get_tokenizer
+
+try:
+    from .audio import SAMPLE_RATE, get_duration
+    from .feature_cache import FeatureCache
+except ImportError:
+    from audio import SAMPLE_RATE, get_duration
+    from feature_cache import FeatureCache
+
+# Sekunden pro Timestamp-Token
+TIME_PRECISION = 0.02
+WINDOW_SECONDS = N_SAMPLES / SAMPLE_RATE
+
+
+def tokens_to_segments(
+    tokenizer,
+    tokens: List[int],
+    offset: float,
+    window_end: float
+) -> List[Dict[str, Any]]:
+    """
+    Zerlegt dekodierte Tokens an Timestamp-Tokens in Segmente
+
+    Args:
+        tokenizer: Whisper Tokenizer
+        tokens: Dekodierte Tokens eines Fensters (ohne SOT/EOT)
+        offset: Startzeit des Fensters in Sekunden
+        window_end: Endzeit des Fensters in Sekunden (für offene Segmente)
+
+    Returns:
+        Liste von Segmenten mit 'start', 'end', 'text', 'tokens'
+    """
+    segments = []
+    start = None
+    text_tokens = []
+
+    def emit(end):
+        if text_tokens:
+            segments.append({
+                "start": offset + (start or 0.0),
+                "end": min(offset + end, window_end),
+                "text": tokenizer.decode(text_tokens),
+                "tokens": list(text_tokens)
+            })
+
+    for token in tokens:
+        if token >= tokenizer.timestamp_begin:
+            t = (token - tokenizer.timestamp_begin) * TIME_PRECISION
+            if start is None:
+                start = t
+            else:
+                emit(t)
+                start = None
+                text_tokens = []
+        else:
+            text_tokens.append(token)
+
+    # Letztes Segment ohne schließenden Timestamp
+    emit(window_end - offset)
+    return segments
+
+
+class BatchJob:
+    """Ein Transkriptionsauftrag der Batch-Engine"""
+
+    def __init__(
+        self,
+        audio: np.ndarray,
+        model_size: str,
+        language: Optional[str],
+        tasks: Tuple[str, ...],
+        fingerprint: Optional[str] = None
+    ):
+        self.audio = audio
+        self.model_size = model_size
+        self.language = language
+        self.tasks = tasks
+        self.fingerprint = fingerprint
+        self.future = Future()
+
+        self.num_windows = max(1, int(np.ceil(len(audio) / N_SAMPLES)))
+        self.next_window = 0
+        self.window_segments: Dict[str, List[Optional[List[Dict]]]] = {
+            task: [None] * self.num_windows for task in tasks
+        }
+        self.remaining = self.num_windows
+
+    @property
+    def key(self):
+        """Aufträge mit gleichem Schlüssel können gemeinsam dekodiert werden"""
+        return (self.model_size, self.tasks)
+
+    def mel(self, window: int, n_mels: int) -> torch.Tensor:
+        """Log-Mel-Spektrogramm eines 30-Sekunden-Fensters"""
+        chunk = self.audio[window * N_SAMPLES:(window + 1) * N_SAMPLES]
+        return whisper.log_mel_spectrogram(whisper.pad_or_trim(chunk), n_mels)
+
+    def add_window(self, window: int, segments: Dict[str, List[Dict]]):
+        """
+        Speichert das Ergebnis eines Fensters und schließt ggf. den Auftrag ab
+
+        Args:
+            window: Fensterindex
+            segments: Task -> Segmente des Fensters
+        """
+        for task, task_segments in segments.items():
+            self.window_segments[task][window] = task_segments
+        self.remaining -= 1
+        if self.remaining == 0:
+            if len(self.tasks) == 1:
+                self.future.set_result(self.build_result(self.tasks[0]))
+            else:
+                self.future.set_result({task: self.build_result(task) for task in self.tasks})
+
+    def build_result(self, task: str) -> Dict[str, Any]:
+        """Setzt die Fenster eines Tasks zu einem Whisper-Ergebnis zusammen"""
+        segments = []
+        for window, window_segments in enumerate(self.window_segments[task]):
+            for segment in window_segments:
+                segments.append({
+                    "id": len(segments),
+                    "seek": window * N_SAMPLES // whisper.audio.HOP_LENGTH,
+                    **segment
+                })
+
+        return {
+            "text": "".join(segment["text"] for segment in segments),
+            "segments": segments,
+            "language": self.language
+        }
+
+
+class BatchTranscriptionEngine:
+    """
+    Gemeinsame Batch-Verarbeitung gleichzeitig eingereichter Dateien
+
+    Alle Aufträge teilen sich das Modell aus dem Modell-Pool; es werden keine
+    zusätzlichen Modellkopien angelegt. Die Fenster werden fest in 30
+    Sekunden geschnitten (ohne Whispers Seek-Logik), damit Fenster
+    verschiedener Dateien im selben Batch laufen können.
+    """
+
+    def __init__(
+        self,
+        load_model: Callable[[str], Any],
+        max_batch_size: Optional[int] = None,
+        max_wait: Optional[float] = None,
+        feature_cache: Optional[FeatureCache] = None
+    ):
+        """
+        Args:
+            load_model: Funktion model_size -> Modell (z.B.
+                WhisperTranscriber.load_model)
+            max_batch_size: Maximale Fenster pro Batch (Standard:
+                TRANSCRIBER_BATCH_SIZE, sonst 8)
+            max_wait: Sekunden, die auf weitere Fenster gewartet wird
+                (Standard: TRANSCRIBER_BATCH_WAIT_MS, sonst 50 ms)
+            feature_cache: Cache für Mel-Fenster, Encoder-Ausgaben und
+                Spracherkennung (Standard: keiner)
+        """
+        if max_batch_size is None:
+            max_batch_size = int(os.getenv("TRANSCRIBER_BATCH_SIZE", "8"))
+        if max_wait is None:
+            max_wait = float(os.getenv("TRANSCRIBER_BATCH_WAIT_MS", "50")) / 1000
+
+        self.load_model = load_model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.feature_cache = feature_cache
+
+        self._jobs: List[BatchJob] = []
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def submit(
+        self,
+        audio: np.ndarray,
+        model_size: str = "base",
+        language: Optional[str] = None,
+        task: str = "transcribe",
+        tasks: Optional[Sequence[str]] = None
+    ) -> Future:
+        """
+        Reiht eine Waveform zur Transkription ein
+
+        Args:
+            audio: Waveform (16 kHz mono float32)
+            model_size: Größe des Whisper-Modells
+            language: Sprache (None für auto-detect)
+            task: 'transcribe' oder 'translate'
+            tasks: Mehrere Tasks aus einem Encoder-Durchlauf, z.B.
+                ('transcribe', 'translate'); ersetzt task
+
+        Returns:
+            Future mit dem Whisper-Ergebnis, bei mehreren Tasks mit einem
+            Dictionary Task -> Whisper-Ergebnis
+        """
+        fingerprint = None
+        if self.feature_cache is not None:
+            fingerprint = self.feature_cache.fingerprint(audio)
+        job = BatchJob(audio, model_size, language, tuple(tasks or (task,)), fingerprint)
+        with self._cond:
+            self._jobs.append(job)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._loop,
+                    name="batch-engine",
+                    daemon=True
+                )
+                self._thread.start()
+            self._cond.notify()
+        return job.future
+
+    def transcribe(self, audio: np.ndarray, **kwargs) -> Dict[str, Any]:
+        """Reiht eine Waveform ein und wartet auf das Ergebnis"""
+        return self.submit(audio, **kwargs).result()
+
+    def queue_depth(self) -> int:
+        """Anzahl noch nicht eingeplanter Fenster"""
+        with self._cond:
+            return self._open_windows()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._jobs:
+                    self._cond.wait()
+
+                # Kurz warten, damit sich Fenster weiterer Aufträge sammeln
+                deadline = time.monotonic() + self.max_wait
+                while self._open_windows() < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                batch = self._take_batch()
+
+            try:
+                self._process(batch)
+            except Exception as e:
+                print(f"Fehler in der Batch-Engine: {str(e)}")
+                for job in {id(job): job for job, _ in batch}.values():
+                    if not job.future.done():
+                        job.future.set_exception(e)
+                with self._cond:
+                    self._jobs = [job for job in self._jobs if not job.future.done()]
+
+    def _open_windows(self) -> int:
+        return sum(job.num_windows - job.next_window for job in self._jobs)
+
+    def _take_batch(self) -> List:
+        """
+        Wählt reihum Fenster aus allen Aufträgen mit gleichem Modell und Task
+        (Lock muss gehalten werden)
+        """
+        key = self._jobs[0].key
+        candidates = [job for job in self._jobs if job.key == key]
+
+        batch = []
+        while len(batch) < self.max_batch_size:
+            added = False
+            for job in candidates:
+                if job.next_window < job.num_windows and len(batch) < self.max_batch_size:
+                    batch.append((job, job.next_window))
+                    job.next_window += 1
+                    added = True
+            if not added:
+                break
+
+        self._jobs = [job for job in self._jobs if job.next_window < job.num_windows]
+        return batch
+
+    @torch.no_grad()
+    def _process(self, batch: List):
+        """Kodiert einen Batch gemeinsam und dekodiert ihn pro Sprache und Task"""
+        model_size, tasks = batch[0][0].key
+        model = self.load_model(model_size)
+        fp16 = model.device.type == "cuda"
+
+        # Encoder einmal für den ganzen Batch (bzw. aus dem Feature-Cache)
+        audio_features = self._encode(model, model_size, batch)
+
+        # Sprache einmal pro Auftrag anhand der Ausgabe des ersten Fensters
+        self._detect_languages(model, model_size, batch, audio_features)
+
+        # Dekodierung im Gleichschritt, gruppiert nach Task und Sprache
+        window_segments: List[Dict[str, List[Dict]]] = [{} for _ in batch]
+        languages = sorted({job.language for job, _ in batch})
+        for task in tasks:
+            for language in languages:
+                indices = [i for i, (job, _) in enumerate(batch) if job.language == language]
+                self._decode(
+                    model, audio_features, batch, indices, task, language, fp16,
+                    window_segments
+                )
+
+        for (job, window), segments in zip(batch, window_segments):
+            job.add_window(window, segments)
+
+    def _detect_languages(
+        self,
+        model,
+        model_size: str,
+        batch: List,
+        audio_features: torch.Tensor
+    ):
+        """
+        Erkennt die Sprache der Aufträge ohne Sprachangabe
+
+        Das erste Fenster eines neuen Auftrags liegt immer im selben Batch
+        (reihum ab Fenster 0), seine Encoder-Ausgabe wird daher direkt
+        wiederverwendet statt erneut kodiert.
+        """
+        first_windows = {id(job): i for i, (job, window) in enumerate(batch) if window == 0}
+        jobs = list({id(job): job for job, _ in batch}.values())
+        undetected = [job for job in jobs if not job.language]
+        if not undetected:
+            return
+        if not model.is_multilingual:
+            for job in undetected:
+                job.language = "en"
+            return
+
+        cache = self.feature_cache
+        if cache is not None:
+            for job in undetected:
+                job.language = cache.get_language(job.fingerprint, model_size)
+            undetected = [job for job in undetected if not job.language]
+            if not undetected:
+                return
+
+        # detect_language akzeptiert auch fertige Encoder-Ausgaben
+        in_batch = [job for job in undetected if id(job) in first_windows]
+        others = [job for job in undetected if id(job) not in first_windows]
+        features = [audio_features[[first_windows[id(job)] for job in in_batch]]]
+        if others:
+            features.append(self._encode(model, model_size, [(job, 0) for job in others]))
+        undetected = in_batch + others
+        _, probs = model.detect_language(torch.cat(features))
+        for job, job_probs in zip(undetected, probs):
+            job.language = max(job_probs, key=job_probs.get)
+            if cache is not None:
+                cache.put_language(job.fingerprint, model_size, job.language)
+
+    def _encode(self, model, model_size: str, windows: List) -> torch.Tensor:
+        """
+        Encoder-Ausgaben für (Auftrag, Fenster)-Paare
+
+        Nur Fenster, die nicht im Feature-Cache liegen, laufen durch den
+        Encoder; sie werden dabei gemeinsam als Batch berechnet.
+
+        Returns:
+            Tensor (Fenster, n_audio_ctx, n_audio_state) auf dem Modellgerät
+        """
+        dtype = torch.float16 if model.device.type == "cuda" else torch.float32
+        cache = self.feature_cache
+        features: List[Optional[torch.Tensor]] = [None] * len(windows)
+
+        missing = []
+        for i, (job, window) in enumerate(windows):
+            if cache is not None:
+                cached = cache.get(cache.features_key(job.fingerprint, model_size, window))
+                if cached is not None:
+                    features[i] = torch.from_numpy(cached).to(model.device, dtype)
+                    continue
+            missing.append(i)
+
+        if missing:
+            mels = torch.stack([
+                self._mel(windows[i][0], windows[i][1], model.dims.n_mels) for i in missing
+            ])
+            encoded = model.embed_audio(mels.to(model.device, dtype))
+            for i, window_features in zip(missing, encoded):
+                features[i] = window_features
+                if cache is not None:
+                    job, window = windows[i]
+                    cache.put(
+                        cache.features_key(job.fingerprint, model_size, window),
+                        window_features.cpu().numpy().copy()
+                    )
+
+        return torch.stack(features)
+
+    def _mel(self, job: BatchJob, window: int, n_mels: int) -> torch.Tensor:
+        """Mel-Fenster eines Auftrags (aus dem Feature-Cache, falls vorhanden)"""
+        cache = self.feature_cache
+        if cache is None:
+            return job.mel(window, n_mels)
+
+        key = cache.mel_key(job.fingerprint, n_mels, window)
+        cached = cache.get(key)
+        if cached is not None:
+            return torch.from_numpy(cached)
+        mel = job.mel(window, n_mels)
+        cache.put(key, mel.cpu().numpy().copy())
+        return mel
+
+    def _decode(
+        self,
+        model,
+        audio_features: torch.Tensor,
+        batch: List,
+        indices: List[int],
+        task: str,
+        language: str,
+        fp16: bool,
+        window_segments: List[Dict[str, List[Dict]]]
+    ):
+        """Dekodiert die Fenster einer Sprache für einen Task"""
+        options = whisper.DecodingOptions(task=task, language=language, fp16=fp16)
+        results = whisper.decode(model, audio_features[indices], options)
+
+        tokenizer = get_tokenizer(
+            model.is_multilingual,
+            num_languages=model.num_languages,
+            language=language,
+            task=task
+        )
+
+        for i, result in zip(indices, results):
+            job, window = batch[i]
+            offset = window * WINDOW_SECONDS
+            window_end = min(offset + WINDOW_SECONDS, get_duration(job.audio))
+
+            # Gleiche Stille-Regel wie whisper.transcribe()
+            if result.no_speech_prob > 0.6 and result.avg_logprob < -1.0:
+                segments = []
+            else:
+                segments = tokens_to_segments(
+                    tokenizer, result.tokens, offset, window_end
+                )
+                for segment in segments:
+                    segment.update({
+                        "temperature": result.temperature,
+                        "avg_logprob": result.avg_logprob,
+                        "compression_ratio": result.compression_ratio,
+                        "no_speech_prob": result.no_speech_prob
+                    })
+
+            window_segments[i][task] = segments
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Vergleicht zwei Ergebnisse von pipeline_benchmark.py
+
+Zeigt pro Fixture die relative Änderung der Kennzahlen und endet mit
+Exit-Code 1, wenn eine Zeit um mehr als den Schwellwert gestiegen ist.
+
+    python benchmarks/compare.py base.json neu.json --threshold 0.1
+"""
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+def _metrics(result: Dict[str, Any]) -> Iterator[Tuple[str, Optional[float]]]:
+    """Zeit-Kennzahlen einer Fixture (kleiner ist besser)"""
+    yield "wall_seconds", result.get("wall_seconds")
+    for name, seconds in result.get("stages", {}).items():
+        yield f"stage.{name}", seconds
+    for name in ("merge", "group"):
+        yield f"{name}.seconds", result.get("merge", {}).get(name, {}).get("seconds")
+
+
+def compare(
+    base: Dict[str, Any],
+    new: Dict[str, Any],
+    threshold: float,
+    min_seconds: float = 0.0
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Vergleicht alle Fixtures, die in beiden Ergebnissen vorkommen
+
+    Args:
+        base: Referenz-Ergebnis
+        new: Neues Ergebnis
+        threshold: Erlaubte relative Verschlechterung (0.1 = 10%)
+        min_seconds: Kleinere absolute Verschlechterungen gelten nicht als
+            Regression (Messrauschen bei sehr kurzen Stufen)
+
+    Returns:
+        Tuple (Zeilen mit 'fixture', 'metric', 'base', 'new', 'change',
+        'regression'; True falls eine Regression vorliegt)
+    """
+    rows = []
+    regressed = False
+    for fixture, new_result in new.get("fixtures", {}).items():
+        base_result = base.get("fixtures", {}).get(fixture)
+        if base_result is None:
+            continue
+        base_metrics = dict(_metrics(base_result))
+        for metric, new_value in _metrics(new_result):
+            base_value = base_metrics.get(metric)
+            if not base_value or new_value is None:
+                continue
+            change = new_value / base_value - 1.0
+            regression = change > threshold and new_value - base_value > min_seconds
+            regressed = regressed or regression
+            rows.append({
+                "fixture": fixture,
+                "metric": metric,
+                "base": base_value,
+                "new": new_value,
+                "change": change,
+                "regression": regression
+            })
+    return rows, regressed
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark-Ergebnisse vergleichen")
+    parser.add_argument("base", help="Referenz-Ergebnis (JSON)")
+    parser.add_argument("new", help="Neues Ergebnis (JSON)")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1,
+        help="Erlaubte Verschlechterung als Anteil (Standard: 0.1 = 10%%)"
+    )
+    parser.add_argument(
+        "--min-seconds", type=float, default=0.005,
+        help="Mindestverschlechterung in Sekunden (Standard: 0.005)"
+    )
+    args = parser.parse_args(argv)
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+
+    if base.get("config") != new.get("config"):
+        print("Hinweis: Die Konfiguration der beiden Läufe unterscheidet sich")
+    print(
+        f"Commit {base.get('metadata', {}).get('commit')} -> "
+        f"{new.get('metadata', {}).get('commit')}"
+    )
+
+    rows, regressed = compare(base, new, args.threshold, args.min_seconds)
+    for row in rows:
+        marker = "  REGRESSION" if row["regression"] else ""
+        print(
+            f"{row['fixture']:<20} {row['metric']:<28} "
+            f"{row['base']:>10.4f}s {row['new']:>10.4f}s {row['change']:>+8.1%}{marker}"
+        )
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
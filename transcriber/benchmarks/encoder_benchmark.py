@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Latenz des Whisper-Encoders pro Fenster (eager, compile, onnx)
+
+Lädt für jede Engine ein frisches Modell auf der CPU, misst Einrichtungszeit
+(Export bzw. erster Aufruf mit Kompilierung) und die Latenz pro
+30-Sekunden-Fenster. Als Gegenprobe werden die Encoder-Ausgaben und die
+vollständigen Transkriptionsergebnisse mit eager verglichen.
+
+    python benchmarks/encoder_benchmark.py --model base --output encoder.json
+    python benchmarks/encoder_benchmark.py aufnahme.wav --engines eager onnx --batch 4
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio import SAMPLE_RATE, load_audio
+from benchmarks.fixtures import FIXTURES, synthesize
+from encoder_engine import ENGINES, install_encoder_engine
+from precision import load_whisper
+
+# Länge eines Encoder-Fensters
+WINDOW_SAMPLES = 30 * SAMPLE_RATE
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    return float(np.percentile(values, q)) if values else None
+
+
+def mel_batch(audio: np.ndarray, n_mels: int, batch: int):
+    """
+    Erstellt einen Batch Log-Mel-Fenster aus den ersten Fenstern der Aufnahme
+
+    Args:
+        audio: Waveform (16 kHz mono float32)
+        n_mels: Anzahl Mel-Bänder des Modells
+        batch: Anzahl Fenster
+
+    Returns:
+        Tensor (batch, n_mels, 3000)
+    """
+    import torch
+    import whisper
+
+    windows = []
+    for i in range(batch):
+        start = (i * WINDOW_SAMPLES) % max(len(audio), 1)
+        window = whisper.pad_or_trim(audio[start:start + WINDOW_SAMPLES])
+        windows.append(whisper.log_mel_spectrogram(window, n_mels))
+    return torch.stack(windows)
+
+
+def _comparable(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Ergebnis ohne Gleitkomma-Rauschen für den Vergleich mit eager"""
+    return {
+        "text": result.get("text"),
+        "language": result.get("language"),
+        "segments": [
+            (segment["start"], segment["end"], segment["text"])
+            for segment in result.get("segments", [])
+        ]
+    }
+
+
+def measure(
+    engine: str,
+    model_size: str,
+    audio: np.ndarray,
+    language: Optional[str],
+    batch: int,
+    warmup: int,
+    repeat: int,
+    cache_dir: str
+) -> Dict[str, Any]:
+    """
+    Misst eine Encoder-Engine
+
+    Args:
+        engine: 'eager', 'compile' oder 'onnx'
+        model_size: Größe des Whisper-Modells
+        audio: Waveform für Fenster und Transkription
+        language: Sprache der Transkription (None für auto-detect)
+        batch: Fenster pro Encoder-Aufruf
+        warmup: Aufrufe vor der Messung
+        repeat: Gemessene Aufrufe
+        cache_dir: Cache-Verzeichnis für exportierte Encoder
+
+    Returns:
+        Dictionary mit Zeiten, Encoder-Ausgabe und Transkriptionsergebnis
+    """
+    import torch
+
+    model = load_whisper(model_size, "cpu")
+    started = time.perf_counter()
+    install_encoder_engine(model, model_size, engine=engine, cache_dir=cache_dir)
+    setup_seconds = time.perf_counter() - started
+
+    mel = mel_batch(audio, model.dims.n_mels, batch)
+    with torch.no_grad():
+        started = time.perf_counter()
+        features = model.encoder(mel)
+        first_call_seconds = time.perf_counter() - started
+
+        for _ in range(warmup):
+            model.encoder(mel)
+
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            model.encoder(mel)
+            timings.append(time.perf_counter() - started)
+
+    result = model.transcribe(audio, language=language, temperature=0.0, verbose=None)
+
+    per_window = [seconds / batch for seconds in timings]
+    return {
+        "setup_seconds": setup_seconds,
+        "first_call_seconds": first_call_seconds,
+        "window_seconds_p50": statistics.median(per_window),
+        "window_seconds_p95": _percentile(per_window, 95),
+        "windows_per_second": batch / statistics.median(timings),
+        "_features": features.float(),
+        "_result": _comparable(result)
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Encoder-Latenz pro Fenster messen")
+    parser.add_argument(
+        "audio", nargs="?",
+        help="Aufnahme (Standard: synthetische Fixture short_2spk)"
+    )
+    parser.add_argument("--model", default="base", help="Whisper Modellgröße (Standard: base)")
+    parser.add_argument(
+        "--engines", nargs="*", default=list(ENGINES), choices=ENGINES,
+        help="Zu messende Engines (Standard: eager compile onnx)"
+    )
+    parser.add_argument("--language", default="en", help="Sprache der Transkription (Standard: en)")
+    parser.add_argument("--batch", type=int, default=1, help="Fenster pro Aufruf (Standard: 1)")
+    parser.add_argument("--warmup", type=int, default=2, help="Aufrufe vor der Messung (Standard: 2)")
+    parser.add_argument("--repeat", type=int, default=10, help="Gemessene Aufrufe (Standard: 10)")
+    parser.add_argument("--threads", type=int, help="Torch-Threads (Standard: Torch-Vorgabe)")
+    parser.add_argument(
+        "--cache-dir",
+        help="Cache für exportierte Encoder (Standard: temporäres Verzeichnis, "
+             "d.h. die Einrichtungszeit enthält Export bzw. Kompilierung)"
+    )
+    parser.add_argument("--output", help="Ergebnis zusätzlich als JSON speichern")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+    import torch
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    if args.audio:
+        audio = load_audio(args.audio)
+    else:
+        spec = FIXTURES[0]
+        audio, _ = synthesize(spec["seconds"], spec["speakers"], spec["silence_ratio"])
+
+    # eager zuerst: Referenz für die Gegenprobe
+    engines = ["eager"] + [engine for engine in args.engines if engine != "eager"]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache_dir = args.cache_dir or temp_dir
+        # Kernel-Cache von Inductor ebenfalls in das gewählte Verzeichnis
+        os.environ["TORCHINDUCTOR_CACHE_DIR"] = os.path.join(cache_dir, "inductor")
+        for engine in engines:
+            print(f"Engine {engine}...")
+            results[engine] = measure(
+                engine, args.model, audio, args.language,
+                args.batch, args.warmup, args.repeat, cache_dir
+            )
+
+    eager = results["eager"]
+    eager_features = eager.pop("_features")
+    eager_result = eager.pop("_result")
+    for engine, result in results.items():
+        if engine == "eager":
+            continue
+        features = result.pop("_features")
+        result["speedup"] = eager["window_seconds_p50"] / result["window_seconds_p50"]
+        result["max_abs_diff"] = float((features - eager_features).abs().max())
+        result["identical_result"] = result.pop("_result") == eager_result
+
+    report = {
+        "benchmark": "encoder",
+        "metadata": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "torch": torch.__version__,
+            "torch_threads": torch.get_num_threads()
+        },
+        "config": {
+            "audio": os.path.abspath(args.audio) if args.audio else FIXTURES[0]["name"],
+            "model": args.model,
+            "batch": args.batch,
+            "repeat": args.repeat
+        },
+        "engines": {engine: results[engine] for engine in engines if engine in args.engines}
+    }
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
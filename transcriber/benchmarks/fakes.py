@@ -0,0 +1,175 @@
+"""
+Stand-ins für Whisper und pyannote mit einstellbarer Latenz
+
+Die Fakes verbrauchen pro Sekunde Audio eine feste Rechenzeit
+(Real-Time-Factor) und liefern plausible Ergebnisse, so dass alles um die
+Modelle herum (Dekodierung, Pipeline, Zusammenführen, Export) unter
+realistischen Bedingungen gemessen wird - ohne Torch, Modelle oder GPU.
+"""
+
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio import SAMPLE_RATE, AudioInput, ensure_waveform, frame_energy_db, get_duration
+from diarization import SpeakerDiarizer
+from metrics import stage
+from pipeline import TranscriptionPipeline
+
+# Ab dieser Energie gilt ein Frame als Sprache
+SPEECH_DB = -40.0
+
+# Sprechtempo für die erzeugten Wörter
+WORDS_PER_SECOND = 2.5
+
+
+def _busy_wait(seconds: float):
+    """Belegt die CPU wie ein Modell (statt sleep, das sie freigibt)"""
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class FakeWhisperModel:
+    """Verhält sich bei transcribe() wie ein Whisper-Modell"""
+
+    is_multilingual = False
+
+    def __init__(
+        self,
+        model_size: str,
+        realtime_factor: float = 0.05,
+        segment_seconds: float = 4.0
+    ):
+        """
+        Args:
+            model_size: Modellgröße (nur zur Kennzeichnung)
+            realtime_factor: Rechenzeit pro Sekunde Audio
+            segment_seconds: Länge der erzeugten Segmente
+        """
+        self.model_size = model_size
+        self.realtime_factor = realtime_factor
+        self.segment_seconds = segment_seconds
+
+    def parameters(self):
+        return []
+
+    def buffers(self):
+        return []
+
+    def transcribe(self, audio: AudioInput, word_timestamps: bool = False, **kwargs) -> Dict[str, Any]:
+        audio = ensure_waveform(audio)
+        _busy_wait(get_duration(audio) * self.realtime_factor)
+
+        # Segmente nur dort, wo Energie vorhanden ist (wie Whisper nach VAD)
+        energy = frame_energy_db(audio)
+        frames_per_second = len(energy) / max(get_duration(audio), 1e-9)
+        segments = []
+        position = 0.0
+        duration = get_duration(audio)
+        while position < duration:
+            end = min(position + self.segment_seconds, duration)
+            window = energy[int(position * frames_per_second):int(end * frames_per_second)]
+            if len(window) and np.mean(window > SPEECH_DB) > 0.3:
+                segments.append(self._segment(len(segments), position, end, word_timestamps))
+            position = end
+
+        return {
+            "text": "".join(segment["text"] for segment in segments),
+            "segments": segments,
+            "language": kwargs.get("language") or "en"
+        }
+
+    def _segment(self, index: int, start: float, end: float, word_timestamps: bool) -> Dict[str, Any]:
+        num_words = max(1, int((end - start) * WORDS_PER_SECOND))
+        words = [f"wort{index}_{i}" for i in range(num_words)]
+        segment = {
+            "id": index,
+            "seek": int(start * 100),
+            "start": start,
+            "end": end,
+            "text": " " + " ".join(words),
+            "tokens": list(range(num_words)),
+            "temperature": 0.0,
+            "avg_logprob": -0.2,
+            "compression_ratio": 1.2,
+            "no_speech_prob": 0.01
+        }
+        if word_timestamps:
+            step = (end - start) / num_words
+            segment["words"] = [
+                {"word": f" {word}", "start": start + i * step, "end": start + (i + 1) * step}
+                for i, word in enumerate(words)
+            ]
+        return segment
+
+
+def fake_whisper_loader(realtime_factor: float = 0.05) -> Callable[[str, str], FakeWhisperModel]:
+    """
+    Loader für den Modell-Pool (siehe ModelPool(loader=...))
+
+    Args:
+        realtime_factor: Rechenzeit pro Sekunde Audio
+    """
+    def loader(model_size: str, device: str) -> FakeWhisperModel:
+        return FakeWhisperModel(model_size, realtime_factor)
+    return loader
+
+
+class FakeDiarizer(SpeakerDiarizer):
+    """
+    Sprechertrennung, die die Referenz-Turns der Fixture zurückgibt
+
+    Zusammenführen und Gruppieren stammen unverändert aus SpeakerDiarizer.
+    """
+
+    def __init__(self, realtime_factor: float = 0.02, jitter: float = 0.2):
+        """
+        Args:
+            realtime_factor: Rechenzeit pro Sekunde Audio
+            jitter: Maximale Verschiebung der Turn-Grenzen in Sekunden
+        """
+        super().__init__()
+        self.speaker_store = None
+        self.realtime_factor = realtime_factor
+        self.jitter = jitter
+        self.reference_turns: List[Dict] = []
+
+    def load_pipeline(self):
+        pass
+
+    @stage("diarization")
+    def run_diarization(
+        self,
+        audio: AudioInput,
+        num_speakers: Optional[int] = None,
+        min_speakers: Optional[int] = None,
+        max_speakers: Optional[int] = None,
+        return_state: bool = False
+    ):
+        audio = ensure_waveform(audio)
+        _busy_wait(get_duration(audio) * self.realtime_factor)
+
+        # Deterministisch leicht verschobene Grenzen wie bei echter Diarization
+        rng = np.random.default_rng(len(audio) % SAMPLE_RATE)
+        turns = []
+        for turn in self.reference_turns:
+            shift = float(rng.uniform(-self.jitter, self.jitter))
+            turns.append({
+                "start": max(0.0, turn["start"] + shift),
+                "end": max(0.0, turn["end"] + shift),
+                "speaker": turn["speaker"]
+            })
+        return (turns, None) if return_state else turns
+
+
+class FakeThreadPipeline(TranscriptionPipeline):
+    """Pipeline für die Fakes: keine Aufteilung der Torch-Threads"""
+
+    def _thread_split(self):
+        return None, None
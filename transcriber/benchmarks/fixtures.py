@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Synthetische Audio-Fixtures für die Benchmarks
+
+Die Aufnahmen werden lokal und deterministisch erzeugt: jeder Sprecher ist
+ein harmonischer Klang mit eigener Grundfrequenz und Silbenrhythmus,
+unterbrochen von Pausen gemäß Stilleanteil. Zu jeder Aufnahme gehören die
+echten Sprecher-Turns als Referenz.
+
+    python benchmarks/fixtures.py --output-dir /tmp/fixtures
+"""
+
+import argparse
+import json
+import os
+import sys
+import wave
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio import SAMPLE_RATE
+
+# Standard-Fixtures: Länge, Sprecheranzahl und Stilleanteil variieren
+FIXTURES = [
+    {"name": "short_2spk", "seconds": 30, "speakers": 2, "silence_ratio": 0.1},
+    {"name": "medium_3spk", "seconds": 300, "speakers": 3, "silence_ratio": 0.2},
+    {"name": "medium_2spk_silent", "seconds": 300, "speakers": 2, "silence_ratio": 0.6},
+    {"name": "long_4spk", "seconds": 1800, "speakers": 4, "silence_ratio": 0.3},
+]
+
+
+def synthesize(
+    seconds: float,
+    speakers: int,
+    silence_ratio: float,
+    seed: int = 0
+) -> Tuple[np.ndarray, List[Dict]]:
+    """
+    Erzeugt eine Aufnahme mit abwechselnden Sprechern
+
+    Args:
+        seconds: Länge in Sekunden
+        speakers: Anzahl Sprecher
+        silence_ratio: Anteil der Pausen an der Gesamtdauer (0..1)
+        seed: Startwert des Zufallsgenerators
+
+    Returns:
+        Tuple (Waveform 16 kHz mono float32, Referenz-Turns mit 'start',
+        'end', 'speaker')
+    """
+    rng = np.random.default_rng(seed)
+    num_samples = int(seconds * SAMPLE_RATE)
+    # Leises Grundrauschen, damit Pausen nicht digital still sind
+    audio = (rng.standard_normal(num_samples) * 1e-4).astype(np.float32)
+
+    turns = []
+    position = 0.0
+    speaker = 0
+    while position < seconds:
+        turn_seconds = float(rng.uniform(2.0, 8.0))
+        gap = turn_seconds * silence_ratio / max(1.0 - silence_ratio, 1e-3)
+        gap *= float(rng.uniform(0.5, 1.5))
+
+        start = position
+        end = min(position + turn_seconds, seconds)
+        _render_voice(audio, start, end, speaker, rng)
+        turns.append({"start": start, "end": end, "speaker": f"SPEAKER_{speaker:02d}"})
+
+        position = end + gap
+        if speakers > 1:
+            speaker = (speaker + int(rng.integers(1, speakers))) % speakers
+
+    return audio, turns
+
+
+def _render_voice(
+    audio: np.ndarray,
+    start: float,
+    end: float,
+    speaker: int,
+    rng: np.random.Generator
+):
+    """Schreibt den Klang eines Sprechers in den Bereich [start, end)"""
+    first = int(start * SAMPLE_RATE)
+    last = min(int(end * SAMPLE_RATE), len(audio))
+    if last <= first:
+        return
+
+    t = np.arange(last - first, dtype=np.float32) / SAMPLE_RATE
+    f0 = 90.0 + 45.0 * speaker + float(rng.uniform(-5.0, 5.0))
+    voice = np.zeros_like(t)
+    for harmonic in range(1, 6):
+        voice += np.sin(2 * np.pi * harmonic * f0 * t) / harmonic
+    # Silbenrhythmus (3-5 Hz), sprecherabhängig
+    syllables = 0.5 + 0.5 * np.sin(2 * np.pi * (3.0 + 0.5 * speaker) * t)
+    audio[first:last] += 0.1 * voice * syllables
+
+
+def write_wav(path: str, audio: np.ndarray):
+    """Speichert eine Waveform als 16 kHz mono 16 bit WAV"""
+    samples = np.clip(audio, -1.0, 1.0 - 1.0 / 32768.0)
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes((samples * 32768.0).astype(np.int16).tobytes())
+
+
+def ensure_fixture(spec: Dict, output_dir: str) -> Tuple[str, List[Dict]]:
+    """
+    Legt eine Fixture an, falls sie noch nicht existiert
+
+    Args:
+        spec: Eintrag aus FIXTURES
+        output_dir: Zielverzeichnis
+
+    Returns:
+        Tuple (Pfad der WAV-Datei, Referenz-Turns)
+    """
+    directory = Path(output_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    wav_path = directory / f"{spec['name']}.wav"
+    truth_path = directory / f"{spec['name']}.json"
+
+    if wav_path.exists() and truth_path.exists():
+        with open(truth_path, encoding="utf-8") as f:
+            truth = json.load(f)
+        if truth.get("spec") == spec:
+            return str(wav_path), truth["turns"]
+
+    audio, turns = synthesize(
+        spec["seconds"], spec["speakers"], spec["silence_ratio"], seed=spec.get("seed", 0)
+    )
+    write_wav(str(wav_path), audio)
+    with open(truth_path, "w", encoding="utf-8") as f:
+        json.dump({"spec": spec, "turns": turns}, f, indent=2)
+    return str(wav_path), turns
+
+
+def select_fixtures(names: Optional[List[str]]) -> List[Dict]:
+    """Wählt Fixtures nach Namen aus (None: alle)"""
+    if not names:
+        return list(FIXTURES)
+    known = {spec["name"]: spec for spec in FIXTURES}
+    unknown = [name for name in names if name not in known]
+    if unknown:
+        raise ValueError(f"Unbekannte Fixtures: {', '.join(unknown)}")
+    return [known[name] for name in names]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark-Fixtures erzeugen")
+    parser.add_argument("--output-dir", required=True, help="Zielverzeichnis")
+    parser.add_argument("--fixtures", nargs="*", help="Namen (Standard: alle)")
+    args = parser.parse_args(argv)
+
+    for spec in select_fixtures(args.fixtures):
+        path, turns = ensure_fixture(spec, args.output_dir)
+        print(f"{path}: {spec['seconds']}s, {len(turns)} Turns")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Ende-zu-Ende-Latenz der Live-Transkription auf der CPU
+
+Spielt eine Audiodatei in Echtzeit-Chunks ein (wie ein Mikrofon) und misst,
+wie viele Sekunden nach dem Ende eines Worts dieses festgeschrieben ist.
+
+    python benchmarks/live_latency.py aufnahme.wav --model base --chunk 0.5
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio import SAMPLE_RATE, load_audio
+from live import TARGET_COMMIT_LATENCY, LiveTranscriber
+from transcriber import WhisperTranscriber
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    return float(np.percentile(values, q)) if values else None
+
+
+def measure(
+    audio: np.ndarray,
+    transcriber: WhisperTranscriber,
+    model_size: str,
+    language: Optional[str],
+    chunk_seconds: float
+) -> Dict[str, Any]:
+    """
+    Spielt die Waveform in Echtzeit ein und misst die Latenzen
+
+    Args:
+        audio: Waveform (16 kHz mono float32)
+        transcriber: Transkriptor mit Modell-Pool
+        model_size: Größe des Whisper-Modells
+        language: Sprache (None für auto-detect)
+        chunk_seconds: Länge der eingespielten Chunks
+
+    Returns:
+        Dictionary mit Latenz-Kennzahlen in Sekunden
+    """
+    # Modell vorab laden, damit die Ladezeit nicht in die Latenz eingeht
+    transcriber.load_model(model_size)
+
+    session = LiveTranscriber(transcriber, model_size=model_size, language=language)
+    chunk = max(1, int(chunk_seconds * SAMPLE_RATE))
+
+    commit_latencies = []
+    update_seconds = []
+    first_text = None
+    started = time.perf_counter()
+
+    for position in range(0, len(audio), chunk):
+        piece = audio[position:position + chunk]
+
+        # Wie ein Mikrofon: der Chunk ist erst nach seiner Dauer verfügbar
+        arrival = (position + len(piece)) / SAMPLE_RATE
+        wait = arrival - (time.perf_counter() - started)
+        if wait > 0:
+            time.sleep(wait)
+
+        session.insert_audio(piece)
+        update_started = time.perf_counter()
+        result = session.process()
+        if result is None:
+            continue
+
+        now = time.perf_counter()
+        update_seconds.append(now - update_started)
+        elapsed = now - started
+        commit_latencies.extend(elapsed - end for _, end, _ in result["committed"])
+        if first_text is None and (result["text"] or result["partial"]):
+            first_text = elapsed
+
+    # Rest nach dem Ende der Aufnahme
+    flush_started = time.perf_counter()
+    session.finish()
+    final_flush = time.perf_counter() - flush_started
+
+    return {
+        "audio_seconds": len(audio) / SAMPLE_RATE,
+        "wall_seconds": time.perf_counter() - started,
+        "words": len(session.committed),
+        "streamed_words": len(commit_latencies),
+        "commit_latency_p50": _percentile(commit_latencies, 50),
+        "commit_latency_p95": _percentile(commit_latencies, 95),
+        "commit_latency_max": max(commit_latencies) if commit_latencies else None,
+        "update_seconds_p50": _percentile(update_seconds, 50),
+        "update_seconds_p95": _percentile(update_seconds, 95),
+        "first_text_seconds": first_text,
+        "final_flush_seconds": final_flush,
+        "text": session.text
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Latenz der Live-Transkription messen")
+    parser.add_argument("audio", help="Audiodatei mit Sprache")
+    parser.add_argument("--model", default="base", help="Whisper Modellgröße")
+    parser.add_argument("--language", help="Sprache (Standard: auto)")
+    parser.add_argument(
+        "--chunk", type=float, default=0.5,
+        help="Chunklänge in Sekunden (Standard: 0.5)"
+    )
+    parser.add_argument(
+        "--target", type=float, default=TARGET_COMMIT_LATENCY,
+        help=f"Zielwert für das p95 der Latenz (Standard: {TARGET_COMMIT_LATENCY})"
+    )
+    parser.add_argument("--output", help="Ergebnis zusätzlich als JSON speichern")
+    args = parser.parse_args(argv)
+
+    # Der Zielwert gilt für die CPU (Torch ist hier noch nicht importiert)
+    os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+    report = {
+        "benchmark": "live_latency",
+        "model": args.model,
+        "chunk_seconds": args.chunk,
+        "target_p95": args.target,
+        **measure(
+            load_audio(args.audio),
+            WhisperTranscriber(),
+            args.model,
+            args.language,
+            args.chunk
+        )
+    }
+    p95 = report["commit_latency_p95"]
+    report["passed"] = p95 is not None and p95 <= args.target
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    return 0 if report["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark: PDF-Export langer Transkripte (Canvas gegen Platypus)
+
+Erzeugt ein synthetisches Transkript und exportiert es mit beiden
+Renderern. Gemessen werden Laufzeit, Spitzen-Speicher der Python-Objekte
+(tracemalloc, separater Lauf) und Dateigröße.
+
+    python benchmarks/pdf_export.py --segments 10000 --output pdf.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from export import ExportManager
+
+WORDS = (
+    "und die der wir haben heute das Projekt besprochen Budget Zeitplan "
+    "Kunde Anforderungen nächste Woche Termin vielleicht genau richtig "
+    "Übersicht Änderungen Größe Entwicklung Datenbank Schnittstelle"
+).split()
+
+
+def synthetic_transcript(num_segments: int, speakers: int = 4, seed: int = 0) -> Dict[str, Any]:
+    """
+    Erzeugt ein Transkript mit Sprechertrennung
+
+    Args:
+        num_segments: Anzahl Segmente
+        speakers: Anzahl Sprecher
+        seed: Startwert des Zufallsgenerators
+
+    Returns:
+        Dictionary wie SpeakerDiarizer.merge_with_transcription
+    """
+    rng = np.random.default_rng(seed)
+    segments = []
+    position = 0.0
+    for i in range(num_segments):
+        duration = float(rng.uniform(2.0, 20.0))
+        num_words = int(duration * 2.5)
+        words = rng.choice(WORDS, size=num_words)
+        segments.append({
+            "start": position,
+            "end": position + duration,
+            "text": " ".join(words),
+            "speaker": f"SPEAKER_{i % speakers:02d}"
+        })
+        position += duration + float(rng.uniform(0.0, 1.0))
+    return {"text": "", "segments": segments, "language": "de"}
+
+
+def measure(renderer: str, data: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    """
+    Exportiert mehrfach mit einem Renderer
+
+    Args:
+        renderer: 'canvas' oder 'platypus'
+        data: Transkript
+        repeat: Anzahl Läufe für die Zeitmessung
+
+    Returns:
+        Dictionary mit Median-Zeit, Spitzen-Speicher und Dateigröße
+    """
+    exporter = ExportManager()
+    exporter.pdf_renderer = renderer
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        path = os.path.join(output_dir, f"{renderer}.pdf")
+
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            exporter.export_to_pdf(data, path)
+            timings.append(time.perf_counter() - started)
+
+        # tracemalloc verlangsamt stark, daher getrennt von der Zeitmessung
+        tracemalloc.start()
+        exporter.export_to_pdf(data, path)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        size = os.path.getsize(path)
+
+    seconds = statistics.median(timings)
+    return {
+        "seconds": seconds,
+        "segments_per_second": len(data["segments"]) / seconds,
+        "peak_python_bytes": peak,
+        "file_bytes": size
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="PDF-Export messen")
+    parser.add_argument("--segments", type=int, default=10000, help="Anzahl Segmente (Standard: 10000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Läufe pro Renderer (Standard: 3)")
+    parser.add_argument(
+        "--renderers", nargs="*", default=["canvas", "platypus"],
+        help="Zu messende Renderer (Standard: canvas platypus)"
+    )
+    parser.add_argument("--output", help="Ergebnis zusätzlich als JSON speichern")
+    args = parser.parse_args(argv)
+
+    data = synthetic_transcript(args.segments)
+    report = {
+        "benchmark": "pdf_export",
+        "segments": args.segments,
+        "renderers": {
+            renderer: measure(renderer, data, args.repeat) for renderer in args.renderers
+        }
+    }
+
+    if "canvas" in report["renderers"] and "platypus" in report["renderers"]:
+        canvas = report["renderers"]["canvas"]
+        platypus = report["renderers"]["platypus"]
+        report["speedup"] = platypus["seconds"] / canvas["seconds"]
+        report["memory_ratio"] = platypus["peak_python_bytes"] / max(canvas["peak_python_bytes"], 1)
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
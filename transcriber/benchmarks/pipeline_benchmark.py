@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Durchsatz der Verarbeitungs-Pipeline auf synthetischen Aufnahmen
+
+Misst pro Fixture die Ende-zu-Ende-Zeit (Dekodierung, Transkription,
+Sprechertrennung, Zusammenführen, Export) und die Zeiten der einzelnen
+Stufen, dazu Mikro-Benchmarks für das Zusammenführen und Gruppieren der
+Segmente. Standardmäßig ersetzen Stand-ins mit fester Rechenzeit pro
+Sekunde Audio Whisper und pyannote, so dass die Ergebnisse ohne Modelle
+und GPU reproduzierbar sind.
+
+    python benchmarks/pipeline_benchmark.py --output base.json
+    python benchmarks/pipeline_benchmark.py --fixtures short_2spk --real --output real.json
+    python benchmarks/compare.py base.json neu.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import FakeDiarizer, FakeThreadPipeline, fake_whisper_loader
+from benchmarks.fixtures import ensure_fixture, select_fixtures
+from diarization import SpeakerDiarizer, SpeakerIndex
+from export import ExportManager
+from metrics import profile_job
+from model_pool import ModelPool
+from pipeline import TranscriptionPipeline
+from transcriber import WhisperTranscriber
+
+
+def _median(values: List[float]) -> Optional[float]:
+    return float(statistics.median(values)) if values else None
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _has_reportlab() -> bool:
+    try:
+        import reportlab  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def build_pipeline(args) -> TranscriptionPipeline:
+    """
+    Erstellt die Pipeline mit Stand-ins oder echten Modellen
+
+    Args:
+        args: Kommandozeilen-Argumente
+
+    Returns:
+        Pipeline ohne Ergebnis-Cache
+    """
+    if args.real:
+        transcriber = WhisperTranscriber(ModelPool(idle_ttl=0))
+    else:
+        transcriber = WhisperTranscriber(
+            ModelPool(device="cpu", loader=fake_whisper_loader(args.whisper_rtf), idle_ttl=0)
+        )
+
+    if args.real_diarization:
+        diarizer = SpeakerDiarizer()
+    else:
+        diarizer = FakeDiarizer(args.diarization_rtf)
+
+    pipeline_class = TranscriptionPipeline if args.real or args.real_diarization else FakeThreadPipeline
+    return pipeline_class(transcriber, diarizer, parallel=args.parallel, cache=None)
+
+
+def run_fixture(
+    pipeline: TranscriptionPipeline,
+    exporter: ExportManager,
+    audio_path: str,
+    model_size: str,
+    repeat: int,
+    export_pdf: bool
+) -> Dict[str, Any]:
+    """
+    Verarbeitet eine Fixture mehrfach und fasst die Zeiten zusammen
+
+    Args:
+        pipeline: Pipeline (ohne Cache, damit jeder Lauf rechnet)
+        exporter: Export-Manager
+        audio_path: Pfad der WAV-Datei
+        model_size: Größe des Whisper-Modells
+        repeat: Anzahl Läufe
+        export_pdf: PDF-Export mitmessen
+
+    Returns:
+        Dictionary mit Medianen (Ende-zu-Ende und pro Stufe)
+    """
+    wall_seconds = []
+    stage_seconds: Dict[str, List[float]] = {}
+    peak_rss = []
+    audio_seconds = 0.0
+    segments = 0
+
+    # Modell vorab laden, damit die Ladezeit nicht in die Messung eingeht
+    pipeline.transcriber.load_model(model_size)
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        base_path = os.path.join(output_dir, "transkript")
+        for _ in range(repeat):
+            with profile_job(os.path.basename(audio_path)) as profile:
+                final_result, transcription_result = pipeline.run(
+                    audio_path,
+                    model_size=model_size,
+                    language="en",
+                    enable_diarization=True
+                )
+                if transcription_result is None:
+                    raise RuntimeError(f"Transkription fehlgeschlagen: {audio_path}")
+                exporter.export_to_txt(final_result, f"{base_path}.txt")
+                if export_pdf:
+                    exporter.export_to_pdf(final_result, f"{base_path}.pdf")
+
+            wall_seconds.append(profile.wall_seconds)
+            audio_seconds = profile.audio_seconds
+            if profile.peak_rss is not None:
+                peak_rss.append(profile.peak_rss)
+            for name, totals in profile.stages.items():
+                stage_seconds.setdefault(name, []).append(totals["wall_seconds"])
+            segments = len(transcription_result.get("segments", []))
+
+    wall = _median(wall_seconds)
+    return {
+        "audio_seconds": audio_seconds,
+        "segments": segments,
+        "wall_seconds": wall,
+        "real_time_factor": wall / audio_seconds if audio_seconds else None,
+        "audio_seconds_per_second": audio_seconds / wall if wall else None,
+        "peak_rss": max(peak_rss) if peak_rss else None,
+        "stages": {name: _median(values) for name, values in sorted(stage_seconds.items())}
+    }
+
+
+def _throughput(fn: Callable[[], Any], items: int, repeat: int) -> Dict[str, float]:
+    """Misst den Median einer Funktion und rechnet in Elemente/s um"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    seconds = _median(timings)
+    return {
+        "seconds": seconds,
+        "items_per_second": items / seconds if seconds else None
+    }
+
+
+def run_merge_benchmarks(
+    diarizer: SpeakerDiarizer,
+    transcription_result: Dict[str, Any],
+    speaker_turns: List[Dict],
+    repeat: int
+) -> Dict[str, Any]:
+    """
+    Mikro-Benchmarks für Zusammenführen und Gruppieren
+
+    Args:
+        diarizer: Sprechertrennung (liefert die Implementierungen)
+        transcription_result: Whisper-Ergebnis mit Segmenten und Wörtern
+        speaker_turns: Sprecher-Turns
+        repeat: Anzahl Läufe
+
+    Returns:
+        Dictionary mit Zeiten und Segmenten/s
+    """
+    segments = transcription_result["segments"]
+    num_segments = len(segments)
+
+    # Eingabe des Gruppierens: Segmente mit Sprecher, noch nicht gruppiert
+    speakers = SpeakerIndex(speaker_turns).lookup(
+        [segment["start"] for segment in segments],
+        [segment["end"] for segment in segments]
+    )
+    labeled = [
+        {**segment, "speaker": speaker or "Unbekannt"}
+        for segment, speaker in zip(segments, speakers)
+    ]
+    return {
+        "segments": num_segments,
+        "speaker_turns": len(speaker_turns),
+        "merge": _throughput(
+            lambda: diarizer._merge_diarization_with_transcription(
+                speaker_turns, transcription_result
+            ),
+            num_segments,
+            repeat
+        ),
+        "group": _throughput(
+            lambda: diarizer._group_segments_by_speaker(labeled),
+            num_segments,
+            repeat
+        )
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Durchsatz der Pipeline messen")
+    parser.add_argument("--fixtures", nargs="*", help="Fixtures (Standard: alle)")
+    parser.add_argument(
+        "--fixtures-dir",
+        default=os.path.join(tempfile.gettempdir(), "transcriber-benchmark-fixtures"),
+        help="Verzeichnis für die erzeugten Aufnahmen"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Läufe pro Fixture (Standard: 3)")
+    parser.add_argument(
+        "--whisper-rtf", type=float, default=0.05,
+        help="Rechenzeit des Whisper-Stand-ins pro Sekunde Audio (Standard: 0.05)"
+    )
+    parser.add_argument(
+        "--diarization-rtf", type=float, default=0.02,
+        help="Rechenzeit des pyannote-Stand-ins pro Sekunde Audio (Standard: 0.02)"
+    )
+    parser.add_argument("--real", action="store_true", help="Echtes Whisper-Modell verwenden")
+    parser.add_argument("--model", default="tiny", help="Whisper Modellgröße mit --real (Standard: tiny)")
+    parser.add_argument(
+        "--real-diarization", action="store_true",
+        help="Echte pyannote-Sprechertrennung verwenden (benötigt HUGGINGFACE_TOKEN)"
+    )
+    parser.add_argument(
+        "--sequential", dest="parallel", action="store_false",
+        help="Sprechertrennung nach der Transkription statt parallel"
+    )
+    parser.add_argument("--output", help="Ergebnis zusätzlich als JSON speichern")
+    args = parser.parse_args(argv)
+
+    # Reproduzierbare Pfade: kein Long-Form, keine VAD, kein Batching
+    for name in ("TRANSCRIBER_LONG_FORM_MIN_SECONDS", "TRANSCRIBER_VAD", "TRANSCRIBER_BATCH_ENGINE"):
+        os.environ[name] = "0"
+    os.environ.pop("TRANSCRIBER_PROFILE_DIR", None)
+    if args.real:
+        os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+    pipeline = build_pipeline(args)
+    exporter = ExportManager()
+    export_pdf = _has_reportlab()
+    model_size = args.model if args.real else "fake"
+
+    results = {}
+    for spec in select_fixtures(args.fixtures):
+        audio_path, turns = ensure_fixture(spec, args.fixtures_dir)
+        if isinstance(pipeline.diarizer, FakeDiarizer):
+            pipeline.diarizer.reference_turns = turns
+
+        print(f"{spec['name']}: {spec['seconds']}s, {spec['speakers']} Sprecher...")
+        result = run_fixture(pipeline, exporter, audio_path, model_size, args.repeat, export_pdf)
+
+        # Für die Mikro-Benchmarks ein Ergebnis mit Wort-Zeitstempeln
+        transcription_result = pipeline.transcriber.transcribe(
+            audio_path, model_size=model_size, language="en", word_timestamps=True
+        )
+        result["merge"] = run_merge_benchmarks(
+            pipeline.diarizer,
+            transcription_result,
+            pipeline.diarizer.run_diarization(audio_path),
+            args.repeat
+        )
+        results[spec["name"]] = {"spec": spec, **result}
+
+    report = {
+        "benchmark": "pipeline",
+        "metadata": {
+            "commit": _git_commit(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "python": platform.python_version(),
+            "numpy": np.__version__
+        },
+        "config": {
+            "real_whisper": args.real,
+            "model": model_size,
+            "real_diarization": args.real_diarization,
+            "whisper_rtf": None if args.real else args.whisper_rtf,
+            "diarization_rtf": None if args.real_diarization else args.diarization_rtf,
+            "parallel": args.parallel,
+            "repeat": args.repeat,
+            "export_pdf": export_pdf
+        },
+        "fixtures": results
+    }
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Geschwindigkeit und Wortfehlerrate je Genauigkeit (fp32/int8/bf16)
+
+Transkribiert einen festen lokalen Korpus mit jeder Genauigkeit auf der CPU
+und vergleicht Ladezeit, Speicherbedarf, Real-Time-Factor und Wortfehlerrate
+(WER) gegen fp32. Der Korpus ist ein Verzeichnis mit Audiodateien und
+gleichnamigen Referenztranskripten (aufnahme.wav + aufnahme.txt).
+
+    python benchmarks/precision_benchmark.py korpus/ --model small --language de
+    python benchmarks/precision_benchmark.py korpus/ --precisions fp32 int8 --output precision.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio import get_duration, load_audio
+from model_pool import ModelPool
+from precision import PRECISIONS, resolve_precision
+from transcriber import WhisperTranscriber
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a", ".flac", ".ogg", ".webm")
+
+
+def normalize_words(text: str) -> List[str]:
+    """
+    Zerlegt Text für die WER in Wörter (Kleinschreibung, ohne Satzzeichen)
+
+    Args:
+        text: Transkript
+
+    Returns:
+        Liste der Wörter
+    """
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_errors(reference: List[str], hypothesis: List[str]) -> int:
+    """
+    Levenshtein-Distanz auf Wortebene
+
+    Args:
+        reference: Wörter der Referenz
+        hypothesis: Erkannte Wörter
+
+    Returns:
+        Anzahl Ersetzungen, Einfügungen und Auslassungen
+    """
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            ))
+        previous = current
+    return previous[-1]
+
+
+def load_corpus(corpus_dir: str) -> List[Tuple[str, np.ndarray, List[str]]]:
+    """
+    Lädt alle Aufnahmen mit Referenztranskript
+
+    Args:
+        corpus_dir: Verzeichnis mit Audio- und .txt-Dateien
+
+    Returns:
+        Liste (Name, Waveform, Referenzwörter), sortiert nach Name
+    """
+    corpus = []
+    for name in sorted(os.listdir(corpus_dir)):
+        stem, extension = os.path.splitext(name)
+        reference_path = os.path.join(corpus_dir, f"{stem}.txt")
+        if extension.lower() not in AUDIO_EXTENSIONS or not os.path.exists(reference_path):
+            continue
+        with open(reference_path, encoding="utf-8") as f:
+            reference = normalize_words(f.read())
+        corpus.append((name, load_audio(os.path.join(corpus_dir, name)), reference))
+    return corpus
+
+
+def measure(
+    corpus: List[Tuple[str, np.ndarray, List[str]]],
+    model_size: str,
+    precision: str,
+    language: Optional[str],
+    cache_dir: str
+) -> Dict[str, Any]:
+    """
+    Transkribiert den Korpus mit einer Genauigkeit
+
+    Args:
+        corpus: Ergebnis von load_corpus
+        model_size: Größe des Whisper-Modells
+        precision: 'fp32', 'int8' oder 'bf16'
+        language: Sprache (None für auto-detect)
+        cache_dir: Cache-Verzeichnis für quantisierte Modelle
+
+    Returns:
+        Dictionary mit Lade- und Transkriptionszeiten, Speicher und WER
+    """
+    os.environ["TRANSCRIBER_MODEL_CACHE_DIR"] = cache_dir
+    pool = ModelPool(device="cpu", memory_budget=0, idle_ttl=0, precision=precision)
+    transcriber = WhisperTranscriber(pool)
+
+    # Erster Ladevorgang (int8: inkl. Quantisierung), dann aus dem Cache
+    transcriber.load_model(model_size)
+    load_seconds = pool.stats()[0]["load_seconds"]
+    memory_bytes = pool.stats()[0]["memory_bytes"]
+    pool.clear()
+    transcriber.load_model(model_size)
+    reload_seconds = pool.stats()[0]["load_seconds"]
+
+    files = []
+    audio_seconds = 0.0
+    transcribe_seconds = 0.0
+    errors = 0
+    reference_words = 0
+    for name, audio, reference in corpus:
+        started = time.perf_counter()
+        result = transcriber.transcribe(
+            audio,
+            model_size=model_size,
+            language=language,
+            long_form=False,
+            vad=False,
+            temperature=0.0
+        )
+        seconds = time.perf_counter() - started
+        if result is None:
+            raise RuntimeError(f"Transkription fehlgeschlagen: {name}")
+
+        file_errors = word_errors(reference, normalize_words(result.get("text", "")))
+        duration = get_duration(audio)
+        audio_seconds += duration
+        transcribe_seconds += seconds
+        errors += file_errors
+        reference_words += len(reference)
+        files.append({
+            "name": name,
+            "audio_seconds": duration,
+            "seconds": seconds,
+            "wer": file_errors / len(reference) if reference else None
+        })
+
+    pool.clear()
+    return {
+        "load_seconds": load_seconds,
+        "reload_seconds": reload_seconds,
+        "memory_bytes": memory_bytes,
+        "audio_seconds": audio_seconds,
+        "seconds": transcribe_seconds,
+        "real_time_factor": transcribe_seconds / audio_seconds if audio_seconds else None,
+        "wer": errors / reference_words if reference_words else None,
+        "files": files
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Genauigkeiten auf der CPU vergleichen")
+    parser.add_argument("corpus", help="Verzeichnis mit Aufnahmen und Referenz-.txt")
+    parser.add_argument("--model", default="small", help="Whisper Modellgröße (Standard: small)")
+    parser.add_argument(
+        "--precisions", nargs="*", default=list(PRECISIONS), choices=PRECISIONS,
+        help="Zu messende Genauigkeiten (Standard: fp32 int8 bf16)"
+    )
+    parser.add_argument("--language", help="Sprache (Standard: auto-detect)")
+    parser.add_argument(
+        "--cache-dir",
+        help="Cache für quantisierte Modelle (Standard: temporäres Verzeichnis)"
+    )
+    parser.add_argument("--output", help="Ergebnis zusätzlich als JSON speichern")
+    args = parser.parse_args(argv)
+
+    # Nur die CPU-Pfade vergleichen, ohne Batching
+    os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+    os.environ["TRANSCRIBER_BATCH_ENGINE"] = "0"
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        print(f"Keine Aufnahmen mit Referenztranskript in {args.corpus}")
+        return 1
+    print(f"{len(corpus)} Aufnahmen, Modell '{args.model}'")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache_dir = args.cache_dir or temp_dir
+        for precision in args.precisions:
+            if resolve_precision(precision, "cpu") != precision:
+                results[precision] = {"skipped": True}
+                continue
+            print(f"Genauigkeit {precision}...")
+            results[precision] = measure(corpus, args.model, precision, args.language, cache_dir)
+
+    baseline = results.get("fp32")
+    if baseline and not baseline.get("skipped"):
+        for precision, result in results.items():
+            if precision == "fp32" or result.get("skipped"):
+                continue
+            result["speedup"] = baseline["seconds"] / result["seconds"]
+            result["memory_ratio"] = result["memory_bytes"] / baseline["memory_bytes"]
+            if result["wer"] is not None and baseline["wer"] is not None:
+                result["wer_delta"] = result["wer"] - baseline["wer"]
+
+    import torch
+
+    report = {
+        "benchmark": "precision",
+        "metadata": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "torch": torch.__version__,
+            "torch_threads": torch.get_num_threads(),
+            "quantized_engine": torch.backends.quantized.engine
+        },
+        "config": {
+            "corpus": os.path.abspath(args.corpus),
+            "files": len(corpus),
+            "model": args.model,
+            "language": args.language
+        },
+        "precisions": results
+    }
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,404 @@
+"""
+Inhaltsadressierter Ergebnis-Cache für Transkriptionen und Diarizations
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+# Endungen der Cache-Einträge
+TRANSCRIPTION_SUFFIX = ".json.gz"
+DIARIZATION_SUFFIX = ".npz"
+DIARIZATION_STATE_SUFFIX = ".state.npz"
+
+
+class ResultCache:
+    """
+    Speichert Whisper-Ergebnisse und Sprecher-Turns auf der Festplatte
+
+    Schlüssel sind der SHA-256 des Audioinhalts plus alle Parameter, die das
+    Ergebnis beeinflussen. Die Gesamtgröße ist begrenzt; bei Überschreitung
+    werden die am längsten nicht genutzten Einträge gelöscht (LRU über die
+    Änderungszeit der Dateien).
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_bytes: Optional[int] = None
+    ):
+        """
+        Args:
+            cache_dir: Cache-Verzeichnis (Standard: TRANSCRIBER_CACHE_DIR
+                oder ~/.cache/transcriber/results)
+            max_bytes: Maximale Gesamtgröße (Standard:
+                TRANSCRIBER_CACHE_MAX_MB, sonst 1024 MB)
+        """
+        if cache_dir is None:
+            cache_dir = os.getenv(
+                "TRANSCRIBER_CACHE_DIR",
+                os.path.join(Path.home(), ".cache", "transcriber", "results")
+            )
+        if max_bytes is None:
+            max_bytes = int(os.getenv("TRANSCRIBER_CACHE_MAX_MB", "1024")) * 1024 * 1024
+
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def hash_file(path: str, chunk_size: int = 1 << 20) -> str:
+        """
+        Berechnet den Inhalts-Hash einer Datei
+
+        Args:
+            path: Pfad zur Datei
+            chunk_size: Lesegröße in Bytes
+
+        Returns:
+            SHA-256 als Hex-String
+        """
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _make_key(kind: str, audio_hash: str, params: Dict[str, Any]) -> str:
+        """Bildet einen Schlüssel aus Audio-Hash und Parametern"""
+        payload = json.dumps(
+            {"kind": kind, "audio": audio_hash, "params": params},
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def transcription_key(
+        self,
+        audio_hash: str,
+        model_size: str,
+        language: Optional[str],
+        task: str = "transcribe",
+        decode: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> str:
+        """
+        Schlüssel für ein Whisper-Ergebnis
+
+        Args:
+            audio_hash: Inhalts-Hash der Audiodatei
+            model_size: Größe des Whisper-Modells
+            language: Sprache (None und 'auto' sind gleichwertig)
+            task: 'transcribe' oder 'translate'
+            decode: Dekodierweg und ergebnisrelevante Einstellungen wie
+                Genauigkeit und VAD (siehe WhisperTranscriber.decode_settings)
+            **kwargs: Zusätzliche Parameter für whisper.transcribe()
+
+        Returns:
+            Cache-Schlüssel
+        """
+        if language == "auto":
+            language = None
+        return self._make_key("transcription", audio_hash, {
+            "model_size": model_size,
+            "language": language,
+            "task": task,
+            "decode": decode or {},
+            "kwargs": kwargs
+        })
+
+    def diarization_key(
+        self,
+        audio_hash: str,
+        num_speakers: Optional[int] = None,
+        min_speakers: Optional[int] = None,
+        max_speakers: Optional[int] = None,
+        speaker_store: Optional[str] = None
+    ) -> str:
+        """
+        Schlüssel für ein Diarization-Ergebnis
+
+        Args:
+            audio_hash: Inhalts-Hash der Audiodatei
+            num_speakers: Erwartete Anzahl Sprecher
+            min_speakers: Mindestanzahl Sprecher
+            max_speakers: Höchstanzahl Sprecher
+            speaker_store: Stand des Sprecher-Speichers (Namen in den Turns)
+
+        Returns:
+            Cache-Schlüssel
+        """
+        params = {"num_speakers": int(num_speakers) if num_speakers else None}
+        # Nur wenn gesetzt, damit bestehende Einträge gültig bleiben
+        if min_speakers or max_speakers:
+            params["min_speakers"] = int(min_speakers) if min_speakers else None
+            params["max_speakers"] = int(max_speakers) if max_speakers else None
+        if speaker_store:
+            params["speaker_store"] = speaker_store
+        return self._make_key("diarization", audio_hash, params)
+
+    def diarization_state_key(self, audio_hash: str) -> str:
+        """
+        Schlüssel für die Zwischenergebnisse der Diarization
+
+        Segmentierung und Sprecher-Embeddings hängen nicht von der
+        Sprecheranzahl ab und werden daher nur pro Audiodatei gespeichert.
+
+        Args:
+            audio_hash: Inhalts-Hash der Audiodatei
+
+        Returns:
+            Cache-Schlüssel
+        """
+        return self._make_key("diarization_state", audio_hash, {})
+
+    def get_transcription(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Liest ein Whisper-Ergebnis aus dem Cache
+
+        Args:
+            key: Cache-Schlüssel
+
+        Returns:
+            Whisper-Ergebnis oder None
+        """
+        path = self._path(key, TRANSCRIPTION_SUFFIX)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                result = json.load(f)
+        except FileNotFoundError:
+            self._record(hit=False)
+            return None
+        except Exception as e:
+            # Beschädigter Eintrag (z.B. abgeschnitten): löschen, damit
+            # spätere Läufe neu berechnen statt erneut zu scheitern
+            self._discard(path, e)
+            self._record(hit=False)
+            return None
+
+        self._touch(path)
+        self._record(hit=True)
+        return result
+
+    def put_transcription(self, key: str, result: Dict[str, Any]):
+        """
+        Speichert ein Whisper-Ergebnis
+
+        Args:
+            key: Cache-Schlüssel
+            result: Whisper-Ergebnis
+        """
+        def write(f):
+            with gzip.GzipFile(fileobj=f, mode="wb") as gz:
+                gz.write(json.dumps(result, default=float).encode("utf-8"))
+
+        self._write(self._path(key, TRANSCRIPTION_SUFFIX), write)
+
+    def get_diarization(self, key: str) -> Optional[List[Dict]]:
+        """
+        Liest Sprecher-Turns aus dem Cache
+
+        Args:
+            key: Cache-Schlüssel
+
+        Returns:
+            Liste von Turns mit 'start', 'end', 'speaker' oder None
+        """
+        path = self._path(key, DIARIZATION_SUFFIX)
+        try:
+            with np.load(path) as data:
+                labels = [str(label) for label in data["labels"]]
+                turns = [
+                    {"start": float(start), "end": float(end), "speaker": labels[i]}
+                    for start, end, i in zip(
+                        data["starts"], data["ends"], data["speaker_ids"]
+                    )
+                ]
+        except FileNotFoundError:
+            self._record(hit=False)
+            return None
+        except Exception as e:
+            # Beschädigter Eintrag (z.B. abgeschnitten): löschen, damit
+            # spätere Läufe neu berechnen statt erneut zu scheitern
+            self._discard(path, e)
+            self._record(hit=False)
+            return None
+
+        self._touch(path)
+        self._record(hit=True)
+        return turns
+
+    def put_diarization(self, key: str, turns: List[Dict]):
+        """
+        Speichert Sprecher-Turns kompakt als Arrays
+
+        Args:
+            key: Cache-Schlüssel
+            turns: Liste von Turns mit 'start', 'end', 'speaker'
+        """
+        labels = sorted({turn["speaker"] for turn in turns})
+        label_ids = {label: i for i, label in enumerate(labels)}
+
+        def write(f):
+            np.savez_compressed(
+                f,
+                starts=np.array([t["start"] for t in turns], dtype=np.float64),
+                ends=np.array([t["end"] for t in turns], dtype=np.float64),
+                speaker_ids=np.array(
+                    [label_ids[t["speaker"]] for t in turns], dtype=np.int32
+                ),
+                labels=np.array(labels, dtype=np.str_)
+            )
+
+        self._write(self._path(key, DIARIZATION_SUFFIX), write)
+
+    def get_diarization_state(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Liest die Zwischenergebnisse einer Diarization
+
+        Args:
+            key: Cache-Schlüssel
+
+        Returns:
+            Dictionary von Arrays (siehe DiarizationState.to_arrays) oder None
+        """
+        path = self._path(key, DIARIZATION_STATE_SUFFIX)
+        try:
+            with np.load(path) as data:
+                arrays = {name: data[name] for name in data.files}
+        except FileNotFoundError:
+            self._record(hit=False)
+            return None
+        except Exception as e:
+            # Beschädigter Eintrag (z.B. abgeschnitten): löschen, damit
+            # spätere Läufe neu berechnen statt erneut zu scheitern
+            self._discard(path, e)
+            self._record(hit=False)
+            return None
+
+        self._touch(path)
+        self._record(hit=True)
+        return arrays
+
+    def put_diarization_state(self, key: str, arrays: Dict[str, np.ndarray]):
+        """
+        Speichert die Zwischenergebnisse einer Diarization
+
+        Args:
+            key: Cache-Schlüssel
+            arrays: Dictionary von Arrays (siehe DiarizationState.to_arrays)
+        """
+        def write(f):
+            np.savez_compressed(f, **arrays)
+
+        self._write(self._path(key, DIARIZATION_STATE_SUFFIX), write)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Liefert Cache-Statistiken
+
+        Returns:
+            Dictionary mit Treffern, Fehlzugriffen, Trefferquote, Anzahl
+            Einträge und belegtem Speicher
+        """
+        entries = self._entries()
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(entries),
+            "size_bytes": sum(size for _, size, _ in entries)
+        }
+
+    def clear(self):
+        """Löscht alle Einträge"""
+        for path, _, _ in self._entries():
+            path.unlink(missing_ok=True)
+
+    def _path(self, key: str, suffix: str) -> Path:
+        return self.cache_dir / f"{key}{suffix}"
+
+    def _record(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _discard(self, path: Path, error: Exception):
+        """Entfernt einen unlesbaren Eintrag"""
+        print(f"Cache-Eintrag {path.name} unlesbar, wird gelöscht: {str(error)}")
+        try:
+            path.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+    def _touch(self, path: Path):
+        """Markiert einen Eintrag als zuletzt benutzt"""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _write(self, path: Path, write_fn):
+        """Schreibt atomar über eine temporäre Datei und räumt danach auf"""
+        # Eindeutig pro Thread: Job-Worker laufen als Threads eines Prozesses
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                write_fn(f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Cache konnte nicht geschrieben werden: {str(e)}")
+            tmp_path.unlink(missing_ok=True)
+            return
+
+        self._evict()
+
+    def _entries(self) -> list:
+        """Liefert (Pfad, Größe, Zugriffszeit) aller Einträge"""
+        entries = []
+        for path in self.cache_dir.iterdir():
+            if path.name.startswith("."):
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict(self):
+        """Entfernt die ältesten Einträge bis die Größengrenze eingehalten ist"""
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda entry: entry[2])
+            total = sum(size for _, size, _ in entries)
+
+            for path, size, _ in entries:
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+
+
+def default_cache() -> Optional[ResultCache]:
+    """
+    Erstellt den Ergebnis-Cache gemäß Konfiguration
+
+    Returns:
+        ResultCache oder None wenn TRANSCRIBER_CACHE=0 gesetzt ist
+    """
+    if os.getenv("TRANSCRIBER_CACHE", "1") == "0":
+        return None
+    return ResultCache()
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Kommandozeilen-Batchverarbeitung ganzer Ordner ohne Gradio UI
+
+Beispiele:
+    python cli.py aufnahmen/ --output-dir ergebnisse/ --workers 4 --threads 2
+    python cli.py --manifest nacht.txt --diarize --formats txt,json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+try:
+    from .resources import format_bytes
+except ImportError:
+    from resources import format_bytes
+
+# Dateiendungen, die bei Ordnereingaben berücksichtigt werden
+AUDIO_EXTENSIONS = {".mp3", ".wav", ".m4a", ".flac", ".ogg", ".opus", ".webm", ".mp4"}
+
+# 'json' ist das vollständige Ergebnis, die übrigen schreibt der ExportManager
+EXPORT_FORMATS = ("json", "txt", "pdf", "srt", "vtt", "jsonl", "npz")
+
+# Pipeline und Export des Worker-Prozesses (pro Prozess einmal angelegt)
+_worker_pipeline = None
+_worker_exporter = None
+
+
+def _init_worker(num_threads: Optional[int]):
+    """Legt Pipeline und Exporter im Worker-Prozess an"""
+    global _worker_pipeline, _worker_exporter
+
+    import torch
+
+    try:
+        from .cache import default_cache
+        from .diarization import SpeakerDiarizer
+        from .export import ExportManager
+        from .pipeline import TranscriptionPipeline
+        from .transcriber import WhisperTranscriber
+    except ImportError:
+        from cache import default_cache
+        from diarization import SpeakerDiarizer
+        from export import ExportManager
+        from pipeline import TranscriptionPipeline
+        from transcriber import WhisperTranscriber
+
+    load_dotenv()
+    if num_threads:
+        torch.set_num_threads(num_threads)
+
+    _worker_pipeline = TranscriptionPipeline(
+        WhisperTranscriber(),
+        SpeakerDiarizer(),
+        cache=default_cache()
+    )
+    _worker_exporter = ExportManager()
+
+
+def _process_file(
+    audio_path: str,
+    output_base: str,
+    params: Dict[str, Any],
+    formats: List[str]
+) -> Dict[str, Any]:
+    """
+    Transkribiert eine Datei im Worker-Prozess und schreibt die Exporte
+
+    Returns:
+        Dictionary mit 'file', 'ok', 'audio_seconds', 'seconds', 'error' und
+        'peak_rss' (maximaler RSS des Worker-Prozesses in Bytes)
+    """
+    try:
+        from .audio import probe_duration
+        from .metrics import profile_job
+    except ImportError:
+        from audio import probe_duration
+        from metrics import profile_job
+
+    started = time.perf_counter()
+    stats = {"file": audio_path, "ok": False, "audio_seconds": 0.0, "error": None}
+
+    # Das Profil umfasst Transkription und Exporte
+    with profile_job(Path(audio_path).name) as profile:
+        try:
+            final_result, transcription_result = _worker_pipeline.run(audio_path, **params)
+            if not transcription_result:
+                raise RuntimeError("Fehler bei der Transkription.")
+
+            duration = probe_duration(audio_path)
+            if duration is None:
+                segments = transcription_result.get("segments") or [{"end": 0.0}]
+                duration = segments[-1]["end"]
+
+            Path(output_base).parent.mkdir(parents=True, exist_ok=True)
+            title = Path(audio_path).name
+            # Alle Exportformate in einem Durchlauf über die Segmente
+            export_formats = [fmt for fmt in formats if fmt != "json"]
+            if export_formats:
+                _worker_exporter.export_formats(
+                    final_result,
+                    output_base,
+                    export_formats,
+                    title,
+                    transcription_result=transcription_result
+                )
+
+            # Die JSON-Datei wird zuletzt geschrieben und markiert die Datei als
+            # erledigt
+            _write_json(f"{output_base}.json", {
+                "source": audio_path,
+                "params": params,
+                "duration": duration,
+                "final": final_result,
+                "transcription": transcription_result
+            })
+
+            stats.update(ok=True, audio_seconds=duration)
+        except Exception as e:
+            print(f"Fehler bei {audio_path}: {str(e)}")
+            stats["error"] = str(e)
+
+    stats["seconds"] = time.perf_counter() - started
+    stats["peak_rss"] = profile.peak_rss
+    return stats
+
+
+def _write_json(path: str, data: Dict[str, Any]):
+    """Schreibt JSON atomar (erst temporäre Datei, dann umbenennen)"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, default=float)
+    os.replace(tmp_path, path)
+
+
+def read_manifest(manifest_path: str) -> List[Path]:
+    """
+    Liest eine Manifest-Datei (ein Pfad pro Zeile, '#' für Kommentare)
+
+    Args:
+        manifest_path: Pfad zur Manifest-Datei
+
+    Returns:
+        Liste von Audiodateien (relative Pfade bezogen auf das Manifest)
+    """
+    base_dir = Path(manifest_path).parent
+    files = []
+    with open(manifest_path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                files.append(base_dir / line)
+    return files
+
+
+def collect_inputs(
+    inputs: List[str],
+    manifests: List[str]
+) -> List[Tuple[Path, Path]]:
+    """
+    Sammelt alle zu verarbeitenden Dateien
+
+    Args:
+        inputs: Ordner (rekursiv durchsucht) oder einzelne Audiodateien
+        manifests: Manifest-Dateien
+
+    Returns:
+        Liste von (Audiodatei, Basisordner für den relativen Ausgabepfad)
+    """
+    files = []
+    for entry in inputs:
+        path = Path(entry)
+        if path.is_dir():
+            files.extend(
+                (file, path) for file in sorted(path.rglob("*"))
+                if file.is_file() and file.suffix.lower() in AUDIO_EXTENSIONS
+            )
+        else:
+            files.append((path, path.parent))
+
+    for manifest in manifests:
+        base_dir = Path(manifest).parent
+        files.extend((file, base_dir) for file in read_manifest(manifest))
+
+    # Doppelte Einträge entfernen, Reihenfolge beibehalten
+    seen = set()
+    unique = []
+    for file, base_dir in files:
+        key = file.resolve()
+        if key not in seen:
+            seen.add(key)
+            unique.append((file, base_dir))
+    return unique
+
+
+def output_base_for(
+    audio_path: Path,
+    base_dir: Path,
+    output_dir: Optional[str]
+) -> Path:
+    """
+    Bestimmt den Ausgabepfad (ohne Endung) für eine Audiodatei
+
+    Ohne Ausgabeordner landen die Ergebnisse neben der Eingabe, sonst wird
+    die Ordnerstruktur relativ zum Eingabeordner gespiegelt.
+    """
+    if output_dir is None:
+        return audio_path.with_suffix("")
+
+    try:
+        relative = audio_path.resolve().relative_to(base_dir.resolve())
+    except ValueError:
+        relative = Path(audio_path.name)
+    return Path(output_dir) / relative.with_suffix("")
+
+
+def print_summary(results: List[Dict[str, Any]], skipped: int, wall_seconds: float):
+    """Gibt Durchsatz und Fehler der Batchverarbeitung aus"""
+    done = [r for r in results if r["ok"]]
+    failed = [r for r in results if not r["ok"]]
+    audio_seconds = sum(r["audio_seconds"] for r in done)
+
+    print("")
+    print("=" * 60)
+    print("Zusammenfassung")
+    print("=" * 60)
+    print(f"Verarbeitet:      {len(done)}")
+    print(f"Übersprungen:     {skipped}")
+    print(f"Fehlgeschlagen:   {len(failed)}")
+    print(f"Audiodauer:       {audio_seconds / 3600:.2f} h")
+    print(f"Laufzeit:         {wall_seconds / 3600:.2f} h")
+    if audio_seconds > 0:
+        # Real-Time-Factor: Rechenzeit pro Sekunde Audio (< 1 = schneller
+        # als Echtzeit)
+        print(f"Real-Time-Factor: {wall_seconds / audio_seconds:.3f}")
+    if wall_seconds > 0:
+        print(f"Dateien/Stunde:   {len(done) / wall_seconds * 3600:.1f}")
+    peaks = [r["peak_rss"] for r in results if r.get("peak_rss")]
+    if peaks:
+        print(f"Spitzen-RSS:      {format_bytes(max(peaks))} (pro Worker)")
+
+    if failed:
+        print("")
+        print("Fehler:")
+        for r in failed:
+            print(f"  {r['file']}: {r['error']}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Transkribiert Audiodateien im Batch (ohne UI)"
+    )
+    parser.add_argument(
+        "inputs", nargs="*",
+        help="Ordner (rekursiv) oder einzelne Audiodateien"
+    )
+    parser.add_argument(
+        "--manifest", action="append", default=[],
+        help="Datei mit einem Audiopfad pro Zeile (mehrfach möglich)"
+    )
+    parser.add_argument(
+        "--output-dir",
+        help="Ausgabeordner (Standard: neben den Eingabedateien)"
+    )
+    parser.add_argument("--model", default="base", help="Whisper Modellgröße")
+    parser.add_argument("--language", default="auto", help="Sprache oder 'auto'")
+    parser.add_argument(
+        "--diarize", action="store_true", help="Sprechertrennung aktivieren"
+    )
+    parser.add_argument("--num-speakers", type=int, help="Erwartete Anzahl Sprecher")
+    parser.add_argument("--min-speakers", type=int, help="Mindestanzahl Sprecher")
+    parser.add_argument("--max-speakers", type=int, help="Höchstanzahl Sprecher")
+    parser.add_argument(
+        "--formats", default="json,txt",
+        help=(
+            "Exportformate, kommagetrennt (json, txt, pdf, srt, vtt, jsonl, npz; "
+            "Standard: json,txt)"
+        )
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Anzahl paralleler Worker-Prozesse (Standard: 1)"
+    )
+    parser.add_argument(
+        "--threads", type=int,
+        help="Torch-Threads pro Worker (Standard: Kerne / Worker)"
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="Bereits verarbeitete Dateien erneut verarbeiten"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Startet die Batchverarbeitung"""
+    load_dotenv()
+    args = parse_args(argv)
+
+    formats = [f.strip().lower() for f in args.formats.split(",") if f.strip()]
+    unknown = set(formats) - set(EXPORT_FORMATS)
+    if unknown:
+        print(f"Unbekannte Exportformate: {', '.join(sorted(unknown))}")
+        return 2
+
+    files = collect_inputs(args.inputs, args.manifest)
+    if not files:
+        print("Keine Audiodateien gefunden.")
+        return 2
+
+    # Erledigte Dateien (JSON-Ergebnis vorhanden) überspringen
+    pending = []
+    for audio_path, base_dir in files:
+        output_base = output_base_for(audio_path, base_dir, args.output_dir)
+        if args.force or not Path(f"{output_base}.json").exists():
+            pending.append((str(audio_path), str(output_base)))
+    skipped = len(files) - len(pending)
+
+    threads = args.threads or max(1, (os.cpu_count() or 1) // args.workers)
+    print(
+        f"{len(pending)} Dateien zu verarbeiten ({skipped} übersprungen), "
+        f"{args.workers} Worker mit je {threads} Threads"
+    )
+
+    params = {
+        "model_size": args.model,
+        "language": args.language,
+        "enable_diarization": args.diarize,
+        "num_speakers": args.num_speakers,
+        "min_speakers": args.min_speakers,
+        "max_speakers": args.max_speakers
+    }
+
+    started = time.perf_counter()
+    results = []
+    # spawn statt fork: Torch-Threadpools überstehen fork nicht sicher
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(threads,)
+    ) as executor:
+        futures = [
+            executor.submit(_process_file, audio_path, output_base, params, formats)
+            for audio_path, output_base in pending
+        ]
+        for i, future in enumerate(as_completed(futures), start=1):
+            result = future.result()
+            results.append(result)
+            status = "OK" if result["ok"] else "FEHLER"
+            print(
+                f"[{i}/{len(pending)}] {status} {result['file']} "
+                f"({result['seconds']:.1f}s, RSS {format_bytes(result['peak_rss'])})"
+            )
+
+    print_summary(results, skipped, time.perf_counter() - started)
+    return 1 if any(not r["ok"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,28 +3,340 @@ Speaker Diarization Modul mit pyannote.audio
 """
 
 import os
-from typing import Dict, Any, Optional, List
-import torch
-from pyannote.audio import Pipeline
+from typing import Dict, Any, Optional, List, Sequence
+import numpy as np
 import warnings
 
+# pyannote.audio wird erst geladen, wenn die Sprechertrennung genutzt wird
+try:
+    from .audio import (
+        SAMPLE_RATE, AudioInput, ensure_waveform, get_duration, to_pyannote_input
+    )
+    from .metrics import stage
+    from .model_pool import default_device
+    from .precision import model_cache_dir
+    from .snapshot import share_pipeline_weights, snapshots_enabled
+    from .speaker_store import default_speaker_store, normalize_rows
+except ImportError:
+    from audio import (
+        SAMPLE_RATE, AudioInput, ensure_waveform, get_duration, to_pyannote_input
+    )
+    from metrics import stage
+    from model_pool import default_device
+    from precision import model_cache_dir
+    from snapshot import share_pipeline_weights, snapshots_enabled
+    from speaker_store import default_speaker_store, normalize_rows
+
 warnings.filterwarnings("ignore")
 
 
+class SpeakerIndex:
+    """
+    Index über die Sprecher-Turns einer Diarization
+
+    Für jeden Sprecher wird die Anzahl aktiver Turns über die Zeit als
+    Stufenfunktion gespeichert (Sweep über die sortierten Start- und
+    Endzeiten) und einmal aufintegriert. Die Überlappung eines Intervalls
+    [a, b] mit einem Sprecher ist dann F(b) - F(a); beide Werte ergeben sich
+    per Bisektion. Eine Abfrage von n Intervallen kostet so O(n log m) pro
+    Sprecher, unabhängig davon, wie lang oder überlappend die Turns sind.
+    """
+
+    def __init__(self, speaker_timeline: List[Dict]):
+        """
+        Args:
+            speaker_timeline: Liste von Turns mit 'start', 'end', 'speaker'
+        """
+        self.labels = sorted({turn["speaker"] for turn in speaker_timeline})
+        self.num_turns = len(speaker_timeline)
+
+        # Pro Sprecher: sortierte Starts und Enden sowie die Stufenfunktion
+        # (Zeitpunkte, aktive Turns ab dort, Integral bis dort)
+        self._speakers = []
+        for label in self.labels:
+            turns = [turn for turn in speaker_timeline if turn["speaker"] == label]
+            starts = np.sort(np.array([t["start"] for t in turns], dtype=np.float64))
+            ends = np.sort(np.array(
+                [max(t["end"], t["start"]) for t in turns], dtype=np.float64
+            ))
+
+            times = np.concatenate([starts, ends])
+            deltas = np.concatenate([np.ones(len(starts)), -np.ones(len(ends))])
+            order = np.argsort(times, kind="stable")
+            times, deltas = times[order], deltas[order]
+            active = np.cumsum(deltas)
+            integral = np.concatenate([
+                [0.0], np.cumsum(active[:-1] * np.diff(times))
+            ])
+            self._speakers.append((starts, ends, times, active, integral))
+
+    def __len__(self) -> int:
+        return self.num_turns
+
+    @staticmethod
+    def _integral(times, active, integral, points: np.ndarray) -> np.ndarray:
+        """Aktive Turn-Dauer von 0 bis zu jedem Zeitpunkt"""
+        idx = np.searchsorted(times, points, side="right") - 1
+        safe = np.maximum(idx, 0)
+        values = integral[safe] + active[safe] * (points - times[safe])
+        return np.where(idx >= 0, values, 0.0)
+
+    def lookup(
+        self,
+        starts: Sequence[float],
+        ends: Sequence[float]
+    ) -> List[Optional[str]]:
+        """
+        Ermittelt für mehrere Intervalle den Sprecher mit maximaler Überlappung
+
+        Args:
+            starts: Startzeiten der Intervalle in Sekunden
+            ends: Endzeiten der Intervalle in Sekunden
+
+        Returns:
+            Liste von Speaker-Labels (None wenn kein Turn überlappt)
+        """
+        starts = np.asarray(starts, dtype=np.float64)
+        ends = np.maximum(np.asarray(ends, dtype=np.float64), starts)
+
+        if len(self) == 0 or len(starts) == 0:
+            return [None] * len(starts)
+
+        points = ends == starts
+        totals = np.empty((len(self.labels), len(starts)))
+        for i, (turn_starts, turn_ends, times, active, integral) in enumerate(self._speakers):
+            overlap = (
+                self._integral(times, active, integral, ends)
+                - self._integral(times, active, integral, starts)
+            )
+            # Zeitpunkt statt Intervall: jeder umschließende Turn zählt
+            covering = (
+                np.searchsorted(turn_starts, starts, side="right")
+                - np.searchsorted(turn_ends, starts, side="left")
+            )
+            totals[i] = np.where(points, covering, np.clip(overlap, 0.0, None))
+
+        # Rundungsrauschen der Integrale soll Gleichstände nicht entscheiden
+        totals = np.round(totals, 6)
+        best = np.argmax(totals, axis=0)
+        best_totals = totals[best, np.arange(len(starts))]
+        return [
+            self.labels[speaker] if total > 0 else None
+            for speaker, total in zip(best, best_totals)
+        ]
+
+
+class DiarizationState:
+    """
+    Zwischenergebnisse der pyannote Pipeline, die nicht von der
+    Sprecheranzahl abhängen
+
+    Enthält die lokale Segmentierung pro Fenster, die geschätzte Anzahl
+    gleichzeitiger Sprecher pro Frame und die Sprecher-Embeddings. Damit
+    lässt sich die Diarization für eine andere Sprecheranzahl allein durch
+    erneutes Clustering berechnen.
+    """
+
+    def __init__(self, segmentations, count, embeddings: np.ndarray):
+        """
+        Args:
+            segmentations: SlidingWindowFeature (Fenster, Frames, lokale Sprecher)
+            count: SlidingWindowFeature (Frames, 1) mit Sprecheranzahl
+            embeddings: Array (Fenster, lokale Sprecher, Dimension)
+        """
+        self.segmentations = segmentations
+        self.count = count
+        self.embeddings = embeddings
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Wandelt den Zustand in Arrays für den Cache um"""
+        def window(feature):
+            sw = feature.sliding_window
+            return np.array([sw.start, sw.duration, sw.step], dtype=np.float64)
+
+        return {
+            "segmentations": self.segmentations.data,
+            "segmentations_window": window(self.segmentations),
+            "count": self.count.data,
+            "count_window": window(self.count),
+            "embeddings": self.embeddings
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "DiarizationState":
+        """Erstellt den Zustand aus Arrays des Caches"""
+        from pyannote.core import SlidingWindow, SlidingWindowFeature
+
+        def feature(name):
+            start, duration, step = arrays[f"{name}_window"]
+            return SlidingWindowFeature(
+                arrays[name],
+                SlidingWindow(start=float(start), duration=float(duration), step=float(step))
+            )
+
+        return cls(feature("segmentations"), feature("count"), arrays["embeddings"])
+
+
+class SpeakerLinker:
+    """
+    Verknüpft die lokalen Sprecher einzelner Fenster zu globalen Sprechern
+
+    Jeder globale Sprecher wird durch den nach Sprechdauer gewichteten
+    Mittelwert der normierten Embeddings seiner lokalen Sprecher vertreten.
+    Lokale Sprecher werden per Kosinus-Ähnlichkeit zugeordnet; innerhalb
+    eines Fensters erhält jeder globale Sprecher höchstens einen lokalen.
+    """
+
+    def __init__(self, threshold: float):
+        """
+        Args:
+            threshold: Mindest-Kosinus-Ähnlichkeit für eine Zuordnung,
+                darunter entsteht ein neuer globaler Sprecher
+        """
+        self.threshold = threshold
+        # Gewichtete Summen der normierten Embeddings und Sprechdauern
+        self.sums: List[np.ndarray] = []
+        self.weights: List[float] = []
+
+    def __len__(self) -> int:
+        return len(self.sums)
+
+    def link(self, embeddings: np.ndarray, durations: Sequence[float]) -> List[int]:
+        """
+        Ordnet die lokalen Sprecher eines Fensters zu
+
+        Args:
+            embeddings: Array (lokale Sprecher, Dimension) mit Zentroiden
+            durations: Sprechdauer jedes lokalen Sprechers in Sekunden
+
+        Returns:
+            Index des globalen Sprechers für jeden lokalen Sprecher
+        """
+        local = normalize_rows(np.asarray(embeddings, dtype=np.float64))
+        assigned = [-1] * len(local)
+
+        if self.sums and len(local):
+            similarity = local @ self._centroids().T
+            taken = set()
+            # Gierig nach absteigender Ähnlichkeit (wenige Sprecher pro
+            # Fenster, daher ausreichend)
+            for flat in np.argsort(-similarity, axis=None):
+                i, j = np.unravel_index(flat, similarity.shape)
+                if similarity[i, j] < self.threshold:
+                    break
+                if assigned[i] < 0 and j not in taken:
+                    assigned[i] = int(j)
+                    taken.add(j)
+
+        for i, (embedding, duration) in enumerate(zip(local, durations)):
+            if not np.all(np.isfinite(embedding)):
+                # Ohne verwertbares Embedding nicht zuordenbar
+                embedding = np.zeros_like(embedding)
+            weight = max(float(duration), 1e-3)
+            if assigned[i] < 0:
+                assigned[i] = len(self.sums)
+                self.sums.append(weight * embedding)
+                self.weights.append(weight)
+            else:
+                self.sums[assigned[i]] = self.sums[assigned[i]] + weight * embedding
+                self.weights[assigned[i]] += weight
+
+        return assigned
+
+    def merge_to(self, max_clusters: int) -> List[int]:
+        """
+        Fasst die ähnlichsten globalen Sprecher zusammen, bis höchstens
+        max_clusters übrig sind
+
+        Args:
+            max_clusters: Höchstanzahl Sprecher
+
+        Returns:
+            Index des zusammengefassten Sprechers für jeden globalen Sprecher
+        """
+        groups = [[i] for i in range(len(self.sums))]
+        sums = list(self.sums)
+
+        while len(groups) > max(max_clusters, 1):
+            centroids = normalize_rows(np.stack(sums))
+            similarity = centroids @ centroids.T
+            np.fill_diagonal(similarity, -np.inf)
+            i, j = np.unravel_index(int(np.argmax(similarity)), similarity.shape)
+            i, j = min(i, j), max(i, j)
+            groups[i].extend(groups.pop(j))
+            sums[i] = sums[i] + sums.pop(j)
+
+        mapping = [0] * len(self.sums)
+        for cluster, members in enumerate(groups):
+            for member in members:
+                mapping[member] = cluster
+        return mapping
+
+    def merged_centroids(self, mapping: Sequence[int]) -> np.ndarray:
+        """
+        Zentroide der zusammengefassten Sprecher
+
+        Args:
+            mapping: Ergebnis von merge_to() (oder Identität)
+
+        Returns:
+            Array (zusammengefasste Sprecher, Dimension), normiert
+        """
+        num_clusters = max(mapping) + 1 if len(mapping) else 0
+        sums = [np.zeros_like(self.sums[0]) for _ in range(num_clusters)]
+        for member, cluster in enumerate(mapping):
+            sums[cluster] = sums[cluster] + self.sums[member]
+        return normalize_rows(np.stack(sums)) if sums else np.zeros((0, 0))
+
+    def _centroids(self) -> np.ndarray:
+        return normalize_rows(np.stack(self.sums))
+
+
 class SpeakerDiarizer:
     """Klasse für Sprechertrennung (Speaker Diarization)"""
 
     def __init__(self):
         self.pipeline = None
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.device = None
         self.hf_token = os.getenv("HUGGINGFACE_TOKEN")
-
+        # Ab dieser Länge (Sekunden) wird in überlappenden Fenstern
+        # diarisiert, damit der Speicherbedarf nicht mit der Dauer wächst
+        self.window_min_seconds = float(
+            os.getenv("TRANSCRIBER_DIARIZATION_WINDOW_MIN_SECONDS", "3600")
+        )
+        self.window_seconds = float(
+            os.getenv("TRANSCRIBER_DIARIZATION_WINDOW_SECONDS", "600")
+        )
+        self.window_overlap_seconds = float(
+            os.getenv("TRANSCRIBER_DIARIZATION_WINDOW_OVERLAP_SECONDS", "30")
+        )
+        # Mindest-Kosinus-Ähnlichkeit, um Sprecher zweier Fenster gleichzusetzen
+        self.link_threshold = float(
+            os.getenv("TRANSCRIBER_DIARIZATION_LINK_THRESHOLD", "0.4")
+        )
+        # Bekannte Sprecher, deren Namen die anonymen Labels ersetzen
+        self.speaker_store = default_speaker_store()
+
+    @property
+    def speaker_store_revision(self) -> Optional[str]:
+        """Stand des Sprecher-Speichers (None wenn leer oder deaktiviert)"""
+        if self.speaker_store is None:
+            return None
+        self.speaker_store.refresh()
+        return self.speaker_store.revision
+
+    @stage("diarization_load")
     def load_pipeline(self):
         """Lädt das Pyannote Diarization Pipeline"""
         if self.pipeline is None:
             print("Lade Speaker Diarization Pipeline...")
 
             try:
+                import torch
+                from pyannote.audio import Pipeline
+
+                self.device = default_device()
+
                 # Versuche mit HuggingFace Token zu laden
                 if self.hf_token:
                     self.pipeline = Pipeline.from_pretrained(
@@ -44,6 +356,12 @@ class SpeakerDiarizer:
                 # Verschiebe auf GPU falls verfügbar
                 if self.device == "cuda":
                     self.pipeline = self.pipeline.to(torch.device("cuda"))
+                elif snapshots_enabled():
+                    # Gewichte aller Prozesse auf dieselben Seiten legen
+                    try:
+                        share_pipeline_weights(self.pipeline, model_cache_dir())
+                    except Exception as e:
+                        print(f"Snapshot der Pipeline nicht verwendbar: {str(e)}")
 
                 print("Pipeline geladen!")
 
@@ -56,9 +374,373 @@ class SpeakerDiarizer:
                 )
                 raise
 
+    @stage("diarization")
+    def run_diarization(
+        self,
+        audio: AudioInput,
+        num_speakers: Optional[int] = None,
+        min_speakers: Optional[int] = None,
+        max_speakers: Optional[int] = None,
+        return_state: bool = False
+    ):
+        """
+        Führt nur die Sprechertrennung durch (ohne Transkription)
+
+        Benötigt nichts aus der Transkription und kann daher parallel zu
+        Whisper laufen (siehe pipeline.TranscriptionPipeline).
+
+        Args:
+            audio: Pfad zur Audiodatei oder dekodierte Waveform
+                (16 kHz mono float32, siehe audio.load_audio)
+            num_speakers: Erwartete Anzahl Sprecher (optional)
+            min_speakers: Mindestanzahl Sprecher (optional)
+            max_speakers: Höchstanzahl Sprecher (optional)
+            return_state: Zusätzlich die Zwischenergebnisse für recluster()
+                zurückgeben
+
+        Returns:
+            Liste von Sprecher-Turns mit 'start', 'end', 'speaker', bei
+            return_state ein Tuple (Turns, DiarizationState oder None)
+        """
+        # Lade Pipeline falls noch nicht geladen
+        if self.pipeline is None:
+            self.load_pipeline()
+
+        print("Führe Sprechertrennung durch...")
+
+        audio = ensure_waveform(audio)
+        if self._use_windows(audio):
+            # Fensterweise Verarbeitung liefert keinen Zustand für recluster()
+            turns = self._run_windowed(audio, num_speakers, min_speakers, max_speakers)
+            return (turns, None) if return_state else turns
+
+        # Führe Diarization durch
+        diarization_params = self._speaker_params(num_speakers, min_speakers, max_speakers)
+
+        # Zwischenergebnisse über den Hook der Pipeline abgreifen (Aufrufe
+        # mit 'completed' sind reine Fortschrittsmeldungen)
+        steps = {}
+
+        def hook(step_name, step_artefact, file=None, total=None, completed=None):
+            if completed is None:
+                steps[step_name] = step_artefact
+
+        if return_state:
+            diarization_params["hook"] = hook
+
+        # pyannote erhält die Waveform direkt und dekodiert nicht erneut
+        audio_input = to_pyannote_input(audio)
+        diarization, centroids = self.pipeline(
+            audio_input, return_embeddings=True, **diarization_params
+        )
+        turns = self._name_speakers(
+            self._annotation_to_turns(diarization), diarization.labels(), centroids
+        )
+
+        if not return_state:
+            return turns
+
+        state = None
+        if all(step in steps for step in ("segmentation", "speaker_counting", "embeddings")):
+            state = DiarizationState(
+                steps["segmentation"],
+                steps["speaker_counting"],
+                steps["embeddings"]
+            )
+        return turns, state
+
+    def _use_windows(self, audio: np.ndarray) -> bool:
+        """Entscheidet, ob fensterweise diarisiert wird"""
+        if self.window_min_seconds <= 0:
+            return False
+        return get_duration(audio) >= max(self.window_min_seconds, self.window_seconds)
+
+    def _run_windowed(
+        self,
+        audio: np.ndarray,
+        num_speakers: Optional[int] = None,
+        min_speakers: Optional[int] = None,
+        max_speakers: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Diarisiert lange Aufnahmen in überlappenden Fenstern
+
+        pyannote clustert sonst die Embeddings aller Segmente der gesamten
+        Aufnahme auf einmal, wodurch der Speicherbedarf mit der Dauer
+        wächst. Hier sieht die Pipeline nur ein Fenster (Ansicht auf die
+        Waveform, keine Kopie); die Sprecher der Fenster werden über ihre
+        Zentroid-Embeddings verknüpft (siehe SpeakerLinker).
+
+        Wie bei der Long-Form-Transkription gehören Turns im
+        Überlappungsbereich zu dem Fenster, in dessen Zuständigkeitsbereich
+        sie liegen; an der Grenze werden sie abgeschnitten.
+
+        Args:
+            audio: Waveform (16 kHz mono float32)
+            num_speakers: Erwartete Anzahl Sprecher (optional)
+            min_speakers: Mindestanzahl Sprecher (optional)
+            max_speakers: Höchstanzahl Sprecher (optional)
+
+        Returns:
+            Liste von Sprecher-Turns mit 'start', 'end', 'speaker' auf der
+            globalen Zeitachse
+        """
+        window = int(self.window_seconds * SAMPLE_RATE)
+        overlap = min(int(self.window_overlap_seconds * SAMPLE_RATE), window // 2)
+        step = window - overlap
+        starts = list(range(0, max(len(audio) - overlap, 1), step))
+
+        # Ein Fenster enthält höchstens so viele Sprecher wie die Aufnahme
+        window_params = self._speaker_params(None, None, max_speakers or num_speakers)
+
+        print(
+            f"Sprechertrennung in {len(starts)} Fenstern à "
+            f"{self.window_seconds:.0f}s ({self.window_overlap_seconds:.0f}s Überlappung)..."
+        )
+
+        linker = SpeakerLinker(self.link_threshold)
+        turns = []
+        last = len(starts) - 1
+        for i, start in enumerate(starts):
+            end = min(start + window, len(audio))
+            diarization, centroids = self.pipeline(
+                to_pyannote_input(audio[start:end]),
+                return_embeddings=True,
+                **window_params
+            )
+
+            labels = diarization.labels()
+            local_turns = self._annotation_to_turns(diarization)
+            del diarization
+
+            if labels and centroids is not None:
+                durations = [
+                    sum(t["end"] - t["start"] for t in local_turns if t["speaker"] == label)
+                    for label in labels
+                ]
+                global_ids = linker.link(centroids[:len(labels)], durations)
+                mapping = dict(zip(labels, global_ids))
+            else:
+                mapping = {}
+
+            # Zuständigkeitsbereich: Mitte der Überlappung, außen offen
+            offset = start / SAMPLE_RATE
+            lower = (start + overlap / 2) / SAMPLE_RATE if i > 0 else float("-inf")
+            upper = (end - overlap / 2) / SAMPLE_RATE if i < last else float("inf")
+
+            for turn in local_turns:
+                turn_start = float(max(turn["start"] + offset, lower))
+                turn_end = float(min(turn["end"] + offset, upper))
+                if turn_end > turn_start and turn["speaker"] in mapping:
+                    turns.append({
+                        "start": turn_start,
+                        "end": turn_end,
+                        "speaker": mapping[turn["speaker"]]
+                    })
+
+            print(f"Fenster {i + 1}/{len(starts)}: {len(linker)} Sprecher bisher")
+
+        # Vorgegebene Sprecheranzahl durch Zusammenfassen einhalten
+        limit = num_speakers or max_speakers
+        if limit and len(linker) > int(limit):
+            merged = linker.merge_to(int(limit))
+        else:
+            merged = list(range(len(linker)))
+
+        # Labels in der Reihenfolge des ersten Auftretens vergeben
+        turns.sort(key=lambda turn: turn["start"])
+        labels = {}
+        for turn in turns:
+            cluster = merged[turn["speaker"]]
+            if cluster not in labels:
+                labels[cluster] = f"SPEAKER_{len(labels):02d}"
+            turn["speaker"] = labels[cluster]
+
+        if not labels:
+            return turns
+        centroids = linker.merged_centroids(merged)
+        return self._name_speakers(
+            turns, list(labels.values()), centroids[list(labels.keys())]
+        )
+
+    def _name_speakers(
+        self,
+        turns: List[Dict],
+        labels: Sequence[str],
+        centroids: Optional[np.ndarray]
+    ) -> List[Dict]:
+        """
+        Ersetzt anonyme Labels durch Namen aus dem Sprecher-Speicher
+
+        Args:
+            turns: Sprecher-Turns mit anonymen Labels
+            labels: Labels in der Reihenfolge der Zentroid-Zeilen
+            centroids: Array (Sprecher, Dimension) oder None
+
+        Returns:
+            Turns mit Namen für erkannte Sprecher
+        """
+        store = self.speaker_store
+        if store is None or len(store) == 0 or centroids is None or not labels:
+            return turns
+
+        names = store.match(centroids[:len(labels)])
+        mapping = {label: name for label, name in zip(labels, names) if name}
+        if not mapping:
+            return turns
+
+        print(f"Bekannte Sprecher erkannt: {', '.join(sorted(mapping.values()))}")
+        return [
+            {**turn, "speaker": mapping.get(turn["speaker"], turn["speaker"])}
+            for turn in turns
+        ]
+
+    def embed(self, audio: np.ndarray, window_seconds: float = 10.0) -> np.ndarray:
+        """
+        Berechnet das Sprecher-Embedding eines Ausschnitts mit einem Sprecher
+
+        Verwendet das Embedding-Modell der Diarization-Pipeline, so dass das
+        Ergebnis mit den Cluster-Zentroiden vergleichbar ist (siehe
+        speaker_store.SpeakerStore.enroll).
+
+        Args:
+            audio: Waveform (16 kHz mono float32)
+            window_seconds: Länge der einzeln eingebetteten Abschnitte
+
+        Returns:
+            Normiertes Embedding (Dimension,)
+        """
+        import torch
+
+        if self.pipeline is None:
+            self.load_pipeline()
+
+        window = int(window_seconds * SAMPLE_RATE)
+        chunks = [audio[i:i + window] for i in range(0, len(audio), window)]
+        # Zu kurze Reste liefern unzuverlässige Embeddings
+        chunks = [chunk for chunk in chunks if len(chunk) >= SAMPLE_RATE] or [audio]
+
+        embeddings = np.stack([
+            self.pipeline._embedding(
+                torch.from_numpy(np.ascontiguousarray(chunk)).reshape(1, 1, -1)
+            )[0]
+            for chunk in chunks
+        ])
+        embeddings = embeddings[np.all(np.isfinite(embeddings), axis=1)]
+        if len(embeddings) == 0:
+            raise ValueError("Kein verwertbares Embedding (Ausschnitt zu kurz?)")
+
+        return normalize_rows(normalize_rows(embeddings).mean(axis=0, keepdims=True))[0]
+
+    @stage("diarization_recluster")
+    def recluster(
+        self,
+        state: DiarizationState,
+        num_speakers: Optional[int] = None,
+        min_speakers: Optional[int] = None,
+        max_speakers: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Berechnet die Diarization für eine andere Sprecheranzahl neu
+
+        Segmentierung und Embeddings werden aus dem Zustand übernommen, nur
+        Clustering und Rekonstruktion laufen erneut (Sekundenbruchteile statt
+        Minuten). Entspricht dem Ende von SpeakerDiarization.apply() in
+        pyannote.audio 3.1.
+
+        Args:
+            state: Zwischenergebnisse aus run_diarization(return_state=True)
+            num_speakers: Erwartete Anzahl Sprecher (optional)
+            min_speakers: Mindestanzahl Sprecher (optional)
+            max_speakers: Höchstanzahl Sprecher (optional)
+
+        Returns:
+            Liste von Sprecher-Turns mit 'start', 'end', 'speaker'
+        """
+        from pyannote.audio.utils.signal import binarize
+        from pyannote.core import SlidingWindowFeature
+
+        if self.pipeline is None:
+            self.load_pipeline()
+        pipeline = self.pipeline
+
+        print("Berechne Sprecher-Clustering neu...")
+
+        num_speakers, min_speakers, max_speakers = pipeline.set_num_speakers(
+            num_speakers=int(num_speakers) if num_speakers else None,
+            min_speakers=int(min_speakers) if min_speakers else None,
+            max_speakers=int(max_speakers) if max_speakers else None
+        )
+
+        segmentations = state.segmentations
+        if pipeline._segmentation.model.specifications.powerset:
+            binarized_segmentations = segmentations
+        else:
+            binarized_segmentations = binarize(
+                segmentations,
+                onset=pipeline.segmentation.threshold,
+                initial_state=False
+            )
+
+        # Kopie, da die Sprecheranzahl unten begrenzt wird
+        count = SlidingWindowFeature(state.count.data.copy(), state.count.sliding_window)
+        if np.nanmax(count.data) == 0.0:
+            return []
+
+        hard_clusters, _, centroids = pipeline.clustering(
+            embeddings=state.embeddings,
+            segmentations=binarized_segmentations,
+            num_clusters=num_speakers,
+            min_clusters=min_speakers,
+            max_clusters=max_speakers,
+            frames=pipeline._frames
+        )
+
+        count.data = np.minimum(count.data, max_speakers).astype(np.int8)
+
+        inactive_speakers = np.sum(binarized_segmentations.data, axis=1) == 0
+        hard_clusters[inactive_speakers] = -2
+        discrete_diarization = pipeline.reconstruct(segmentations, hard_clusters, count)
+
+        diarization = pipeline.to_annotation(
+            discrete_diarization,
+            min_duration_on=0.0,
+            min_duration_off=pipeline.segmentation.min_duration_off
+        )
+        mapping = {
+            label: expected_label
+            for label, expected_label in zip(diarization.labels(), pipeline.classes())
+        }
+        turns = self._annotation_to_turns(diarization.rename_labels(mapping=mapping))
+        if centroids is None or not mapping:
+            return turns
+
+        # Zeilen der Zentroide entsprechen den ganzzahligen Cluster-Labels
+        rows = [
+            centroids[label] if label < len(centroids) else np.zeros(centroids.shape[1])
+            for label in mapping
+        ]
+        return self._name_speakers(turns, list(mapping.values()), np.stack(rows))
+
+    def _speaker_params(
+        self,
+        num_speakers: Optional[int],
+        min_speakers: Optional[int],
+        max_speakers: Optional[int]
+    ) -> Dict[str, int]:
+        """Parameter für die Sprecheranzahl der pyannote Pipeline"""
+        params = {}
+        if num_speakers:
+            params["num_speakers"] = int(num_speakers)
+        if min_speakers:
+            params["min_speakers"] = int(min_speakers)
+        if max_speakers:
+            params["max_speakers"] = int(max_speakers)
+        return params
+
     def diarize(
         self,
-        audio_path: str,
+        audio: AudioInput,
         transcription_result: Dict[str, Any],
         num_speakers: Optional[int] = None
     ) -> Dict[str, Any]:
@@ -66,7 +748,8 @@ class SpeakerDiarizer:
         Führt Sprechertrennung durch und kombiniert mit Transkription
 
         Args:
-            audio_path: Pfad zur Audiodatei
+            audio: Pfad zur Audiodatei oder dekodierte Waveform
+                (16 kHz mono float32, siehe audio.load_audio)
             transcription_result: Ergebnis von Whisper Transkription
             num_speakers: Erwartete Anzahl Sprecher (optional)
 
@@ -74,32 +757,40 @@ class SpeakerDiarizer:
             Dictionary mit Segmenten inkl. Sprecherinformation
         """
         try:
-            # Lade Pipeline falls noch nicht geladen
-            if self.pipeline is None:
-                self.load_pipeline()
+            diarization = self.run_diarization(audio, num_speakers)
+            return self.merge(diarization, transcription_result)
 
-            print("Führe Sprechertrennung durch...")
+        except Exception as e:
+            print(f"Fehler bei der Sprechertrennung: {str(e)}")
+            # Fallback: Gebe Transkription ohne Sprechertrennung zurück
+            return transcription_result
 
-            # Führe Diarization durch
-            diarization_params = {}
-            if num_speakers:
-                diarization_params["num_speakers"] = int(num_speakers)
+    @stage("merge")
+    def merge(
+        self,
+        diarization,
+        transcription_result: Dict[str, Any],
+        verbose: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Kombiniert ein fertiges Diarization-Ergebnis mit der Transkription
 
-            diarization = self.pipeline(audio_path, **diarization_params)
+        Args:
+            diarization: Sprecher-Turns aus run_diarization()
+            transcription_result: Whisper Transkription
+            verbose: Abschluss ausgeben (aus für Zwischenergebnisse)
 
-            # Kombiniere Diarization mit Transkription
-            result = self._merge_diarization_with_transcription(
-                diarization,
-                transcription_result
-            )
+        Returns:
+            Dictionary mit Segmenten inkl. Sprecherinformation
+        """
+        result = self._merge_diarization_with_transcription(
+            diarization,
+            transcription_result
+        )
 
+        if verbose:
             print("Sprechertrennung abgeschlossen!")
-            return result
-
-        except Exception as e:
-            print(f"Fehler bei der Sprechertrennung: {str(e)}")
-            # Fallback: Gebe Transkription ohne Sprechertrennung zurück
-            return transcription_result
+        return result
 
     def _merge_diarization_with_transcription(
         self,
@@ -110,7 +801,8 @@ class SpeakerDiarizer:
         Kombiniert Diarization-Ergebnisse mit Transkription
 
         Args:
-            diarization: Pyannote Diarization Ergebnis
+            diarization: Pyannote Diarization Ergebnis oder Liste von
+                Sprecher-Turns
             transcription_result: Whisper Transkription
 
         Returns:
@@ -120,30 +812,38 @@ class SpeakerDiarizer:
         transcription_segments = transcription_result.get("segments", [])
 
         # Erstelle Speaker-Timeline aus Diarization
-        speaker_timeline = []
-        for turn, _, speaker in diarization.itertracks(yield_label=True):
-            speaker_timeline.append({
-                "start": turn.start,
-                "end": turn.end,
-                "speaker": speaker
-            })
-
-        # Weise jedem Transkriptionssegment einen Sprecher zu
-        merged_segments = []
-        for segment in transcription_segments:
-            segment_start = segment["start"]
-            segment_end = segment["end"]
-            segment_mid = (segment_start + segment_end) / 2
+        if isinstance(diarization, list):
+            speaker_timeline = diarization
+        else:
+            speaker_timeline = self._annotation_to_turns(diarization)
 
-            # Finde Sprecher zur Segment-Mitte
-            speaker = self._find_speaker_at_time(speaker_timeline, segment_mid)
+        speaker_index = SpeakerIndex(speaker_timeline)
 
-            merged_segments.append({
-                "start": segment_start,
-                "end": segment_end,
+        # Weise jedem Transkriptionssegment den Sprecher mit der größten
+        # Überlappung zu
+        segment_speakers = speaker_index.lookup(
+            [segment["start"] for segment in transcription_segments],
+            [segment["end"] for segment in transcription_segments]
+        )
+
+        merged_segments = []
+        for segment, speaker in zip(transcription_segments, segment_speakers):
+            merged_segment = {
+                "start": segment["start"],
+                "end": segment["end"],
                 "text": segment["text"].strip(),
                 "speaker": speaker or "Unbekannt"
-            })
+            }
+
+            # Bei word_timestamps zusätzlich jedes Wort zuordnen
+            if segment.get("words"):
+                merged_segment["words"] = self._assign_word_speakers(
+                    speaker_index,
+                    segment["words"],
+                    merged_segment["speaker"]
+                )
+
+            merged_segments.append(merged_segment)
 
         # Gruppiere aufeinanderfolgende Segmente desselben Sprechers
         grouped_segments = self._group_segments_by_speaker(merged_segments)
@@ -154,25 +854,47 @@ class SpeakerDiarizer:
             "language": transcription_result.get("language", "unknown")
         }
 
-    def _find_speaker_at_time(
+    def _annotation_to_turns(self, diarization) -> List[Dict]:
+        """
+        Wandelt eine Pyannote Annotation in eine Liste von Turns um
+
+        Args:
+            diarization: Pyannote Diarization Ergebnis
+
+        Returns:
+            Liste von Turns mit 'start', 'end', 'speaker'
+        """
+        return [
+            {"start": turn.start, "end": turn.end, "speaker": speaker}
+            for turn, _, speaker in diarization.itertracks(yield_label=True)
+        ]
+
+    def _assign_word_speakers(
         self,
-        speaker_timeline: List[Dict],
-        time: float
-    ) -> Optional[str]:
+        speaker_index: SpeakerIndex,
+        words: List[Dict],
+        default_speaker: str
+    ) -> List[Dict]:
         """
-        Findet den Sprecher zu einem bestimmten Zeitpunkt
+        Weist jedem Wort eines Segments einen Sprecher zu
 
         Args:
-            speaker_timeline: Liste von Speaker-Segmenten
-            time: Zeitpunkt in Sekunden
+            speaker_index: Intervall-Index der Diarization
+            words: Wörter mit 'start' und 'end' (Whisper word_timestamps)
+            default_speaker: Sprecher des Segments für Wörter ohne Überlappung
 
         Returns:
-            Speaker-Label oder None
+            Kopien der Wörter mit zusätzlichem 'speaker'
         """
-        for segment in speaker_timeline:
-            if segment["start"] <= time <= segment["end"]:
-                return segment["speaker"]
-        return None
+        word_speakers = speaker_index.lookup(
+            [word["start"] for word in words],
+            [word["end"] for word in words]
+        )
+
+        return [
+            {**word, "speaker": speaker or default_speaker}
+            for word, speaker in zip(words, word_speakers)
+        ]
 
     def _group_segments_by_speaker(
         self,
@@ -198,6 +920,10 @@ class SpeakerDiarizer:
                 # Gleicher Sprecher: füge Text hinzu
                 current_group["text"] += " " + segment["text"]
                 current_group["end"] = segment["end"]
+                if "words" in segment:
+                    current_group["words"] = (
+                        current_group.get("words", []) + segment["words"]
+                    )
             else:
                 # Neuer Sprecher: speichere aktuelle Gruppe
                 grouped.append(current_group)
@@ -0,0 +1,173 @@
+"""
+Alternative Ausführung des Whisper-Encoders auf der CPU
+
+Der Encoder verarbeitet jedes 30-Sekunden-Fenster und dominiert auf der CPU
+die Rechenzeit. Statt eager PyTorch kann er mit torch.compile (Inductor)
+oder als ONNX-Modell über onnxruntime laufen. Die kompilierten Artefakte
+werden zwischengespeichert; schlägt die Engine fehl, wird auf eager
+zurückgefallen. Da nur die Forward-Funktion des Encoders ersetzt wird,
+bleiben Decoder, Dekodier-Logik und Ergebnis-Dictionaries unverändert.
+"""
+
+import os
+from typing import Optional
+
+import numpy as np
+
+try:
+    from .precision import model_cache_dir, model_cache_path
+except ImportError:
+    from precision import model_cache_dir, model_cache_path
+
+ENGINES = ("eager", "compile", "onnx")
+
+# ONNX-Opset für den Export (scaled_dot_product_attention ab 14)
+ONNX_OPSET = 17
+
+
+def default_engine() -> str:
+    """
+    Liest die Encoder-Engine aus TRANSCRIBER_ENCODER_ENGINE
+
+    Returns:
+        'eager', 'compile' oder 'onnx'
+    """
+    engine = os.getenv("TRANSCRIBER_ENCODER_ENGINE", "eager").strip().lower() or "eager"
+    if engine not in ENGINES:
+        raise ValueError(
+            f"Unbekannte Encoder-Engine '{engine}' (erlaubt: {', '.join(ENGINES)})"
+        )
+    return engine
+
+
+def _compiled_forward(eager_forward, cache_dir: Optional[str]):
+    """Kompiliert den Encoder mit Inductor (Kernel-Cache auf der Festplatte)"""
+    import torch
+    import torch._inductor.config as inductor_config
+
+    # Der FX-Graph-Cache speichert die erzeugten Kernels, so dass spätere
+    # Prozesse nicht erneut kompilieren
+    os.environ.setdefault(
+        "TORCHINDUCTOR_CACHE_DIR", str(model_cache_dir(cache_dir) / "inductor")
+    )
+    inductor_config.fx_graph_cache = True
+    return torch.compile(eager_forward)
+
+
+def export_onnx_encoder(model, model_size: str, cache_dir: Optional[str] = None) -> str:
+    """
+    Exportiert den Encoder nach ONNX (einmal pro Checkpoint)
+
+    Args:
+        model: Whisper-Modell (fp32, CPU)
+        model_size: Modellgröße oder Pfad zu einem Checkpoint
+        cache_dir: Cache-Verzeichnis (siehe precision.model_cache_dir)
+
+    Returns:
+        Pfad der .onnx-Datei
+    """
+    import torch
+
+    path = model_cache_path(model_size, "encoder", ".onnx", cache_dir)
+    if path.exists():
+        return str(path)
+
+    print(f"Exportiere Whisper-Encoder '{model_size}' nach ONNX...")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    mel = torch.zeros(1, model.dims.n_mels, 2 * model.dims.n_audio_ctx)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with torch.no_grad():
+        torch.onnx.export(
+            model.encoder,
+            mel,
+            str(tmp_path),
+            input_names=["mel"],
+            output_names=["audio_features"],
+            dynamic_axes={"mel": {0: "batch"}, "audio_features": {0: "batch"}},
+            opset_version=ONNX_OPSET
+        )
+    os.replace(tmp_path, path)
+    return str(path)
+
+
+def _onnx_forward(model, model_size: str, cache_dir: Optional[str]):
+    """Führt den exportierten Encoder mit onnxruntime aus"""
+    import onnxruntime
+    import torch
+
+    path = export_onnx_encoder(model, model_size, cache_dir)
+    options = onnxruntime.SessionOptions()
+    # Threadlimit von Torch übernehmen (Long-Form-Worker, Parallelmodus)
+    options.intra_op_num_threads = torch.get_num_threads()
+    session = onnxruntime.InferenceSession(
+        path, options, providers=["CPUExecutionProvider"]
+    )
+
+    def forward(mel):
+        mel = mel.detach().cpu().numpy().astype(np.float32, copy=False)
+        return torch.from_numpy(session.run(None, {"mel": mel})[0])
+
+    return forward
+
+
+def install_encoder_engine(
+    model,
+    model_size: str,
+    precision: str = "fp32",
+    engine: Optional[str] = None,
+    cache_dir: Optional[str] = None
+):
+    """
+    Ersetzt die Ausführung des Encoders durch die gewählte Engine
+
+    Nur auf der CPU. ONNX setzt ein fp32-Modell voraus; mit int8/bf16 bleibt
+    der Encoder eager. Schlägt die Engine beim Einrichten oder bei einem
+    Aufruf fehl, läuft der Encoder ab dann eager.
+
+    Args:
+        model: Whisper-Modell
+        model_size: Modellgröße oder Pfad zu einem Checkpoint (Cache-Schlüssel)
+        precision: Genauigkeit des Modells (siehe precision.py)
+        engine: 'eager', 'compile' oder 'onnx' (Standard:
+            TRANSCRIBER_ENCODER_ENGINE)
+        cache_dir: Cache-Verzeichnis (siehe precision.model_cache_dir)
+
+    Returns:
+        Dasselbe Modell
+    """
+    if engine is None:
+        engine = default_engine()
+    if engine == "eager":
+        return model
+
+    if model.device.type != "cpu":
+        print(f"Encoder-Engine '{engine}' nur auf der CPU, verwende eager")
+        return model
+    if engine == "onnx" and precision != "fp32":
+        print(f"Encoder-Engine 'onnx' unterstützt {precision} nicht, verwende eager")
+        return model
+
+    eager_forward = model.encoder.forward
+    try:
+        if engine == "compile":
+            engine_forward = _compiled_forward(eager_forward, cache_dir)
+        else:
+            engine_forward = _onnx_forward(model, model_size, cache_dir)
+    except Exception as e:
+        print(f"Encoder-Engine '{engine}' nicht verfügbar, verwende eager: {str(e)}")
+        return model
+
+    def encode(mel):
+        nonlocal engine_forward
+        if engine_forward is not None:
+            try:
+                return engine_forward(mel)
+            except Exception as e:
+                # torch.compile kompiliert erst beim ersten Aufruf
+                print(f"Encoder-Engine '{engine}' fehlgeschlagen, verwende eager: {str(e)}")
+                engine_forward = None
+        return eager_forward(mel)
+
+    model.encoder.forward = encode
+    print(f"Whisper-Encoder läuft mit Engine '{engine}'")
+    return model
@@ -1,28 +1,50 @@
 """
-Export-Modul für PDF und TXT
+Export-Modul für PDF, TXT, Untertitel (SRT, WebVTT) und Datenformate
+(JSON Lines, Spaltenformat)
 """
 
-from typing import Dict, Any, Union
+from typing import Dict, Any, Iterable, List, Optional, Tuple, Union
 from datetime import datetime
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import cm
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-from reportlab.lib.enums import TA_LEFT, TA_CENTER
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
 import os
+import time
+
+try:
+    from .metrics import record_stage, stage
+    from .writers import WRITERS, format_minutes, open_writer
+except ImportError:
+    from metrics import record_stage, stage
+    from writers import WRITERS, format_minutes, open_writer
+
+# reportlab wird erst beim ersten PDF-Export importiert
+
+# Unterstützte Formate (= Dateiendungen)
+EXPORT_FORMATS = tuple(WRITERS)
 
 
 class ExportManager:
     """Klasse für Export von Transkriptionen"""
 
     def __init__(self):
-        self.styles = getSampleStyleSheet()
-        self._setup_styles()
+        self._styles = None
+        # 'canvas' zeichnet Seite für Seite (schnell, konstanter Speicher),
+        # 'platypus' baut das Dokument wie bisher als Story auf
+        self.pdf_renderer = os.getenv("TRANSCRIBER_PDF_RENDERER", "canvas")
+
+    @property
+    def styles(self):
+        """PDF-Styles (beim ersten Zugriff erstellt)"""
+        if self._styles is None:
+            from reportlab.lib.styles import getSampleStyleSheet
+
+            self._styles = getSampleStyleSheet()
+            self._setup_styles()
+        return self._styles
 
     def _setup_styles(self):
         """Erstellt benutzerdefinierte Styles für PDF"""
+        from reportlab.lib.enums import TA_LEFT, TA_CENTER
+        from reportlab.lib.styles import ParagraphStyle
+
         # Titel Style
         self.styles.add(ParagraphStyle(
             name='CustomTitle',
@@ -80,50 +102,62 @@ class ExportManager:
         Returns:
             Pfad zur erstellten PDF-Datei
         """
-        try:
-            # Erstelle PDF-Dokument
-            doc = SimpleDocTemplate(
-                output_path,
-                pagesize=A4,
-                rightMargin=2*cm,
-                leftMargin=2*cm,
-                topMargin=2*cm,
-                bottomMargin=2*cm
-            )
-
-            # Story-Elemente
-            story = []
-
-            # Titel
-            story.append(Paragraph(title, self.styles['CustomTitle']))
-            story.append(Spacer(1, 0.5*cm))
-
-            # Datum
-            date_str = datetime.now().strftime("%d.%m.%Y %H:%M")
-            story.append(Paragraph(
-                f"Erstellt am: {date_str}",
-                self.styles['Timestamp']
-            ))
-            story.append(Spacer(1, 1*cm))
-
-            # Inhalt basierend auf Datentyp
-            if isinstance(data, dict) and "segments" in data:
-                # Mit Sprechertrennung
-                story.extend(self._format_segments_for_pdf(data["segments"]))
-            else:
-                # Einfacher Text
-                text = data if isinstance(data, str) else str(data)
-                story.extend(self._format_plain_text_for_pdf(text))
-
-            # Baue PDF
-            doc.build(story)
-
-            print(f"PDF erstellt: {output_path}")
-            return output_path
+        return self._write_formats(data, {"pdf": output_path}, title)["pdf"]
 
-        except Exception as e:
-            print(f"Fehler beim PDF-Export: {str(e)}")
-            raise
+    def _build_pdf_story(
+        self,
+        data: Union[str, Dict[str, Any]],
+        output_path: str,
+        title: str
+    ):
+        """
+        Baut das PDF als Platypus-Story (alle Elemente im Speicher)
+
+        Args:
+            data: Transkriptionsdaten (String oder Dictionary)
+            output_path: Ausgabepfad für PDF
+            title: Titel des Dokuments
+        """
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.units import cm
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+
+        # Erstelle PDF-Dokument
+        doc = SimpleDocTemplate(
+            output_path,
+            pagesize=A4,
+            rightMargin=2*cm,
+            leftMargin=2*cm,
+            topMargin=2*cm,
+            bottomMargin=2*cm
+        )
+
+        # Story-Elemente
+        story = []
+
+        # Titel
+        story.append(Paragraph(title, self.styles['CustomTitle']))
+        story.append(Spacer(1, 0.5*cm))
+
+        # Datum
+        date_str = datetime.now().strftime("%d.%m.%Y %H:%M")
+        story.append(Paragraph(
+            f"Erstellt am: {date_str}",
+            self.styles['Timestamp']
+        ))
+        story.append(Spacer(1, 1*cm))
+
+        # Inhalt basierend auf Datentyp
+        if isinstance(data, dict) and "segments" in data:
+            # Mit Sprechertrennung
+            story.extend(self._format_segments_for_pdf(data["segments"]))
+        else:
+            # Einfacher Text
+            text = data if isinstance(data, str) else str(data)
+            story.extend(self._format_plain_text_for_pdf(text))
+
+        # Baue PDF
+        doc.build(story)
 
     def _format_segments_for_pdf(self, segments: list) -> list:
         """
@@ -135,6 +169,9 @@ class ExportManager:
         Returns:
             Liste von PDF-Elementen
         """
+        from reportlab.lib.units import cm
+        from reportlab.platypus import Paragraph, Spacer
+
         elements = []
 
         for i, segment in enumerate(segments):
@@ -171,6 +208,9 @@ class ExportManager:
         Returns:
             Liste von PDF-Elementen
         """
+        from reportlab.lib.units import cm
+        from reportlab.platypus import Paragraph, Spacer
+
         elements = []
 
         # Teile Text in Absätze
@@ -201,67 +241,95 @@ class ExportManager:
         Returns:
             Pfad zur erstellten TXT-Datei
         """
-        try:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                # Header
-                f.write("=" * 80 + "\n")
-                f.write(f"{title}\n")
-                f.write("=" * 80 + "\n\n")
-
-                # Datum
-                date_str = datetime.now().strftime("%d.%m.%Y %H:%M")
-                f.write(f"Erstellt am: {date_str}\n")
-                f.write("-" * 80 + "\n\n")
-
-                # Inhalt
-                if isinstance(data, dict) and "segments" in data:
-                    # Mit Sprechertrennung
-                    f.write(self._format_segments_for_txt(data["segments"]))
-                else:
-                    # Einfacher Text
-                    text = data if isinstance(data, str) else str(data)
-                    f.write(text)
+        return self._write_formats(data, {"txt": output_path}, title)["txt"]
 
-                # Footer
-                f.write("\n\n" + "=" * 80 + "\n")
-                f.write("Ende der Transkription\n")
-                f.write("=" * 80 + "\n")
+    def export_to_srt(
+        self,
+        data: Union[str, Dict[str, Any]],
+        output_path: str,
+        transcription_result: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Exportiert Transkription als SRT-Untertitel
 
-            print(f"TXT erstellt: {output_path}")
-            return output_path
+        Args:
+            data: Transkriptionsdaten (String oder Dictionary)
+            output_path: Ausgabepfad für SRT
+            transcription_result: Whisper-Ergebnis (liefert die Segmente,
+                falls data nur Text ist)
 
-        except Exception as e:
-            print(f"Fehler beim TXT-Export: {str(e)}")
-            raise
+        Returns:
+            Pfad zur erstellten SRT-Datei
+        """
+        return self._write_formats(
+            data, {"srt": output_path}, transcription_result=transcription_result
+        )["srt"]
 
-    def _format_segments_for_txt(self, segments: list) -> str:
+    def export_to_vtt(
+        self,
+        data: Union[str, Dict[str, Any]],
+        output_path: str,
+        transcription_result: Optional[Dict[str, Any]] = None
+    ) -> str:
         """
-        Formatiert Segmente mit Sprechern für TXT
+        Exportiert Transkription als WebVTT-Untertitel
 
         Args:
-            segments: Liste von Segmenten
+            data: Transkriptionsdaten (String oder Dictionary)
+            output_path: Ausgabepfad für VTT
+            transcription_result: Whisper-Ergebnis (liefert die Segmente,
+                falls data nur Text ist)
 
         Returns:
-            Formatierter Text-String
+            Pfad zur erstellten VTT-Datei
         """
-        lines = []
+        return self._write_formats(
+            data, {"vtt": output_path}, transcription_result=transcription_result
+        )["vtt"]
 
-        for segment in segments:
-            speaker = segment.get("speaker", "Unbekannt")
-            text = segment.get("text", "")
-            start = segment.get("start", 0)
-            end = segment.get("end", 0)
+    def export_to_jsonl(
+        self,
+        data: Union[str, Dict[str, Any]],
+        output_path: str,
+        transcription_result: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Exportiert Transkription als JSON Lines (ein Segment pro Zeile)
 
-            # Timestamp
-            timestamp = f"[{self._format_time(start)} - {self._format_time(end)}]"
-            lines.append(timestamp)
+        Args:
+            data: Transkriptionsdaten (String oder Dictionary)
+            output_path: Ausgabepfad für JSONL
+            transcription_result: Whisper-Ergebnis (liefert die Segmente,
+                falls data nur Text ist)
 
-            # Sprecher und Text
-            lines.append(f"{speaker}:")
-            lines.append(text)
-            lines.append("")  # Leerzeile
+        Returns:
+            Pfad zur erstellten JSONL-Datei
+        """
+        return self._write_formats(
+            data, {"jsonl": output_path}, transcription_result=transcription_result
+        )["jsonl"]
+
+    def export_to_columnar(
+        self,
+        data: Union[str, Dict[str, Any]],
+        output_path: str,
+        transcription_result: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Exportiert Transkription im Spaltenformat (.npz, siehe writers.py)
 
-        return "\n".join(lines)
+        Args:
+            data: Transkriptionsdaten (String oder Dictionary)
+            output_path: Ausgabepfad für NPZ
+            transcription_result: Whisper-Ergebnis (liefert die Segmente,
+                falls data nur Text ist)
+
+        Returns:
+            Pfad zur erstellten NPZ-Datei
+        """
+        return self._write_formats(
+            data, {"npz": output_path}, transcription_result=transcription_result
+        )["npz"]
 
     def _format_time(self, seconds: float) -> str:
         """
@@ -273,9 +341,7 @@ class ExportManager:
         Returns:
             Formatierter Zeitstring
         """
-        minutes = int(seconds // 60)
-        secs = int(seconds % 60)
-        return f"{minutes:02d}:{secs:02d}"
+        return format_minutes(seconds)
 
     def _escape_xml(self, text: str) -> str:
         """
@@ -300,6 +366,31 @@ class ExportManager:
 
         return text
 
+    def export_formats(
+        self,
+        data: Union[str, Dict[str, Any]],
+        base_path: str,
+        formats: Iterable[str] = ("pdf", "txt"),
+        title: str = "Audio Transkription",
+        transcription_result: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, str]:
+        """
+        Exportiert beliebige Formate in einem Durchlauf über die Segmente
+
+        Args:
+            data: Transkriptionsdaten
+            base_path: Basis-Pfad ohne Endung
+            formats: Formate aus EXPORT_FORMATS
+            title: Titel des Dokuments
+            transcription_result: Whisper-Ergebnis (liefert die Segmente für
+                Untertitel und Datenformate, falls data nur Text ist)
+
+        Returns:
+            Dictionary Format -> Pfad
+        """
+        paths = {fmt: f"{base_path}.{fmt}" for fmt in formats}
+        return self._write_formats(data, paths, title, transcription_result)
+
     def export_both(
         self,
         data: Union[str, Dict[str, Any]],
@@ -317,7 +408,127 @@ class ExportManager:
         Returns:
             Tuple (pdf_path, txt_path)
         """
-        pdf_path = self.export_to_pdf(data, f"{base_path}.pdf", title)
-        txt_path = self.export_to_txt(data, f"{base_path}.txt", title)
+        paths = self.export_formats(data, base_path, ("pdf", "txt"), title)
+        return paths["pdf"], paths["txt"]
+
+    def _write_formats(
+        self,
+        data: Union[str, Dict[str, Any]],
+        paths: Dict[str, str],
+        title: str = "Audio Transkription",
+        transcription_result: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, str]:
+        """
+        Schreibt alle Formate gleichzeitig, Segment für Segment
+
+        Die Zeit jedes Writers wird als eigene Stufe verbucht
+        (export_pdf, export_txt, export_srt, ...).
+
+        Args:
+            data: Transkriptionsdaten (String oder Dictionary)
+            paths: Format -> Ausgabepfad
+            title: Titel des Dokuments
+            transcription_result: Whisper-Ergebnis (Segmente für Formate mit
+                Zeitstempeln, falls data nur Text ist)
+
+        Returns:
+            Dictionary Format -> Pfad
+        """
+        unknown = set(paths) - set(EXPORT_FORMATS)
+        if unknown:
+            raise ValueError(f"Unbekannte Exportformate: {', '.join(sorted(unknown))}")
+
+        segments, text = self._split_content(data, transcription_result)
+        if segments is None:
+            missing = [fmt for fmt in paths if WRITERS[fmt].needs_segments]
+            if missing:
+                raise ValueError(
+                    f"Für {', '.join(missing).upper()} werden Segmente mit "
+                    f"Zeitstempeln benötigt"
+                )
+        paths = dict(paths)
+
+        if "pdf" in paths and self.pdf_renderer == "platypus":
+            pdf_path = paths.pop("pdf")
+            try:
+                with stage("export_pdf"):
+                    self._build_pdf_story(data, pdf_path, title)
+            except Exception as e:
+                print(f"Fehler beim PDF-Export: {str(e)}")
+                raise
+            print(f"PDF erstellt: {pdf_path}")
+            result = {"pdf": pdf_path}
+        else:
+            result = {}
+
+        timings: Dict[str, List[float]] = {}
+        writers = {}
+        try:
+            for fmt, path in paths.items():
+                writers[fmt] = self._timed(timings, fmt, open_writer, fmt, path, title)
+
+            # Einfacher Text für Formate ohne Zeitstempel, Segmente für alle
+            # übrigen
+            segment_writers = []
+            for fmt, writer in writers.items():
+                if text is not None and not writer.needs_segments:
+                    self._timed(timings, fmt, writer.write_text, text)
+                else:
+                    segment_writers.append((fmt, writer))
+
+            if segment_writers:
+                for segment in segments:
+                    for fmt, writer in segment_writers:
+                        self._timed(timings, fmt, writer.write_segment, segment)
 
-        return pdf_path, txt_path
+            for fmt in list(writers):
+                writer = writers.pop(fmt)
+                self._timed(timings, fmt, writer.close)
+                result[fmt] = paths[fmt]
+                print(f"{fmt.upper()} erstellt: {paths[fmt]}")
+
+        except Exception as e:
+            print(f"Fehler beim Export ({', '.join(paths)}): {str(e)}")
+            for writer in writers.values():
+                try:
+                    writer.close()
+                except Exception:
+                    pass
+            raise
+
+        finally:
+            for fmt, (wall_seconds, cpu_seconds) in timings.items():
+                record_stage(f"export_{fmt}", wall_seconds, cpu_seconds)
+
+        return result
+
+    def _split_content(
+        self,
+        data: Union[str, Dict[str, Any]],
+        transcription_result: Optional[Dict[str, Any]]
+    ) -> Tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
+        """
+        Ermittelt Segmente und einfachen Text der Transkriptionsdaten
+
+        Returns:
+            Tuple (Segmente oder None, Text oder None bei Sprechertrennung)
+        """
+        if isinstance(data, dict) and "segments" in data:
+            return data["segments"], None
+
+        text = data if isinstance(data, str) else str(data)
+        segments = None
+        if transcription_result and transcription_result.get("segments") is not None:
+            segments = transcription_result["segments"]
+        return segments, text
+
+    def _timed(self, timings: Dict[str, List[float]], fmt: str, fn, *args):
+        """Führt fn aus und addiert Wanduhr- und CPU-Zeit für das Format"""
+        wall_started = time.perf_counter()
+        cpu_started = time.process_time()
+        try:
+            return fn(*args)
+        finally:
+            totals = timings.setdefault(fmt, [0.0, 0.0])
+            totals[0] += time.perf_counter() - wall_started
+            totals[1] += time.process_time() - cpu_started
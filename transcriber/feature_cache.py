@@ -0,0 +1,264 @@
+"""
+Feature-Cache: Mel-Fenster und Encoder-Ausgaben pro Aufnahme
+
+Wird dieselbe Aufnahme mit anderen Dekodier-Optionen erneut transkribiert
+(z.B. 'translate' nach 'transcribe' oder eine feste Sprache nach 'auto'),
+muss nur noch dekodiert werden: Die Encoder-Ausgaben der 30-Sekunden-Fenster
+und die erkannte Sprache liegen bereits vor. Die Mel-Fenster hängen nur von
+der Anzahl Mel-Bänder ab und helfen daher auch beim Wechsel der
+Modellgröße.
+
+Die Einträge liegen in einem LRU-Speicher mit festem Budget; verdrängte
+Einträge werden optional auf die Festplatte ausgelagert und bei Bedarf
+wieder geladen.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+# Höchstzahl gemerkter Spracherkennungen
+MAX_LANGUAGES = 10000
+
+
+class FeatureCache:
+    """
+    Speicherbegrenzter Cache für Mel-Fenster und Encoder-Ausgaben
+
+    Schlüssel sind Tupel aus Inhalts-Hash der Waveform, Art, Modell bzw.
+    Mel-Bändern und Fensterindex. Threadsicher.
+    """
+
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        spill_dir: Optional[str] = None,
+        spill_max_bytes: Optional[int] = None,
+        namespace: str = ""
+    ):
+        """
+        Args:
+            max_bytes: Speicherbudget in Bytes (Standard:
+                TRANSCRIBER_FEATURE_CACHE_MB, sonst 512 MB)
+            spill_dir: Verzeichnis für verdrängte Einträge (Standard:
+                TRANSCRIBER_FEATURE_CACHE_DIR; leer = nicht auslagern)
+            spill_max_bytes: Maximale Größe des Verzeichnisses (Standard:
+                TRANSCRIBER_FEATURE_CACHE_DISK_MB, sonst 4096 MB)
+            namespace: Unterscheidet Encoder-Ausgaben verschiedener
+                Konfigurationen (z.B. die Genauigkeit des Modell-Pools)
+        """
+        if max_bytes is None:
+            max_bytes = int(os.getenv("TRANSCRIBER_FEATURE_CACHE_MB", "512")) * 1024 * 1024
+        if spill_dir is None:
+            spill_dir = os.getenv("TRANSCRIBER_FEATURE_CACHE_DIR", "")
+        if spill_max_bytes is None:
+            spill_max_bytes = int(os.getenv("TRANSCRIBER_FEATURE_CACHE_DISK_MB", "4096")) * 1024 * 1024
+
+        self.max_bytes = max_bytes
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        if self.spill_dir is not None:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+        self.spill_max_bytes = spill_max_bytes
+        self.namespace = namespace
+
+        self._entries: "OrderedDict[Tuple, np.ndarray]" = OrderedDict()
+        self._languages: "OrderedDict[Tuple, str]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.spilled = 0
+
+    @staticmethod
+    def fingerprint(audio: np.ndarray) -> str:
+        """
+        Inhalts-Hash einer Waveform
+
+        Args:
+            audio: Waveform (16 kHz mono float32)
+
+        Returns:
+            Hex-String
+        """
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        return hashlib.blake2b(audio.data, digest_size=16).hexdigest()
+
+    def mel_key(self, fingerprint: str, n_mels: int, window: int) -> Tuple:
+        """Schlüssel eines Mel-Fensters"""
+        return (fingerprint, "mel", n_mels, window)
+
+    def features_key(self, fingerprint: str, model_size: str, window: int) -> Tuple:
+        """Schlüssel der Encoder-Ausgabe eines Fensters"""
+        return (fingerprint, "features", self.namespace, model_size, window)
+
+    def get(self, key: Tuple) -> Optional[np.ndarray]:
+        """
+        Liest einen Eintrag (aus dem Speicher oder ausgelagert)
+
+        Args:
+            key: Schlüssel (siehe mel_key, features_key)
+
+        Returns:
+            Array oder None
+        """
+        with self._lock:
+            array = self._entries.get(key)
+            if array is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return array
+
+        array = self._load_spilled(key)
+        with self._lock:
+            if array is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        # Zurück in den Speicher, damit weitere Zugriffe nicht lesen müssen
+        self.put(key, array)
+        return array
+
+    def put(self, key: Tuple, array: np.ndarray):
+        """
+        Speichert einen Eintrag und verdrängt bei Bedarf die ältesten
+
+        Args:
+            key: Schlüssel (siehe mel_key, features_key)
+            array: Mel-Fenster oder Encoder-Ausgabe
+        """
+        if array.nbytes > self.max_bytes:
+            return
+
+        evicted = []
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._entries[key] = array
+            self._bytes += array.nbytes
+            while self._bytes > self.max_bytes:
+                old_key, old_array = self._entries.popitem(last=False)
+                self._bytes -= old_array.nbytes
+                evicted.append((old_key, old_array))
+
+        for old_key, old_array in evicted:
+            self._spill(old_key, old_array)
+
+    def get_language(self, fingerprint: str, model_size: str) -> Optional[str]:
+        """Bereits erkannte Sprache einer Aufnahme"""
+        with self._lock:
+            return self._languages.get((fingerprint, model_size))
+
+    def put_language(self, fingerprint: str, model_size: str, language: str):
+        """Merkt sich die erkannte Sprache einer Aufnahme"""
+        with self._lock:
+            self._languages[(fingerprint, model_size)] = language
+            self._languages.move_to_end((fingerprint, model_size))
+            while len(self._languages) > MAX_LANGUAGES:
+                self._languages.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Liefert Cache-Statistiken
+
+        Returns:
+            Dictionary mit Treffern, Fehlzugriffen, Trefferquote, Einträgen,
+            belegtem Speicher und ausgelagerten Einträgen
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "size_bytes": self._bytes,
+                "spilled": self.spilled
+            }
+
+    def clear(self):
+        """Leert den Speicher (ausgelagerte Einträge bleiben erhalten)"""
+        with self._lock:
+            self._entries.clear()
+            self._languages.clear()
+            self._bytes = 0
+
+    def _spill_path(self, key: Tuple) -> Path:
+        digest = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+        return self.spill_dir / f"{digest}.npy"
+
+    def _spill(self, key: Tuple, array: np.ndarray):
+        """Lagert einen verdrängten Eintrag auf die Festplatte aus"""
+        if self.spill_dir is None:
+            return
+        path = self._spill_path(key)
+        if path.exists():
+            return
+
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                np.save(f, array)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Feature-Cache konnte nicht auslagern: {str(e)}")
+            tmp_path.unlink(missing_ok=True)
+            return
+
+        with self._lock:
+            self.spilled += 1
+        self._evict_spilled()
+
+    def _load_spilled(self, key: Tuple) -> Optional[np.ndarray]:
+        if self.spill_dir is None:
+            return None
+        path = self._spill_path(key)
+        try:
+            array = np.load(path)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return array
+
+    def _evict_spilled(self):
+        """Entfernt die ältesten ausgelagerten Einträge über der Größengrenze"""
+        entries = []
+        for path in self.spill_dir.iterdir():
+            if path.name.startswith("."):
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+            if total <= self.spill_max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+def default_feature_cache(namespace: str = "") -> Optional[FeatureCache]:
+    """
+    Erstellt den Feature-Cache gemäß Konfiguration
+
+    Args:
+        namespace: Siehe FeatureCache
+
+    Returns:
+        FeatureCache oder None solange TRANSCRIBER_FEATURE_CACHE nicht 1 ist
+    """
+    if os.getenv("TRANSCRIBER_FEATURE_CACHE", "0") != "1":
+        return None
+    return FeatureCache(namespace=namespace)
@@ -0,0 +1,428 @@
+"""
+Persistente Auftragswarteschlange mit Worker-Pool (SQLite)
+
+Aufträge überstehen Neustarts und Verbindungsabbrüche im Browser: Die
+hochgeladene Datei wird in das Auftragsverzeichnis kopiert, Status,
+Fortschritt und Ergebnis liegen in einer lokalen SQLite-Datenbank.
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    from .audio import estimate_duration
+    from .metrics import profile_job
+    from .resources import format_bytes
+except ImportError:
+    from audio import estimate_duration
+    from metrics import profile_job
+    from resources import format_bytes
+
+# Mögliche Auftragszustände
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATUSES = (DONE, FAILED, CANCELLED)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    priority REAL NOT NULL,
+    audio_path TEXT NOT NULL,
+    params TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT NOT NULL DEFAULT '',
+    result TEXT,
+    error TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    peak_rss INTEGER
+);
+CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority, created_at);
+"""
+
+
+class JobCancelled(Exception):
+    """Wird ausgelöst, wenn ein laufender Auftrag abgebrochen wurde"""
+
+
+class JobQueue:
+    """
+    Warteschlange für Transkriptionsaufträge
+
+    Kurze Dateien werden zuerst bearbeitet (Priorität = geschätzte Dauer).
+    Laufende Aufträge können abgebrochen werden; der Abbruch greift beim
+    nächsten Fortschritts-Update der Pipeline.
+    """
+
+    def __init__(
+        self,
+        run_job: Callable[..., Any],
+        db_path: Optional[str] = None,
+        workers: Optional[int] = None
+    ):
+        """
+        Args:
+            run_job: Funktion (audio_path, progress=..., **params) ->
+                (Endergebnis, Whisper-Ergebnis), z.B.
+                TranscriptionPipeline.run
+            db_path: Pfad zur SQLite-Datenbank (Standard:
+                TRANSCRIBER_JOB_DB oder ~/.cache/transcriber/jobs.sqlite3)
+            workers: Anzahl Worker-Threads (Standard:
+                TRANSCRIBER_JOB_WORKERS, sonst 1)
+        """
+        if db_path is None:
+            db_path = os.getenv(
+                "TRANSCRIBER_JOB_DB",
+                os.path.join(Path.home(), ".cache", "transcriber", "jobs.sqlite3")
+            )
+        if workers is None:
+            workers = int(os.getenv("TRANSCRIBER_JOB_WORKERS", "1"))
+
+        self.run_job = run_job
+        self.db_path = db_path
+        self.files_dir = Path(db_path).parent / "job_files"
+        self.files_dir.mkdir(parents=True, exist_ok=True)
+
+        self._claim_lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        # Weckt Wartende bei Fortschritt und Abschluss (siehe wait_for_change)
+        self._changed = threading.Condition()
+        self.changes = 0
+
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            # Spalten älterer Datenbanken nachrüsten
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "peak_rss" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN peak_rss INTEGER")
+            # Nach einem Neustart unterbrochene Aufträge erneut einreihen
+            conn.execute(
+                "UPDATE jobs SET status = ?, progress = 0, message = '' "
+                "WHERE status = ?",
+                (QUEUED, RUNNING)
+            )
+
+        self.workers = [
+            threading.Thread(target=self._worker_loop, name=f"job-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self.workers:
+            worker.start()
+
+    def submit(self, audio_file: str, **params) -> str:
+        """
+        Reiht eine Audiodatei ein
+
+        Args:
+            audio_file: Pfad zur Audiodatei (wird in das Auftragsverzeichnis
+                kopiert)
+            **params: Parameter für run_job (model_size, language, ...)
+
+        Returns:
+            Auftrags-ID
+        """
+        job_id = uuid.uuid4().hex
+        stored_path = self.files_dir / f"{job_id}{Path(audio_file).suffix}"
+        shutil.copyfile(audio_file, stored_path)
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, priority, audio_path, params, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    job_id,
+                    QUEUED,
+                    estimate_duration(str(stored_path)),
+                    str(stored_path),
+                    json.dumps(params),
+                    time.time()
+                )
+            )
+
+        with self._wakeup:
+            self._wakeup.notify()
+
+        return job_id
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Liefert den Status eines Auftrags
+
+        Args:
+            job_id: Auftrags-ID
+
+        Returns:
+            Dictionary mit status, progress, message, error, Zeitstempeln und
+            peak_rss (maximaler RSS in Bytes während der Verarbeitung) oder
+            None für unbekannte IDs
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, status, priority, progress, message, error, "
+                "created_at, started_at, finished_at, peak_rss FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            status = dict(row)
+            if status["status"] == QUEUED:
+                status["queue_position"] = conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = ? AND "
+                    "(priority < ? OR (priority = ? AND created_at < ?))",
+                    (QUEUED, row["priority"], row["priority"], row["created_at"])
+                ).fetchone()[0]
+            return status
+
+    def result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Liefert das Ergebnis eines abgeschlossenen Auftrags
+
+        Args:
+            job_id: Auftrags-ID
+
+        Returns:
+            Dictionary mit 'final' und 'transcription' oder None
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT result FROM jobs WHERE id = ? AND status = ?",
+                (job_id, DONE)
+            ).fetchone()
+        if row is None or row["result"] is None:
+            return None
+        return json.loads(row["result"])
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Bricht einen Auftrag ab
+
+        Args:
+            job_id: Auftrags-ID
+
+        Returns:
+            True wenn der Auftrag abgebrochen wurde bzw. der Abbruch
+            angefordert ist
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+                (CANCELLED, time.time(), job_id, QUEUED)
+            )
+            if cursor.rowcount:
+                self._remove_audio(conn, job_id)
+                self._notify_change()
+                return True
+
+            cursor = conn.execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = ?",
+                (job_id, RUNNING)
+            )
+            return bool(cursor.rowcount)
+
+    def wait_for_change(self, seen: int, timeout: float = 1.0) -> int:
+        """
+        Wartet, bis sich ein Auftrag dieses Prozesses ändert
+
+        Args:
+            seen: Zuvor gelesener Wert von 'changes' (vor der Statusabfrage
+                lesen, damit keine Änderung verloren geht)
+            timeout: Maximale Wartezeit in Sekunden
+
+        Returns:
+            Aktueller Wert von 'changes'
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: self.changes != seen, timeout=timeout)
+            return self.changes
+
+    def _notify_change(self):
+        with self._changed:
+            self.changes += 1
+            self._changed.notify_all()
+
+    def queue_depth(self) -> int:
+        """Anzahl wartender Aufträge"""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ?", (QUEUED,)
+            ).fetchone()[0]
+
+    def list_jobs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Liefert die zuletzt eingereichten Aufträge
+
+        Args:
+            limit: Maximale Anzahl
+
+        Returns:
+            Liste von Status-Dictionaries (neueste zuerst)
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, status, progress, message, created_at, finished_at "
+                "FROM jobs ORDER BY created_at DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def _connect(self) -> "_AutoClosingConnection":
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return _AutoClosingConnection(conn)
+
+    def _claim_next(self) -> Optional[sqlite3.Row]:
+        """Übernimmt den Auftrag mit der höchsten Priorität"""
+        with self._claim_lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, audio_path, params FROM jobs WHERE status = ? "
+                "ORDER BY priority, created_at LIMIT 1",
+                (QUEUED,)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, started_at = ? WHERE id = ?",
+                    (RUNNING, time.time(), row["id"])
+                )
+            conn.execute("COMMIT")
+            return row
+
+    def _update_progress(self, job_id: str, value: float, desc: str = ""):
+        """Speichert den Fortschritt und prüft auf Abbruch"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET progress = ?, message = ? WHERE id = ?",
+                (float(value), desc, job_id)
+            )
+            cancel_requested = conn.execute(
+                "SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()[0]
+        self._notify_change()
+        if cancel_requested:
+            raise JobCancelled(job_id)
+
+    def _finish(
+        self,
+        job_id: str,
+        status: str,
+        result=None,
+        error: Optional[str] = None,
+        peak_rss: Optional[int] = None
+    ):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, "
+                "peak_rss = ?, "
+                "progress = CASE WHEN ? = ? THEN 1 ELSE progress END WHERE id = ?",
+                (
+                    status,
+                    json.dumps(result, default=float) if result is not None else None,
+                    error,
+                    time.time(),
+                    peak_rss,
+                    status,
+                    DONE,
+                    job_id
+                )
+            )
+            # Die Audiodatei wird nach Abschluss nicht mehr benötigt
+            self._remove_audio(conn, job_id)
+        self._notify_change()
+
+    def _remove_audio(self, conn: sqlite3.Connection, job_id: str):
+        row = conn.execute(
+            "SELECT audio_path FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if row is not None:
+            Path(row["audio_path"]).unlink(missing_ok=True)
+
+    def _worker_loop(self):
+        while True:
+            # Ein Fehler (z.B. 'database is locked') darf den Worker nicht
+            # beenden, sonst bleibt die Warteschlange stumm stehen
+            try:
+                self._work_once()
+            except Exception as e:
+                print(f"Fehler im Auftrags-Worker: {str(e)}")
+                time.sleep(1)
+
+    def _work_once(self):
+        """Bearbeitet den nächsten Auftrag bzw. wartet auf einen neuen"""
+        job = self._claim_next()
+        if job is None:
+            with self._wakeup:
+                self._wakeup.wait(timeout=5)
+            return
+
+        job_id = job["id"]
+        print(f"Starte Auftrag {job_id}")
+
+        def progress(value, desc="", **kwargs):
+            self._update_progress(job_id, value, desc)
+
+        status, result, error = DONE, None, None
+        with profile_job(job_id) as profile:
+            try:
+                final_result, transcription_result = self.run_job(
+                    job["audio_path"],
+                    progress=progress,
+                    **json.loads(job["params"])
+                )
+                if not transcription_result:
+                    status, error = FAILED, "Fehler bei der Transkription."
+                else:
+                    result = {
+                        "final": final_result,
+                        "transcription": transcription_result
+                    }
+            except JobCancelled:
+                print(f"Auftrag {job_id} abgebrochen")
+                status = CANCELLED
+            except Exception as e:
+                print(f"Fehler in Auftrag {job_id}: {str(e)}")
+                status, error = FAILED, str(e)
+
+        print(
+            f"Auftrag {job_id}: {profile.wall_seconds:.1f}s, "
+            f"Spitzen-RSS {format_bytes(profile.peak_rss)}"
+        )
+        try:
+            self._finish(job_id, status, result=result, error=error, peak_rss=profile.peak_rss)
+        except Exception as e:
+            # Z.B. nicht serialisierbares Ergebnis: Auftrag nicht auf RUNNING
+            # stehen lassen
+            print(f"Ergebnis von Auftrag {job_id} nicht speicherbar: {str(e)}")
+            self._finish(
+                job_id, FAILED,
+                error=f"Ergebnis nicht speicherbar: {str(e)}",
+                peak_rss=profile.peak_rss
+            )
+
+
+class _AutoClosingConnection:
+    """Kontextmanager, der die SQLite-Verbindung nach Gebrauch schließt"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        return self._conn
+
+    def __exit__(self, *exc_info):
+        self._conn.close()
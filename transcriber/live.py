@@ -0,0 +1,269 @@
+"""
+Live-Transkription vom Mikrofon mit rollendem Puffer
+
+Eingehende Audio-Chunks werden gesammelt und der Puffer wird wiederholt
+transkribiert. Wörter gelten als stabil, sobald zwei aufeinanderfolgende
+Durchläufe sie übereinstimmend liefern (LocalAgreement-2). Stabile Wörter
+werden festgeschrieben und der Puffer dahinter abgeschnitten, so dass
+bestätigter Text nicht erneut dekodiert wird.
+"""
+
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+try:
+    from .audio import SAMPLE_RATE
+    from .transcriber import WhisperTranscriber
+except ImportError:
+    from audio import SAMPLE_RATE
+    from transcriber import WhisperTranscriber
+
+# Zielwert: 95 % der Wörter sollen spätestens so viele Sekunden nach ihrem
+# Ende festgeschrieben sein (CPU, Modell 'base', siehe
+# benchmarks/live_latency.py)
+TARGET_COMMIT_LATENCY = 3.0
+
+# Zeichen des festgeschriebenen Texts, die als Kontext dienen
+PROMPT_CHARS = 200
+
+# Die erkannte Sprache wird erst festgehalten, wenn mindestens so viele
+# Sekunden Audio vorliegen und der Durchlauf Wörter geliefert hat; die erste
+# Sekunde ist oft Stille und ergibt eine zufällige Sprache
+LANGUAGE_LOCK_SECONDS = 3.0
+
+# Wort als (start, end, text) in Sekunden seit Beginn der Aufnahme
+Word = Tuple[float, float, str]
+
+
+def _normalize(word: str) -> str:
+    """Vergleichsform eines Worts (ohne Satzzeichen, klein)"""
+    return re.sub(r"[^\w]", "", word.lower())
+
+
+def common_prefix(previous: List[Word], current: List[Word]) -> int:
+    """
+    Länge des übereinstimmenden Anfangs zweier Hypothesen
+
+    Args:
+        previous: Unbestätigte Wörter des vorherigen Durchlaufs
+        current: Wörter des aktuellen Durchlaufs
+
+    Returns:
+        Anzahl übereinstimmender Wörter
+    """
+    n = 0
+    for (_, _, a), (_, _, b) in zip(previous, current):
+        if _normalize(a) != _normalize(b):
+            break
+        n += 1
+    return n
+
+
+def resample(audio: np.ndarray, sample_rate: int) -> np.ndarray:
+    """
+    Wandelt Mikrofon-Audio in 16 kHz mono float32
+
+    Args:
+        audio: Samples (int16 oder float, mono oder (Samples, Kanäle))
+        sample_rate: Abtastrate der Samples
+
+    Returns:
+        Waveform (16 kHz, mono, float32)
+    """
+    if audio.dtype == np.int16:
+        audio = audio.astype(np.float32) / 32768.0
+    elif audio.dtype == np.int32:
+        audio = audio.astype(np.float32) / 2147483648.0
+    audio = audio.astype(np.float32, copy=False)
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+
+    if sample_rate == SAMPLE_RATE or len(audio) == 0:
+        return audio
+
+    # Lineare Interpolation reicht für Sprache und kommt ohne zusätzliche
+    # Abhängigkeit aus
+    num_samples = int(round(len(audio) * SAMPLE_RATE / sample_rate))
+    positions = np.arange(num_samples) * (sample_rate / SAMPLE_RATE)
+    return np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+
+
+class LiveTranscriber:
+    """
+    Streaming-Transkription eines Mikrofonsignals
+
+    Verwendet das Modell aus dem Modell-Pool des WhisperTranscriber. Pro
+    Durchlauf wird nur der noch nicht festgeschriebene Teil des Puffers
+    dekodiert; wird der Puffer länger als max_buffer_seconds, wird die
+    aktuelle Hypothese festgeschrieben, damit die Latenz begrenzt bleibt.
+    """
+
+    def __init__(
+        self,
+        transcriber: WhisperTranscriber,
+        model_size: str = "base",
+        language: Optional[str] = None,
+        min_chunk_seconds: Optional[float] = None,
+        max_buffer_seconds: Optional[float] = None
+    ):
+        """
+        Args:
+            transcriber: Transkriptor, dessen Modell-Pool verwendet wird
+            model_size: Größe des Whisper-Modells
+            language: Sprache (None/'auto': erkannt, sobald genug Sprache
+                vorliegt, siehe LANGUAGE_LOCK_SECONDS)
+            min_chunk_seconds: Mindestmenge neuer Audiodaten pro Durchlauf
+                (Standard: TRANSCRIBER_LIVE_MIN_CHUNK_SECONDS, sonst 1)
+            max_buffer_seconds: Maximale Pufferlänge (Standard:
+                TRANSCRIBER_LIVE_MAX_BUFFER_SECONDS, sonst 15)
+        """
+        if min_chunk_seconds is None:
+            min_chunk_seconds = float(os.getenv("TRANSCRIBER_LIVE_MIN_CHUNK_SECONDS", "1"))
+        if max_buffer_seconds is None:
+            max_buffer_seconds = float(os.getenv("TRANSCRIBER_LIVE_MAX_BUFFER_SECONDS", "15"))
+
+        self.transcriber = transcriber
+        self.model_size = model_size
+        self.language = language if language and language != "auto" else None
+        self.min_chunk_seconds = min_chunk_seconds
+        self.max_buffer_seconds = max_buffer_seconds
+
+        self.buffer = np.zeros(0, dtype=np.float32)
+        # Startzeit des Puffers in Sekunden seit Beginn der Aufnahme
+        self.buffer_offset = 0.0
+        self.unprocessed_samples = 0
+
+        self.committed: List[Word] = []
+        self.hypothesis: List[Word] = []
+
+    @property
+    def received_seconds(self) -> float:
+        """Bisher empfangene Audiodauer"""
+        return self.buffer_offset + len(self.buffer) / SAMPLE_RATE
+
+    @property
+    def text(self) -> str:
+        """Festgeschriebener Text"""
+        return "".join(word for _, _, word in self.committed).strip()
+
+    @property
+    def partial_text(self) -> str:
+        """Noch unbestätigter Text"""
+        return "".join(word for _, _, word in self.hypothesis).strip()
+
+    def insert_audio(self, audio: np.ndarray):
+        """
+        Hängt neue Samples an den Puffer an
+
+        Args:
+            audio: Waveform (16 kHz mono float32, siehe resample)
+        """
+        self.buffer = np.concatenate([self.buffer, audio])
+        self.unprocessed_samples += len(audio)
+
+    def process(self, force: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Transkribiert den Puffer, falls genug neue Audiodaten vorliegen
+
+        Args:
+            force: Auch mit weniger als min_chunk_seconds neuen Daten dekodieren
+
+        Returns:
+            Dictionary mit 'committed' (neu festgeschriebene Wörter),
+            'text' (gesamter festgeschriebener Text) und 'partial'
+            (unbestätigter Rest) oder None, wenn nicht dekodiert wurde
+        """
+        new_seconds = self.unprocessed_samples / SAMPLE_RATE
+        if len(self.buffer) == 0 or (not force and new_seconds < self.min_chunk_seconds):
+            return None
+        self.unprocessed_samples = 0
+
+        words = self._transcribe_buffer()
+
+        # LocalAgreement: was zwei Durchläufe gleich liefern, ist stabil
+        stable = common_prefix(self.hypothesis, words)
+        new_words = words[:stable]
+        self.hypothesis = words[stable:]
+
+        # Begrenzte Latenz: zu langen Puffer zwangsweise festschreiben
+        overflow = len(self.buffer) / SAMPLE_RATE > self.max_buffer_seconds
+        if overflow:
+            new_words += self.hypothesis
+            self.hypothesis = []
+
+        self._commit(new_words)
+
+        if overflow and not new_words:
+            # Puffer enthält nur Stille: bis auf den letzten Chunk verwerfen
+            self._trim(len(self.buffer) - int(self.min_chunk_seconds * SAMPLE_RATE))
+
+        return {
+            "committed": new_words,
+            "text": self.text,
+            "partial": self.partial_text
+        }
+
+    def finish(self) -> Dict[str, Any]:
+        """
+        Schreibt den Rest am Ende der Aufnahme fest
+
+        Returns:
+            Dictionary wie process() mit dem endgültigen Text
+        """
+        new_words = []
+        if len(self.buffer) > 0:
+            new_words = self._transcribe_buffer()
+        self._commit(new_words)
+        self.hypothesis = []
+
+        return {"committed": new_words, "text": self.text, "partial": ""}
+
+    def _transcribe_buffer(self) -> List[Word]:
+        """Dekodiert den Puffer und liefert die noch nicht festgeschriebenen Wörter"""
+        model = self.transcriber.load_model(self.model_size)
+
+        params = {
+            "task": "transcribe",
+            "verbose": None,
+            "word_timestamps": True,
+            "condition_on_previous_text": False,
+            "fp16": self.transcriber.device == "cuda"
+        }
+        if self.language:
+            params["language"] = self.language
+        if self.committed:
+            params["initial_prompt"] = self.text[-PROMPT_CHARS:]
+
+        result = model.transcribe(self.buffer, **params)
+        has_words = any(segment.get("words") for segment in result.get("segments", []))
+        if (self.language is None and has_words
+                and self.received_seconds >= LANGUAGE_LOCK_SECONDS):
+            # Sprache für alle weiteren Durchläufe festhalten
+            self.language = result.get("language")
+
+        last_end = self.committed[-1][1] if self.committed else 0.0
+        words = []
+        for segment in result.get("segments", []):
+            for word in segment.get("words", []):
+                start = self.buffer_offset + word["start"]
+                end = self.buffer_offset + word["end"]
+                # Wörter vor dem festgeschriebenen Ende stammen aus dem
+                # Puffer-Rest und wurden bereits ausgegeben
+                if end > last_end + 0.05:
+                    words.append((start, end, word["word"]))
+        return words
+
+    def _commit(self, words: List[Word]):
+        """Schreibt Wörter fest und schneidet den Puffer hinter ihnen ab"""
+        if not words:
+            return
+        self.committed.extend(words)
+        self._trim(int((words[-1][1] - self.buffer_offset) * SAMPLE_RATE))
+
+    def _trim(self, samples: int):
+        """Entfernt Samples am Anfang des Puffers"""
+        samples = min(max(samples, 0), len(self.buffer))
+        self.buffer = self.buffer[samples:]
+        self.buffer_offset += samples / SAMPLE_RATE
@@ -0,0 +1,258 @@
+"""
+Long-Form Transkription: parallele Verarbeitung langer Aufnahmen auf der CPU
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+try:
+    from .audio import SAMPLE_RATE, split_audio
+    from .encoder_engine import install_encoder_engine
+    from .precision import default_precision, load_whisper, resolve_precision
+except ImportError:
+    from audio import SAMPLE_RATE, split_audio
+    from encoder_engine import install_encoder_engine
+    from precision import default_precision, load_whisper, resolve_precision
+
+# Modell des Worker-Prozesses (pro Prozess einmal geladen)
+_worker_model = None
+
+
+def _init_worker(model_size: str, num_threads: int, precision: str = "fp32"):
+    """Lädt das Modell im Worker-Prozess mit begrenzter Threadzahl"""
+    global _worker_model
+    import torch
+
+    torch.set_num_threads(num_threads)
+    # int8-Modelle kommen nach der ersten Quantisierung aus dem
+    # Festplatten-Cache
+    _worker_model = install_encoder_engine(
+        load_whisper(model_size, "cpu", precision), model_size, precision
+    )
+
+
+def _transcribe_chunk(
+    chunk: np.ndarray,
+    transcribe_params: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Transkribiert einen Chunk im Worker-Prozess"""
+    return _worker_model.transcribe(chunk, **transcribe_params)
+
+
+def shift_segments(
+    segments: List[Dict[str, Any]],
+    offset: float
+) -> List[Dict[str, Any]]:
+    """
+    Verschiebt Segment- und Wortzeitstempel auf die globale Zeitachse
+
+    Args:
+        segments: Whisper-Segmente eines Chunks
+        offset: Startzeit des Chunks in Sekunden
+
+    Returns:
+        Kopien der Segmente mit verschobenen Zeitstempeln
+    """
+    shifted = []
+    for segment in segments:
+        segment = {
+            **segment,
+            "start": segment["start"] + offset,
+            "end": segment["end"] + offset
+        }
+        if "seek" in segment:
+            # seek zählt Mel-Frames (100 pro Sekunde)
+            segment["seek"] += int(round(offset * 100))
+        if segment.get("words"):
+            segment["words"] = [
+                {**word, "start": word["start"] + offset, "end": word["end"] + offset}
+                for word in segment["words"]
+            ]
+        shifted.append(segment)
+    return shifted
+
+
+def stitch_results(
+    chunk_results: List[Tuple[Tuple[int, int, int, int], Dict[str, Any]]],
+    language: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Fügt Chunk-Ergebnisse zu einem Whisper-Ergebnis zusammen
+
+    Segmente aus dem Überlappungsbereich werden dem Chunk zugeordnet, in
+    dessen Zuständigkeitsbereich ihre Mitte liegt, so dass kein Text doppelt
+    erscheint.
+
+    Args:
+        chunk_results: Liste von ((start, end, context_start, context_end),
+            Whisper-Ergebnis) in zeitlicher Reihenfolge
+        language: Erkannte Sprache (Standard: Sprache des ersten Chunks)
+
+    Returns:
+        Whisper-Ergebnis mit 'text', 'segments' und 'language'
+    """
+    segments = []
+    last = len(chunk_results) - 1
+    for i, ((start, end, context_start, _), result) in enumerate(chunk_results):
+        offset = context_start / SAMPLE_RATE
+        # Der erste und letzte Chunk sind nach außen offen
+        lower = start / SAMPLE_RATE if i > 0 else float("-inf")
+        upper = end / SAMPLE_RATE if i < last else float("inf")
+
+        for segment in shift_segments(result.get("segments", []), offset):
+            mid = (segment["start"] + segment["end"]) / 2
+            if lower <= mid < upper:
+                segments.append(segment)
+
+    for i, segment in enumerate(segments):
+        segment["id"] = i
+
+    if language is None and chunk_results:
+        language = chunk_results[0][1].get("language")
+
+    return {
+        "text": "".join(segment["text"] for segment in segments),
+        "segments": segments,
+        "language": language
+    }
+
+
+class LongFormTranscriber:
+    """
+    Transkribiert lange Aufnahmen in Chunks parallel über einen Prozess-Pool
+
+    Jeder Worker-Prozess hält ein eigenes Modell und nutzt nur eine begrenzte
+    Anzahl Torch-Threads. Der Pool bleibt zwischen Aufrufen erhalten, solange
+    Modellgröße und Worker-Konfiguration gleich bleiben.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        threads_per_worker: Optional[int] = None,
+        chunk_seconds: Optional[float] = None,
+        overlap_seconds: Optional[float] = None,
+        precision: Optional[str] = None
+    ):
+        """
+        Args:
+            workers: Anzahl Worker-Prozesse (Standard:
+                TRANSCRIBER_LONG_FORM_WORKERS, sonst Kerne / Threads)
+            threads_per_worker: Torch-Threads pro Worker (Standard:
+                TRANSCRIBER_LONG_FORM_THREADS, sonst 2)
+            chunk_seconds: Ziel-Chunklänge in Sekunden (Standard:
+                TRANSCRIBER_LONG_FORM_CHUNK_SECONDS, sonst 300)
+            overlap_seconds: Kontext-Überlappung zwischen Chunks (Standard: 1)
+            precision: Genauigkeit der Worker-Modelle (Standard:
+                TRANSCRIBER_PRECISION)
+        """
+        if threads_per_worker is None:
+            threads_per_worker = int(os.getenv("TRANSCRIBER_LONG_FORM_THREADS", "2"))
+        if workers is None:
+            workers = int(os.getenv(
+                "TRANSCRIBER_LONG_FORM_WORKERS",
+                str(max(1, (os.cpu_count() or 1) // threads_per_worker))
+            ))
+        if chunk_seconds is None:
+            chunk_seconds = float(os.getenv("TRANSCRIBER_LONG_FORM_CHUNK_SECONDS", "300"))
+        if overlap_seconds is None:
+            overlap_seconds = 1.0
+
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        self.chunk_seconds = chunk_seconds
+        self.overlap_seconds = overlap_seconds
+        self.precision = resolve_precision(precision or default_precision(), "cpu")
+
+        self._executor = None
+        self._executor_model_size = None
+        # Der Transkriptor wird von mehreren Threads geteilt (Auftrags-Worker,
+        # Live-Ausgabe, zwei Durchgänge): Wechsel des Pools und Einreichen der
+        # Chunks dürfen sich nicht überschneiden
+        self._executor_lock = threading.Lock()
+
+    def transcribe(
+        self,
+        audio: np.ndarray,
+        model_size: str,
+        language: Optional[str],
+        task: str = "transcribe",
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Transkribiert eine Waveform in parallelen Chunks
+
+        Args:
+            audio: Waveform (16 kHz mono float32)
+            model_size: Größe des Whisper-Modells
+            language: Sprache (sollte gesetzt sein, damit alle Chunks
+                dieselbe Sprache verwenden)
+            task: 'transcribe' oder 'translate'
+            **kwargs: Zusätzliche Parameter für whisper.transcribe()
+
+        Returns:
+            Whisper-Ergebnis wie von model.transcribe()
+        """
+        chunks = split_audio(audio, self.chunk_seconds, self.overlap_seconds)
+        print(
+            f"Long-Form: {len(chunks)} Chunks auf {self.workers} Prozessen "
+            f"mit je {self.threads_per_worker} Threads"
+        )
+
+        transcribe_params = {"task": task, "verbose": None, **kwargs}
+        if language:
+            transcribe_params["language"] = language
+
+        with self._executor_lock:
+            executor = self._get_executor(model_size)
+            futures = [
+                executor.submit(
+                    _transcribe_chunk,
+                    audio[context_start:context_end],
+                    transcribe_params
+                )
+                for _, _, context_start, context_end in chunks
+            ]
+
+        chunk_results = [
+            (chunk, future.result()) for chunk, future in zip(chunks, futures)
+        ]
+        return stitch_results(chunk_results, language)
+
+    def shutdown(self):
+        """Beendet die Worker-Prozesse"""
+        with self._executor_lock:
+            executor = self._executor
+            self._executor = None
+            self._executor_model_size = None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _get_executor(self, model_size: str) -> ProcessPoolExecutor:
+        """
+        Liefert den Prozess-Pool für die Modellgröße (Lock muss gehalten werden)
+
+        Bei einem Wechsel der Modellgröße nimmt der alte Pool keine neuen
+        Chunks mehr an, arbeitet bereits eingereichte aber noch ab und
+        beendet sich danach selbst.
+        """
+        if self._executor is not None and self._executor_model_size != model_size:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            self._executor_model_size = None
+
+        if self._executor is None:
+            # spawn statt fork: Torch-Threadpools überstehen fork nicht sicher
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(model_size, self.threads_per_worker, self.precision)
+            )
+            self._executor_model_size = model_size
+
+        return self._executor
@@ -0,0 +1,447 @@
+"""
+Instrumentierung der Verarbeitungsstufen und Prometheus-Endpunkt
+
+Jede Stufe (Dekodierung, Modell-Laden, Whisper-Encoder/-Decoder,
+Sprechertrennung, Zusammenführen, Export) wird mit stage() gemessen. Die
+Werte landen in der globalen Registry, die unter /metrics im
+Prometheus-Textformat abrufbar ist, und im Profil des laufenden Auftrags
+(siehe profile_job).
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    from .resources import PeakMemoryMonitor, current_rss
+except ImportError:
+    from resources import PeakMemoryMonitor, current_rss
+
+# Namensraum aller Metriken
+PREFIX = "transcriber"
+
+
+class MetricsRegistry:
+    """
+    Sammelt Stufen-Zeiten, Auftragskennzahlen und abgefragte Messwerte
+
+    Zeiten werden pro Stufe als Summe und Anzahl geführt (wie eine
+    Prometheus-Summary ohne Quantile). Die CPU-Zeit ist die des gesamten
+    Prozesses während der Stufe; laufen Stufen parallel (z.B. Whisper und
+    pyannote), zählt sie bei beiden.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Stufe -> [Aufrufe, Wanduhrzeit, CPU-Zeit]
+        self._stages: Dict[str, List[float]] = {}
+        self._jobs = 0
+        self._audio_seconds = 0.0
+        self._processing_seconds = 0.0
+        self._last_real_time_factor: Optional[float] = None
+        self._last_peak_rss: Optional[int] = None
+        # Name -> (Typ, Hilfetext, Funktion) für beim Abruf ermittelte Werte
+        self._callbacks: Dict[str, Tuple[str, str, Callable[[], Optional[float]]]] = {}
+
+    def observe_stage(self, stage: str, wall_seconds: float, cpu_seconds: float):
+        """
+        Verbucht einen Durchlauf einer Stufe
+
+        Args:
+            stage: Name der Stufe
+            wall_seconds: Wanduhrzeit in Sekunden
+            cpu_seconds: CPU-Zeit des Prozesses in Sekunden
+        """
+        with self._lock:
+            totals = self._stages.setdefault(stage, [0, 0.0, 0.0])
+            totals[0] += 1
+            totals[1] += wall_seconds
+            totals[2] += cpu_seconds
+
+    def observe_job(
+        self,
+        wall_seconds: float,
+        audio_seconds: float,
+        peak_rss: Optional[int]
+    ):
+        """
+        Verbucht einen abgeschlossenen Auftrag
+
+        Args:
+            wall_seconds: Verarbeitungszeit in Sekunden
+            audio_seconds: Verarbeitete Audiodauer in Sekunden (0 wenn
+                unbekannt, z.B. vollständig aus dem Cache)
+            peak_rss: Maximaler RSS während des Auftrags in Bytes
+        """
+        with self._lock:
+            self._jobs += 1
+            self._processing_seconds += wall_seconds
+            self._audio_seconds += audio_seconds
+            if audio_seconds > 0:
+                self._last_real_time_factor = wall_seconds / audio_seconds
+            if peak_rss is not None:
+                self._last_peak_rss = peak_rss
+
+    def register_callback(
+        self,
+        name: str,
+        help_text: str,
+        fn: Callable[[], Optional[float]],
+        metric_type: str = "gauge"
+    ):
+        """
+        Registriert einen Messwert, der erst beim Abruf ermittelt wird
+
+        Args:
+            name: Name ohne Präfix, z.B. 'job_queue_depth'
+            help_text: Beschreibung
+            fn: Funktion, die den aktuellen Wert liefert (None = auslassen)
+            metric_type: 'gauge' oder 'counter'
+        """
+        with self._lock:
+            self._callbacks[name] = (metric_type, help_text, fn)
+
+    def stage_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Liefert die Summen pro Stufe
+
+        Returns:
+            Dictionary Stufe -> {'calls', 'wall_seconds', 'cpu_seconds'}
+        """
+        with self._lock:
+            return {
+                stage: {"calls": calls, "wall_seconds": wall, "cpu_seconds": cpu}
+                for stage, (calls, wall, cpu) in self._stages.items()
+            }
+
+    def render(self) -> str:
+        """
+        Erstellt die Ausgabe im Prometheus-Textformat
+
+        Returns:
+            Text für den /metrics-Endpunkt
+        """
+        lines = []
+
+        def metric(name, metric_type, help_text, samples):
+            full_name = f"{PREFIX}_{name}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {metric_type}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{val}"' for key, val in labels.items())
+                label_text = f"{{{label_text}}}" if label_text else ""
+                lines.append(f"{full_name}{label_text} {float(value)!r}")
+
+        stages = self.stage_stats()
+        metric(
+            "stage_calls_total", "counter", "Durchläufe pro Verarbeitungsstufe",
+            [({"stage": stage}, s["calls"]) for stage, s in sorted(stages.items())]
+        )
+        metric(
+            "stage_seconds_total", "counter", "Wanduhrzeit pro Verarbeitungsstufe",
+            [({"stage": stage}, s["wall_seconds"]) for stage, s in sorted(stages.items())]
+        )
+        metric(
+            "stage_cpu_seconds_total", "counter",
+            "CPU-Zeit des Prozesses pro Verarbeitungsstufe",
+            [({"stage": stage}, s["cpu_seconds"]) for stage, s in sorted(stages.items())]
+        )
+
+        with self._lock:
+            jobs = self._jobs
+            audio_seconds = self._audio_seconds
+            processing_seconds = self._processing_seconds
+            last_rtf = self._last_real_time_factor
+            last_peak_rss = self._last_peak_rss
+            callbacks = sorted(self._callbacks.items())
+
+        metric("jobs_total", "counter", "Abgeschlossene Aufträge", [({}, jobs)])
+        metric(
+            "audio_seconds_total", "counter", "Verarbeitete Audiodauer",
+            [({}, audio_seconds)]
+        )
+        metric(
+            "processing_seconds_total", "counter", "Verarbeitungszeit aller Aufträge",
+            [({}, processing_seconds)]
+        )
+        if last_rtf is not None:
+            metric(
+                "last_job_real_time_factor", "gauge",
+                "Real-Time-Factor des letzten Auftrags (Rechenzeit / Audiodauer)",
+                [({}, last_rtf)]
+            )
+        if last_peak_rss is not None:
+            metric(
+                "last_job_peak_rss_bytes", "gauge",
+                "Maximaler RSS während des letzten Auftrags",
+                [({}, last_peak_rss)]
+            )
+
+        rss = current_rss()
+        if rss is not None:
+            metric("resident_memory_bytes", "gauge", "Aktueller RSS des Prozesses", [({}, rss)])
+
+        for name, (metric_type, help_text, fn) in callbacks:
+            try:
+                value = fn()
+            except Exception as e:
+                print(f"Metrik {name} konnte nicht ermittelt werden: {str(e)}")
+                continue
+            if value is not None:
+                metric(name, metric_type, help_text, [({}, value)])
+
+        return "\n".join(lines) + "\n"
+
+
+# Globale Registry des Prozesses
+registry = MetricsRegistry()
+
+# Profil des Auftrags, der im aktuellen Kontext läuft
+_current_profile: contextvars.ContextVar[Optional["JobProfile"]] = contextvars.ContextVar(
+    "transcriber_job_profile", default=None
+)
+
+
+class JobProfile:
+    """
+    Stufen-Zeiten, Audiodauer und Spitzen-RSS eines einzelnen Auftrags
+
+    Wird über profile_job() aktiviert. Mit TRANSCRIBER_PROFILE_DIR wird das
+    Profil nach Abschluss als JSON-Datei abgelegt.
+    """
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name: Bezeichnung des Auftrags (z.B. Auftrags-ID oder Dateiname)
+        """
+        self.name = name
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.audio_seconds = 0.0
+        self.wall_seconds = 0.0
+        self.peak_rss: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def add_stage(self, stage: str, wall_seconds: float, cpu_seconds: float):
+        with self._lock:
+            totals = self.stages.setdefault(
+                stage, {"calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0}
+            )
+            totals["calls"] += 1
+            totals["wall_seconds"] += wall_seconds
+            totals["cpu_seconds"] += cpu_seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Profil als JSON-serialisierbares Dictionary"""
+        return {
+            "name": self.name,
+            "wall_seconds": self.wall_seconds,
+            "audio_seconds": self.audio_seconds,
+            "real_time_factor": (
+                self.wall_seconds / self.audio_seconds if self.audio_seconds else None
+            ),
+            "peak_rss": self.peak_rss,
+            "stages": self.stages
+        }
+
+    def dump(self, profile_dir: str) -> Optional[str]:
+        """
+        Schreibt das Profil als JSON-Datei
+
+        Args:
+            profile_dir: Zielverzeichnis
+
+        Returns:
+            Pfad der Datei oder None bei Fehler
+        """
+        safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in self.name)
+        path = Path(profile_dir) / f"{time.strftime('%Y%m%d-%H%M%S')}-{safe_name}.json"
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            print(f"Profil konnte nicht geschrieben werden: {str(e)}")
+            return None
+        return str(path)
+
+
+@contextmanager
+def profile_job(name: str) -> Iterator[JobProfile]:
+    """
+    Misst einen Auftrag: Stufen, Wanduhrzeit und Spitzen-RSS
+
+    Verwendung:
+        with profile_job(job_id) as profile:
+            pipeline.run(...)
+        print(profile.peak_rss)
+
+    Args:
+        name: Bezeichnung des Auftrags
+
+    Yields:
+        JobProfile, das nach dem Block vollständig ist
+    """
+    profile = JobProfile(name)
+    token = _current_profile.set(profile)
+    monitor = PeakMemoryMonitor()
+    started = time.perf_counter()
+    monitor.start()
+    try:
+        yield profile
+    finally:
+        profile.peak_rss = monitor.stop()
+        profile.wall_seconds = time.perf_counter() - started
+        _current_profile.reset(token)
+
+        registry.observe_job(profile.wall_seconds, profile.audio_seconds, profile.peak_rss)
+        profile_dir = os.getenv("TRANSCRIBER_PROFILE_DIR")
+        if profile_dir:
+            profile.dump(profile_dir)
+
+
+def record_stage(stage: str, wall_seconds: float, cpu_seconds: float):
+    """
+    Verbucht eine gemessene Stufe in Registry und aktuellem Profil
+
+    Args:
+        stage: Name der Stufe
+        wall_seconds: Wanduhrzeit in Sekunden
+        cpu_seconds: CPU-Zeit in Sekunden
+    """
+    registry.observe_stage(stage, wall_seconds, cpu_seconds)
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.add_stage(stage, wall_seconds, cpu_seconds)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Misst Wanduhr- und CPU-Zeit eines Abschnitts (auch als Decorator
+    verwendbar: @stage("export_pdf"))
+
+    Args:
+        name: Name der Stufe, z.B. 'decode' oder 'diarization'
+    """
+    wall_started = time.perf_counter()
+    cpu_started = time.process_time()
+    try:
+        yield
+    finally:
+        record_stage(
+            name,
+            time.perf_counter() - wall_started,
+            time.process_time() - cpu_started
+        )
+
+
+def record_audio(seconds: float):
+    """Verbucht die Audiodauer des laufenden Auftrags (für den Real-Time-Factor)"""
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.audio_seconds += seconds
+
+
+def instrument_module(module, stage_name: str):
+    """
+    Misst jeden Forward-Aufruf eines Torch-Moduls als Stufe
+
+    Whisper ruft Encoder und Decoder innerhalb von transcribe() abwechselnd
+    auf; über Forward-Hooks lassen sich beide getrennt erfassen. Auf der GPU
+    wird ohne Synchronisierung nur die Zeit bis zum Einreihen der Kernels
+    gemessen.
+
+    Args:
+        module: Torch-Modul (z.B. model.encoder)
+        stage_name: Name der Stufe
+    """
+    local = threading.local()
+
+    def pre_hook(mod, inputs):
+        local.started = (time.perf_counter(), time.process_time())
+
+    def post_hook(mod, inputs, output):
+        started = getattr(local, "started", None)
+        if started is not None:
+            record_stage(
+                stage_name,
+                time.perf_counter() - started[0],
+                time.process_time() - started[1]
+            )
+            local.started = None
+
+    module.register_forward_pre_hook(pre_hook)
+    module.register_forward_hook(post_hook)
+
+
+def instrument_whisper(model):
+    """Misst Encoder und Decoder eines Whisper-Modells getrennt"""
+    instrument_module(model.encoder, "whisper_encode")
+    instrument_module(model.decoder, "whisper_decode")
+    return model
+
+
+def run_in_context(fn: Callable, *args, **kwargs):
+    """
+    Bindet einen Aufruf an den aktuellen Kontext (für Thread-Pools)
+
+    Stufen, die in einem Worker-Thread laufen, landen so im Profil des
+    aufrufenden Auftrags.
+
+    Returns:
+        Funktion ohne Argumente für executor.submit()
+    """
+    context = contextvars.copy_context()
+    return lambda: context.run(fn, *args, **kwargs)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Abrufe des Scrapers nicht ins Log schreiben
+        pass
+
+
+def start_metrics_server(port: Optional[int] = None) -> Optional[ThreadingHTTPServer]:
+    """
+    Startet den /metrics-Endpunkt in einem Hintergrund-Thread
+
+    Args:
+        port: Port (Standard: TRANSCRIBER_METRICS_PORT, sonst 7861; 0 = aus)
+
+    Returns:
+        Server oder None wenn deaktiviert bzw. der Port belegt ist
+    """
+    if port is None:
+        port = int(os.getenv("TRANSCRIBER_METRICS_PORT", "7861"))
+    if port <= 0:
+        return None
+
+    try:
+        server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+    except OSError as e:
+        print(f"Metrik-Endpunkt konnte nicht gestartet werden: {str(e)}")
+        return None
+
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True)
+    thread.start()
+    print(f"Metriken unter http://0.0.0.0:{port}/metrics")
+    return server
@@ -0,0 +1,290 @@
+"""
+Modell-Pool: hält mehrere Whisper-Modelle gleichzeitig im Speicher
+"""
+
+import gc
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+try:
+    from .encoder_engine import install_encoder_engine
+    from .metrics import instrument_whisper, stage
+    from .precision import default_precision, load_whisper, resolve_precision
+except ImportError:
+    from encoder_engine import install_encoder_engine
+    from metrics import instrument_whisper, stage
+    from precision import default_precision, load_whisper, resolve_precision
+
+
+def default_device() -> str:
+    """
+    Ermittelt das Standardgerät (importiert Torch beim ersten Aufruf)
+
+    Returns:
+        'cuda' falls verfügbar, sonst 'cpu'
+    """
+    import torch
+
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def load_whisper_model(model_size: str, device: str, precision: str = "fp32"):
+    """Lädt ein Whisper-Modell (Standard-Loader des Pools)"""
+    model = load_whisper(model_size, device, precision)
+    return instrument_whisper(install_encoder_engine(model, model_size, precision))
+
+
+def model_memory(model) -> int:
+    """
+    Schätzt den Speicherbedarf eines Modells
+
+    Args:
+        model: Torch-Modell
+
+    Returns:
+        Größe aller Parameter und Buffer in Bytes
+    """
+    if hasattr(model, "state_dict"):
+        # Enthält auch die gepackten Gewichte quantisierter Schichten, die
+        # nicht unter parameters() erscheinen
+        tensors = list(_flatten_tensors(model.state_dict().values()))
+    else:
+        tensors = list(model.parameters()) + list(model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+def _flatten_tensors(values) -> Iterable:
+    for value in values:
+        if isinstance(value, (tuple, list)):
+            yield from _flatten_tensors(value)
+        elif hasattr(value, "element_size"):
+            yield value
+
+
+class ModelPool:
+    """
+    LRU-Pool für Whisper-Modelle mit Speicherbudget
+
+    Modelle bleiben geladen, bis das Speicherbudget einen Platz für ein neues
+    Modell erfordert (das am längsten ungenutzte wird entladen) oder sie
+    länger als die Idle-TTL nicht verwendet wurden.
+    """
+
+    def __init__(
+        self,
+        device: Optional[str] = None,
+        loader: Optional[Callable[..., Any]] = None,
+        memory_budget: Optional[int] = None,
+        idle_ttl: Optional[float] = None,
+        precision: Optional[str] = None
+    ):
+        """
+        Args:
+            device: Zielgerät ('cpu' oder 'cuda'; Standard: 'cuda' falls
+                verfügbar, beim ersten Zugriff ermittelt)
+            loader: Funktion (model_size, device) -> Modell; bei anderer
+                Genauigkeit als fp32 (model_size, device, precision) -> Modell
+                (Standard: whisper.load_model)
+            memory_budget: Speicherbudget in Bytes (Standard:
+                TRANSCRIBER_MODEL_MEMORY_MB, sonst 4096 MB; 0 = unbegrenzt)
+            idle_ttl: Sekunden ohne Nutzung bis zum Entladen (Standard:
+                TRANSCRIBER_MODEL_IDLE_TTL, sonst 1800; 0 = nie)
+            precision: Standard-Genauigkeit 'fp32', 'int8' oder 'bf16'
+                (Standard: TRANSCRIBER_PRECISION, sonst fp32)
+        """
+        if memory_budget is None:
+            memory_budget = int(os.getenv("TRANSCRIBER_MODEL_MEMORY_MB", "4096")) * 1024 * 1024
+        if idle_ttl is None:
+            idle_ttl = float(os.getenv("TRANSCRIBER_MODEL_IDLE_TTL", "1800"))
+
+        self._device = device
+        self.loader = loader or load_whisper_model
+        self.memory_budget = memory_budget
+        self.idle_ttl = idle_ttl
+        self.precision = precision or default_precision()
+
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+
+        self._janitor = None
+        if self.idle_ttl > 0:
+            self._janitor = threading.Thread(
+                target=self._janitor_loop,
+                name="model-pool-janitor",
+                daemon=True
+            )
+            self._janitor.start()
+
+    @property
+    def device(self) -> str:
+        """Zielgerät der Modelle"""
+        if self._device is None:
+            self._device = default_device()
+            print(f"Whisper wird auf {self._device} ausgeführt")
+        return self._device
+
+    def get(self, model_size: str, precision: Optional[str] = None):
+        """
+        Liefert ein Modell und lädt es bei Bedarf
+
+        Args:
+            model_size: Größe des Modells (tiny, base, small, medium, large)
+            precision: Genauigkeit (Standard: die des Pools); auf der GPU und
+                ohne bf16-Unterstützung der CPU wird fp32 verwendet
+
+        Returns:
+            Geladenes Whisper-Modell
+        """
+        precision = resolve_precision(precision or self.precision, self.device)
+        # fp32-Modelle behalten die Modellgröße als Schlüssel
+        key = model_size if precision == "fp32" else f"{model_size}:{precision}"
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Pro Modell nur ein Ladevorgang, andere Modelle bleiben nutzbar
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    return self._use(key, entry)
+
+            print(f"Lade Whisper-Modell '{key}'...")
+            start = time.perf_counter()
+            with stage("model_load"):
+                if precision == "fp32":
+                    model = self.loader(model_size, self.device)
+                else:
+                    model = self.loader(model_size, self.device, precision)
+            load_seconds = time.perf_counter() - start
+            memory_bytes = model_memory(model)
+
+            with self._lock:
+                self._make_room(memory_bytes)
+                entry = {
+                    "model": model,
+                    "load_seconds": load_seconds,
+                    "memory_bytes": memory_bytes,
+                    "loaded_at": time.time(),
+                    "last_used": time.time(),
+                    "uses": 0
+                }
+                self._entries[key] = entry
+
+            print(
+                f"Modell geladen! ({load_seconds:.1f}s, "
+                f"{memory_bytes / 1024 / 1024:.0f} MB)"
+            )
+            return self._use(key, entry)
+
+    def preload(self, model_sizes: Optional[Iterable[str]] = None):
+        """
+        Lädt Modelle vorab (z.B. beim Start der Anwendung)
+
+        Args:
+            model_sizes: Modellgrößen, optional mit Genauigkeit wie
+                'small:int8' (Standard: kommagetrennte Liste aus
+                TRANSCRIBER_PRELOAD_MODELS)
+        """
+        if model_sizes is None:
+            model_sizes = os.getenv("TRANSCRIBER_PRELOAD_MODELS", "").split(",")
+
+        for model_size in model_sizes:
+            model_size, _, precision = model_size.strip().partition(":")
+            if model_size:
+                self.get(model_size, precision or None)
+
+    def unload(self, model_size: str):
+        """
+        Entlädt ein Modell
+
+        Args:
+            model_size: Größe des Modells (bei int8/bf16 mit Genauigkeit,
+                z.B. 'small:int8')
+        """
+        with self._lock:
+            entry = self._entries.pop(model_size, None)
+        if entry is not None:
+            print(f"Entlade Whisper-Modell '{model_size}'")
+            del entry
+            self._release_memory()
+
+    def clear(self):
+        """Entlädt alle Modelle"""
+        for model_size in list(self._entries):
+            self.unload(model_size)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """
+        Liefert Statistiken über die geladenen Modelle
+
+        Returns:
+            Liste (LRU-Reihenfolge) mit Modellgröße, Ladezeit, Speicherbedarf,
+            Anzahl Nutzungen und Sekunden seit letzter Nutzung
+        """
+        now = time.time()
+        with self._lock:
+            return [
+                {
+                    "model_size": model_size,
+                    "load_seconds": entry["load_seconds"],
+                    "memory_bytes": entry["memory_bytes"],
+                    "uses": entry["uses"],
+                    "idle_seconds": now - entry["last_used"]
+                }
+                for model_size, entry in self._entries.items()
+            ]
+
+    def resident_memory(self) -> int:
+        """Gesamter Speicherbedarf aller geladenen Modelle in Bytes"""
+        with self._lock:
+            return sum(entry["memory_bytes"] for entry in self._entries.values())
+
+    def _use(self, model_size: str, entry: Dict[str, Any]):
+        """Markiert ein Modell als zuletzt benutzt (Lock muss gehalten werden)"""
+        self._entries.move_to_end(model_size)
+        entry["last_used"] = time.time()
+        entry["uses"] += 1
+        return entry["model"]
+
+    def _make_room(self, required_bytes: int):
+        """Entlädt LRU-Modelle bis das neue Modell ins Budget passt"""
+        if self.memory_budget <= 0:
+            return
+
+        while self._entries and (
+            self.resident_memory() + required_bytes > self.memory_budget
+        ):
+            model_size, _ = self._entries.popitem(last=False)
+            print(f"Entlade Whisper-Modell '{model_size}' (Speicherbudget)")
+
+        self._release_memory()
+
+    def _unload_idle(self):
+        """Entlädt Modelle, deren letzte Nutzung länger als die TTL her ist"""
+        now = time.time()
+        with self._lock:
+            idle = [
+                model_size
+                for model_size, entry in self._entries.items()
+                if now - entry["last_used"] > self.idle_ttl
+            ]
+        for model_size in idle:
+            self.unload(model_size)
+
+    def _janitor_loop(self):
+        interval = min(self.idle_ttl / 2, 60.0)
+        while True:
+            time.sleep(interval)
+            self._unload_idle()
+
+    def _release_memory(self):
+        gc.collect()
+        if self.device == "cuda":
+            import torch
+
+            torch.cuda.empty_cache()
@@ -0,0 +1,375 @@
+"""
+Seitenweiser PDF-Export für lange Transkripte
+
+Statt eine Platypus-Story aus Flowables aufzubauen, wird jede Seite direkt
+als PDF-Inhaltsstrom gezeichnet (Standardschriften Helvetica, Umbruch mit
+zwischengespeicherten Wortbreiten aus den reportlab-Metriken) und sofort
+komprimiert in die Datei geschrieben. Im Speicher liegen nur die aktuelle
+Seite und die Objekt-Offsets für die Querverweistabelle - unabhängig davon,
+wie viele Segmente das Transkript hat.
+"""
+
+import zlib
+from array import array
+from datetime import datetime
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, NamedTuple
+
+# Obergrenze der Wortbreiten-Caches pro Schrift (wird danach geleert)
+MAX_CACHED_WIDTHS = 20000
+
+CM = 72 / 2.54
+A4 = (595.2756, 841.8898)
+
+# Objektnummern der festen Objekte; Seiten folgen ab FIRST_PAGE_OBJECT
+CATALOG_OBJECT = 1
+PAGES_OBJECT = 2
+INFO_OBJECT = 3
+FONT_OBJECTS = {"Helvetica": 4, "Helvetica-Bold": 5}
+FIRST_PAGE_OBJECT = 6
+
+
+class TextStyle(NamedTuple):
+    """Schrift und Abstände eines Absatztyps (entspricht den Platypus-Styles)"""
+    font: str
+    size: float
+    leading: float
+    color: str
+    space_before: float = 0.0
+    space_after: float = 0.0
+
+
+# Gleiche Optik wie ExportManager._setup_styles
+TITLE = TextStyle("Helvetica-Bold", 24, 28, "#2c3e50", space_after=30)
+SPEAKER = TextStyle("Helvetica-Bold", 12, 18, "#3498db", space_before=12, space_after=6)
+TEXT = TextStyle("Helvetica", 11, 16, "#34495e")
+TIMESTAMP = TextStyle("Helvetica", 9, 12, "#95a5a6", space_after=4)
+
+
+def _pdf_string(text: str) -> bytes:
+    """Kodiert Text als PDF-String (WinAnsi, nicht darstellbare Zeichen als '?')"""
+    data = text.encode("cp1252", errors="replace")
+    return b"(" + data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def _color_operator(hex_color: str) -> bytes:
+    """'#rrggbb' -> Füllfarben-Operator"""
+    value = hex_color.lstrip("#")
+    r, g, b = (int(value[i:i + 2], 16) / 255 for i in (0, 2, 4))
+    return f"{r:.3f} {g:.3f} {b:.3f} rg".encode("ascii")
+
+
+class StreamingPdfWriter:
+    """
+    Schreibt ein Transkript Seite für Seite in eine PDF-Datei
+
+    Verwendung:
+        writer = StreamingPdfWriter("transkript.pdf", "Titel")
+        writer.write_header("Erstellt am: ...")
+        writer.write_segments(segmente, format_time)
+        writer.close()
+    """
+
+    def __init__(
+        self,
+        output_path: str,
+        title: str,
+        margin: float = 2 * CM
+    ):
+        """
+        Args:
+            output_path: Ausgabepfad für die PDF-Datei
+            title: Titel des Dokuments (auch in den PDF-Metadaten)
+            margin: Seitenränder in Punkten
+        """
+        # Nur die Schriftmetriken, kein Canvas
+        from reportlab.pdfbase.pdfmetrics import stringWidth
+
+        self.title = title
+        self.page_width, self.page_height = A4
+        self.margin = margin
+        self.frame_width = self.page_width - 2 * margin
+        self.pages = 0
+
+        self._string_width = stringWidth
+        self._widths: Dict[tuple, Dict[str, float]] = {}
+        self._colors: Dict[str, bytes] = {}
+
+        self._file: BinaryIO = open(output_path, "wb")
+        # Datei-Offsets pro Objektnummer (kompakt, 8 Bytes pro Objekt)
+        self._offsets = array("Q", [0]) * FIRST_PAGE_OBJECT
+        self._next_object = FIRST_PAGE_OBJECT
+
+        self._file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        for font, number in FONT_OBJECTS.items():
+            self._write_object(
+                number,
+                f"<< /Type /Font /Subtype /Type1 /BaseFont /{font} "
+                f"/Encoding /WinAnsiEncoding >>".encode("ascii")
+            )
+
+        self._content: List[bytes] = []
+        self._y = self.page_height - margin
+        self._at_top = True
+
+    def write_header(self, date_line: str):
+        """
+        Schreibt Titel und Erstellungsdatum
+
+        Args:
+            date_line: Zeile unter dem Titel (z.B. 'Erstellt am: ...')
+        """
+        self.paragraph(self.title, TITLE, centered=True)
+        self.space(0.5 * CM)
+        self.paragraph(date_line, TIMESTAMP)
+        self.space(1 * CM)
+
+    def write_segments(
+        self,
+        segments: Iterable[Dict[str, Any]],
+        format_time: Callable[[float], str]
+    ):
+        """
+        Schreibt Segmente mit Zeitstempel, Sprecher und Text
+
+        Args:
+            segments: Segmente (Liste oder Generator)
+            format_time: Funktion Sekunden -> Zeitstring
+        """
+        for segment in segments:
+            self.write_segment(segment, format_time)
+
+    def write_segment(
+        self,
+        segment: Dict[str, Any],
+        format_time: Callable[[float], str]
+    ):
+        """
+        Schreibt ein Segment mit Zeitstempel, Sprecher und Text
+
+        Args:
+            segment: Segment mit 'start', 'end', 'speaker', 'text'
+            format_time: Funktion Sekunden -> Zeitstring
+        """
+        timestamp = (
+            f"[{format_time(segment.get('start', 0))} - "
+            f"{format_time(segment.get('end', 0))}]"
+        )
+        text_lines = self.wrap(segment.get("text", "").strip(), TEXT)
+
+        # Zeitstempel und Sprecher nicht vom Text trennen
+        self._keep_space(
+            TIMESTAMP.leading + TIMESTAMP.space_after
+            + SPEAKER.space_before + SPEAKER.leading + SPEAKER.space_after
+            + (TEXT.leading if text_lines else 0)
+        )
+
+        # Zeitstempel sind kurz und einmalig: ohne Umbruch und Breiten-Cache
+        self._draw_lines([timestamp], TIMESTAMP)
+        self.paragraph(f"{segment.get('speaker', 'Unbekannt')}:", SPEAKER)
+        self._draw_lines(text_lines, TEXT)
+        self.space(0.4 * CM)
+
+    def write_text(self, text: str):
+        """
+        Schreibt einfachen Text, Absätze getrennt durch Leerzeilen
+
+        Args:
+            text: Text-String
+        """
+        for para in text.split("\n\n"):
+            if para.strip():
+                self.paragraph(para.strip(), TEXT)
+                self.space(0.3 * CM)
+
+    def paragraph(self, text: str, style: TextStyle, centered: bool = False):
+        """Schreibt einen Absatz mit Umbruch und Seitenwechsel"""
+        self._draw_lines(self.wrap(text, style), style, centered)
+
+    def space(self, height: float):
+        """Vertikaler Abstand (entfällt am Seitenanfang)"""
+        if not self._at_top:
+            # Reicht der Platz nicht, wechselt die nächste Zeile die Seite
+            self._y -= height
+
+    def wrap(self, text: str, style: TextStyle) -> List[str]:
+        """
+        Bricht Text in Zeilen der Rahmenbreite um
+
+        Args:
+            text: Absatztext (Zeilenumbrüche gelten als Leerzeichen)
+            style: Schrift des Absatzes
+
+        Returns:
+            Liste der Zeilen
+        """
+        widths = self._word_widths(style)
+        space_width = self._width(" ", style, widths)
+
+        lines = []
+        line: List[str] = []
+        line_width = 0.0
+        for word in text.split():
+            word_width = self._width(word, style, widths)
+            if line and line_width + space_width + word_width > self.frame_width:
+                lines.append(" ".join(line))
+                line, line_width = [], 0.0
+
+            if word_width > self.frame_width:
+                # Überlanges Wort (z.B. URL) zeichenweise umbrechen
+                pieces = self._split_word(word, style)
+                lines.extend(pieces[:-1])
+                word = pieces[-1]
+                word_width = self._width(word, style, widths)
+
+            line_width += (space_width if line else 0.0) + word_width
+            line.append(word)
+
+        if line:
+            lines.append(" ".join(line))
+        return lines
+
+    def close(self):
+        """Schreibt die letzte Seite, Seitenbaum und Querverweistabelle"""
+        try:
+            if self._content or not self.pages:
+                self._flush_page()
+
+            # Seitenobjekte liegen jeweils hinter ihrem Inhaltsstrom
+            kids = " ".join(
+                f"{number} 0 R"
+                for number in range(FIRST_PAGE_OBJECT + 1, self._next_object, 2)
+            )
+            self._write_object(
+                PAGES_OBJECT,
+                f"<< /Type /Pages /Count {self.pages} /Kids [{kids}] >>".encode("ascii")
+            )
+            self._write_object(
+                CATALOG_OBJECT,
+                f"<< /Type /Catalog /Pages {PAGES_OBJECT} 0 R >>".encode("ascii")
+            )
+            created = datetime.now().strftime("D:%Y%m%d%H%M%S")
+            self._write_object(
+                INFO_OBJECT,
+                b"<< /Title " + _pdf_string(self.title)
+                + f" /CreationDate ({created}) >>".encode("ascii")
+            )
+
+            xref_offset = self._file.tell()
+            size = self._next_object
+            self._file.write(f"xref\n0 {size}\n0000000000 65535 f \n".encode("ascii"))
+            for number in range(1, size):
+                self._file.write(f"{self._offsets[number]:010d} 00000 n \n".encode("ascii"))
+            self._file.write(
+                f"trailer\n<< /Size {size} /Root {CATALOG_OBJECT} 0 R "
+                f"/Info {INFO_OBJECT} 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode("ascii")
+            )
+        finally:
+            self._file.close()
+
+    def _draw_lines(self, lines: List[str], style: TextStyle, centered: bool = False):
+        """Zeichnet Zeilen als Textobjekt, bei Bedarf über Seitengrenzen"""
+        if not lines:
+            return
+        self.space(style.space_before)
+
+        font = f"/F{FONT_OBJECTS[style.font]} {style.size:g} Tf".encode("ascii")
+        color = self._color(style.color)
+        # Grundlinie so, dass die Unterlänge in die Zeilenhöhe passt
+        descent = (style.leading - style.size) / 2 + 0.2 * style.size
+
+        started = False
+        for line in lines:
+            if self._y - style.leading < self.margin:
+                if started:
+                    self._content.append(b"ET")
+                    started = False
+                self._new_page()
+
+            self._y -= style.leading
+            if centered:
+                x = (self.page_width - self._string_width(line, style.font, style.size)) / 2
+            else:
+                x = self.margin
+
+            if not started:
+                # Schrift und Farbe einmal pro Absatz und Seite
+                self._content += [b"BT", font, color]
+                started = True
+            self._content.append(
+                f"1 0 0 1 {x:.2f} {self._y + descent:.2f} Tm ".encode("ascii")
+                + _pdf_string(line) + b" Tj"
+            )
+            self._at_top = False
+
+        self._content.append(b"ET")
+        self.space(style.space_after)
+
+    def _keep_space(self, height: float):
+        """Beginnt eine neue Seite, falls weniger als height Platz ist"""
+        if not self._at_top and self._y - height < self.margin:
+            self._new_page()
+
+    def _new_page(self):
+        self._flush_page()
+        self._y = self.page_height - self.margin
+        self._at_top = True
+
+    def _flush_page(self):
+        """Komprimiert die aktuelle Seite und schreibt sie in die Datei"""
+        content_object = self._next_object
+        page_object = content_object + 1
+        self._next_object += 2
+
+        stream = zlib.compress(b"\n".join(self._content), 6)
+        self._content = []
+        self._write_object(
+            content_object,
+            f"<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n".encode("ascii")
+            + stream + b"\nendstream"
+        )
+
+        fonts = " ".join(f"/F{number} {number} 0 R" for number in FONT_OBJECTS.values())
+        self._write_object(
+            page_object,
+            f"<< /Type /Page /Parent {PAGES_OBJECT} 0 R "
+            f"/MediaBox [0 0 {self.page_width:.4f} {self.page_height:.4f}] "
+            f"/Resources << /Font << {fonts} >> >> "
+            f"/Contents {content_object} 0 R >>".encode("ascii")
+        )
+        self.pages += 1
+
+    def _write_object(self, number: int, body: bytes):
+        if number >= len(self._offsets):
+            self._offsets.extend(array("Q", [0]) * (number + 1 - len(self._offsets)))
+        self._offsets[number] = self._file.tell()
+        self._file.write(f"{number} 0 obj\n".encode("ascii") + body + b"\nendobj\n")
+
+    def _color(self, hex_color: str) -> bytes:
+        operator = self._colors.get(hex_color)
+        if operator is None:
+            operator = self._colors[hex_color] = _color_operator(hex_color)
+        return operator
+
+    def _word_widths(self, style: TextStyle) -> Dict[str, float]:
+        key = (style.font, style.size)
+        widths = self._widths.get(key)
+        if widths is None or len(widths) > MAX_CACHED_WIDTHS:
+            widths = self._widths[key] = {}
+        return widths
+
+    def _width(self, word: str, style: TextStyle, widths: Dict[str, float]) -> float:
+        width = widths.get(word)
+        if width is None:
+            width = widths[word] = self._string_width(word, style.font, style.size)
+        return width
+
+    def _split_word(self, word: str, style: TextStyle) -> List[str]:
+        pieces = []
+        current = ""
+        for char in word:
+            if current and self._string_width(current + char, style.font, style.size) > self.frame_width:
+                pieces.append(current)
+                current = ""
+            current += char
+        pieces.append(current)
+        return pieces
@@ -0,0 +1,934 @@
+"""
+Verarbeitungs-Pipeline: Dekodierung, Transkription, Sprechertrennung
+"""
+
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from difflib import SequenceMatcher
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+try:
+    from .audio import get_duration, load_audio
+    from .cache import ResultCache
+    from .metrics import record_audio, run_in_context
+    from .transcriber import WhisperTranscriber
+    from .diarization import DiarizationState, SpeakerDiarizer, SpeakerIndex
+except ImportError:
+    from audio import get_duration, load_audio
+    from cache import ResultCache
+    from metrics import record_audio, run_in_context
+    from transcriber import WhisperTranscriber
+    from diarization import DiarizationState, SpeakerDiarizer, SpeakerIndex
+
+
+def _env_int(name: str) -> Optional[int]:
+    """Liest eine optionale Ganzzahl aus der Umgebung"""
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+def _run_with_threads(num_threads: Optional[int], fn: Callable, *args, **kwargs):
+    """
+    Führt eine Funktion mit begrenzter Anzahl Torch-Threads aus
+
+    Mit OpenMP (Standard der Linux-Builds) gilt die Intra-Op-Threadzahl für
+    den aufrufenden Thread, so dass Whisper und pyannote sich die CPU-Kerne
+    aufteilen. Mit dem nativen Thread-Pool von Torch ist sie prozessweit;
+    dann gilt für beide Stufen der zuletzt gesetzte Wert. Danach wird der
+    vorherige Wert wiederhergestellt.
+    """
+    if not num_threads:
+        return fn(*args, **kwargs)
+
+    import torch
+
+    previous = torch.get_num_threads()
+    torch.set_num_threads(num_threads)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        torch.set_num_threads(previous)
+
+
+def _iterate_in_thread(
+    executor: Optional[ThreadPoolExecutor],
+    num_threads: Optional[int],
+    fn: Callable,
+    *args,
+    **kwargs
+) -> Iterator:
+    """
+    Führt einen Generator in einem Worker-Thread aus und liefert seine
+    Elemente
+
+    Der Worker startet sofort und läuft dem Verbraucher voraus; Fehler werden
+    beim Verbraucher erneut ausgelöst. Bricht der Verbraucher ab, endet der
+    Worker nach dem aktuellen Element.
+
+    Args:
+        executor: Executor für den Worker-Thread (None: direkt im
+            aufrufenden Thread, ohne Threadlimit)
+        num_threads: Torch-Threads des Workers (siehe _run_with_threads)
+        fn: Generator-Funktion
+        *args, **kwargs: Argumente für fn
+    """
+    if executor is None:
+        return fn(*args, **kwargs)
+
+    items = queue.Queue()
+    finished = object()
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in fn(*args, **kwargs):
+                if stop.is_set():
+                    return
+                items.put((item, None))
+        except Exception as e:
+            items.put((None, e))
+            return
+        items.put((finished, None))
+
+    def consume():
+        try:
+            while True:
+                item, error = items.get()
+                if error is not None:
+                    raise error
+                if item is finished:
+                    return
+                yield item
+        finally:
+            stop.set()
+
+    executor.submit(run_in_context(_run_with_threads, num_threads, produce))
+    return consume()
+
+
+def _segment_text(segment: Dict[str, Any]) -> str:
+    return " ".join(segment["text"].split())
+
+
+def _first_segment_from(segments: List[Dict[str, Any]], seconds: float, lo: int = 0) -> int:
+    """Index des ersten Segments ab 'lo', dessen Mitte nicht vor 'seconds' liegt"""
+    hi = len(segments)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if (segments[mid]["start"] + segments[mid]["end"]) / 2 < seconds:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+# Änderung einer Segmentliste: an Position 'index' werden 'removed'
+# Segmente durch die neuen ersetzt
+SegmentPatch = Tuple[int, int, List[Dict[str, Any]]]
+
+
+def replace_window_segments(
+    segments: List[Dict[str, Any]],
+    refined: List[Dict[str, Any]],
+    start: float,
+    end: float,
+    tolerance: float = 0.5
+) -> List[SegmentPatch]:
+    """
+    Ersetzt die Segmente eines Zeitfensters durch verfeinerte Segmente
+
+    Betroffen sind alle Segmente, deren Mitte im Fenster liegt. Segmente mit
+    gleichem Text und höchstens 'tolerance' Sekunden Abweichung bei Start und
+    Ende bleiben als dasselbe Objekt erhalten; nur geänderte, neue und
+    entfallene Segmente werden ausgetauscht. Die Liste wird direkt geändert.
+
+    Args:
+        segments: Nach Zeit sortierte Segmente des bisherigen Ergebnisses
+        refined: Segmente des Fensters aus dem genaueren Modell
+        start: Beginn des Fensters in Sekunden
+        end: Ende des Fensters in Sekunden (inf für den Rest)
+        tolerance: Erlaubte Zeitabweichung unveränderter Segmente
+
+    Returns:
+        Änderungen (index, entfernt, neue Segmente) in aufsteigender
+        Reihenfolge; nacheinander auf eine Kopie der alten Liste angewandt,
+        ergeben sie die neue Liste (leer wenn nichts geändert wurde)
+    """
+    first = _first_segment_from(segments, start)
+    last = _first_segment_from(segments, end, first)
+
+    old = segments[first:last]
+    matcher = SequenceMatcher(
+        None,
+        [_segment_text(segment) for segment in old],
+        [_segment_text(segment) for segment in refined],
+        autojunk=False
+    )
+
+    merged = []
+    patches = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != "equal":
+            patches.append((first + len(merged), i2 - i1, refined[j1:j2]))
+            merged.extend(refined[j1:j2])
+            continue
+        for old_segment, new_segment in zip(old[i1:i2], refined[j1:j2]):
+            if (abs(old_segment["start"] - new_segment["start"]) <= tolerance
+                    and abs(old_segment["end"] - new_segment["end"]) <= tolerance):
+                merged.append(old_segment)
+            else:
+                patches.append((first + len(merged), 1, [new_segment]))
+                merged.append(new_segment)
+
+    segments[first:last] = merged
+    return patches
+
+
+def apply_patches(items: List, patches: List[SegmentPatch]):
+    """
+    Wendet Änderungen aus replace_window_segments auf eine parallele Liste an
+
+    Args:
+        items: Liste, die zu den alten Segmenten passt (wird direkt geändert)
+        patches: Änderungen (index, entfernt, neue Einträge)
+    """
+    for index, removed, new_items in patches:
+        items[index:index + removed] = new_items
+
+
+class TranscriptionPipeline:
+    """Führt Transkription und Sprechertrennung für eine Audiodatei aus"""
+
+    def __init__(
+        self,
+        transcriber: WhisperTranscriber,
+        diarizer: SpeakerDiarizer,
+        parallel: Optional[bool] = None,
+        whisper_threads: Optional[int] = None,
+        diarization_threads: Optional[int] = None,
+        cache: Optional[ResultCache] = None
+    ):
+        """
+        Args:
+            transcriber: Whisper Transkriptor
+            diarizer: Sprechertrennung
+            parallel: Sprechertrennung parallel zur Transkription ausführen
+                (Standard: TRANSCRIBER_PARALLEL_DIARIZATION, sonst an)
+            whisper_threads: Torch-Threads für Whisper im Parallelmodus
+                (Standard: TRANSCRIBER_WHISPER_THREADS, sonst Hälfte der
+                Torch-Threads, beim ersten Parallellauf ermittelt)
+            diarization_threads: Torch-Threads für pyannote im Parallelmodus
+                (Standard: TRANSCRIBER_DIARIZATION_THREADS, sonst Rest)
+            cache: Optionaler Ergebnis-Cache (siehe cache.default_cache)
+        """
+        self.transcriber = transcriber
+        self.diarizer = diarizer
+        self.cache = cache
+
+        if parallel is None:
+            parallel = os.getenv("TRANSCRIBER_PARALLEL_DIARIZATION", "1") != "0"
+        self.parallel = parallel
+
+        if whisper_threads is None:
+            whisper_threads = _env_int("TRANSCRIBER_WHISPER_THREADS")
+        if diarization_threads is None:
+            diarization_threads = _env_int("TRANSCRIBER_DIARIZATION_THREADS")
+
+        self.whisper_threads = whisper_threads
+        self.diarization_threads = diarization_threads
+
+    def run(
+        self,
+        audio_file: str,
+        model_size: str = "base",
+        language: Optional[str] = None,
+        enable_diarization: bool = False,
+        num_speakers: Optional[int] = None,
+        progress: Optional[Callable] = None,
+        min_speakers: Optional[int] = None,
+        max_speakers: Optional[int] = None
+    ) -> Tuple[Optional[Union[str, Dict[str, Any]]], Optional[Dict[str, Any]]]:
+        """
+        Verarbeitet eine Audiodatei
+
+        Args:
+            audio_file: Pfad zur Audiodatei
+            model_size: Größe des Whisper-Modells
+            language: Sprache (None/'auto' für auto-detect)
+            enable_diarization: Sprechertrennung durchführen
+            num_speakers: Erwartete Anzahl Sprecher (optional)
+            progress: Optionaler Fortschritts-Callback (wert, desc=...)
+            min_speakers: Mindestanzahl Sprecher (optional)
+            max_speakers: Höchstanzahl Sprecher (optional)
+
+        Returns:
+            Tuple (Endergebnis, Whisper-Ergebnis). Das Endergebnis ist bei
+            Sprechertrennung ein Dictionary, sonst der reine Text. Bei einem
+            Transkriptionsfehler ist das Whisper-Ergebnis None.
+        """
+        progress = progress or (lambda *args, **kwargs: None)
+
+        progress(0.1, desc="Lade Audio...")
+
+        # Bereits berechnete Ergebnisse aus dem Cache verwenden
+        speakers = {
+            "num_speakers": num_speakers,
+            "min_speakers": min_speakers,
+            "max_speakers": max_speakers
+        }
+        cache_keys = self._cache_keys(audio_file, model_size, language, speakers)
+        transcription_result, speaker_turns = self._load_cached(
+            cache_keys, enable_diarization, speakers
+        )
+
+        need_transcription = transcription_result is None
+        need_diarization = enable_diarization and speaker_turns is None
+
+        if need_transcription or need_diarization:
+            # Dekodiere einmal, Whisper und pyannote teilen sich den Puffer
+            audio = load_audio(audio_file)
+            record_audio(get_duration(audio))
+
+            if need_transcription and need_diarization and self.parallel:
+                transcription_result, speaker_turns = self._run_parallel(
+                    audio, model_size, language, speakers, cache_keys, progress
+                )
+            else:
+                if need_transcription:
+                    # Transkription mit Whisper
+                    progress(0.2, desc="Transkribiere Audio...")
+                    transcription_result = self.transcriber.transcribe(
+                        audio,
+                        model_size=model_size,
+                        language=language
+                    )
+
+                if need_diarization and transcription_result:
+                    progress(0.6, desc="Führe Sprechertrennung durch...")
+                    speaker_turns = self._diarize(audio, speakers, cache_keys)
+
+            self._store_cached(
+                cache_keys,
+                transcription_result if need_transcription else None,
+                speaker_turns if need_diarization else None
+            )
+
+        if not transcription_result:
+            return None, None
+
+        if enable_diarization and speaker_turns is not None:
+            progress(0.9, desc="Führe Ergebnisse zusammen...")
+        final_result = self._finalize(
+            transcription_result, enable_diarization, speaker_turns
+        )
+
+        progress(1.0, desc="Fertig!")
+        return final_result, transcription_result
+
+    def stream(
+        self,
+        audio_file: str,
+        model_size: str = "base",
+        language: Optional[str] = None,
+        enable_diarization: bool = False,
+        num_speakers: Optional[int] = None,
+        min_speakers: Optional[int] = None,
+        max_speakers: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Verarbeitet eine Audiodatei und liefert Zwischenergebnisse
+
+        Whisper transkribiert abschnittsweise (siehe
+        WhisperTranscriber.transcribe_stream), die Sprechertrennung läuft
+        im Hintergrund. Sobald sie fertig ist, werden die Sprecher auch in
+        die bereits gelieferten Segmente eingetragen.
+
+        Args:
+            audio_file: Pfad zur Audiodatei
+            model_size: Größe des Whisper-Modells
+            language: Sprache (None/'auto' für auto-detect)
+            enable_diarization: Sprechertrennung durchführen
+            num_speakers: Erwartete Anzahl Sprecher (optional)
+            min_speakers: Mindestanzahl Sprecher (optional)
+            max_speakers: Höchstanzahl Sprecher (optional)
+
+        Yields:
+            Dictionary mit 'progress' (0..1, nach verarbeiteter Audiodauer),
+            'desc' und 'preview' (bisheriges Ergebnis im Format des
+            Endergebnisses). Die letzte Meldung enthält zusätzlich 'done',
+            'final' und 'transcription' (None bei einem Fehler).
+        """
+        yield {"progress": 0.0, "desc": "Lade Audio...", "preview": ""}
+
+        speakers = {
+            "num_speakers": num_speakers,
+            "min_speakers": min_speakers,
+            "max_speakers": max_speakers
+        }
+        cache_keys = self._cache_keys(
+            audio_file, model_size, language, speakers, decode="stream"
+        )
+        transcription_result, speaker_turns = self._load_cached(
+            cache_keys, enable_diarization, speakers
+        )
+        need_transcription = transcription_result is None
+        need_diarization = enable_diarization and speaker_turns is None
+
+        executor = None
+        diarization_future = None
+        whisper_threads = None
+        try:
+            if need_transcription or need_diarization:
+                audio = load_audio(audio_file)
+                record_audio(get_duration(audio))
+
+            if need_diarization and self.parallel:
+                # Whisper läuft dann ebenfalls im Executor, mit seinem Anteil
+                # der Threads
+                whisper_threads, diarization_threads = self._thread_split()
+                executor = ThreadPoolExecutor(max_workers=2)
+                diarization_future = executor.submit(run_in_context(
+                    _run_with_threads,
+                    diarization_threads,
+                    self._diarize,
+                    audio,
+                    speakers,
+                    cache_keys
+                ))
+
+            if need_transcription:
+                segments = []
+                detected_language = language
+                for update in _iterate_in_thread(
+                    executor,
+                    whisper_threads,
+                    self.transcriber.transcribe_stream,
+                    audio,
+                    model_size=model_size,
+                    language=language
+                ):
+                    segments.extend(update["segments"])
+                    detected_language = update["language"]
+
+                    if diarization_future is not None and diarization_future.done():
+                        speaker_turns = diarization_future.result()
+
+                    position = update["position"]
+                    duration = update["duration"]
+                    yield {
+                        "progress": position / duration if duration else 1.0,
+                        "desc": f"Transkribiert: {position:.0f}s von {duration:.0f}s",
+                        "preview": self._finalize(
+                            {"text": "", "segments": segments},
+                            enable_diarization,
+                            speaker_turns,
+                            verbose=False
+                        )
+                    }
+
+                for i, segment in enumerate(segments):
+                    segment["id"] = i
+                transcription_result = {
+                    "text": "".join(segment["text"] for segment in segments),
+                    "segments": segments,
+                    "language": detected_language
+                }
+
+            if need_diarization:
+                yield {
+                    "progress": 1.0,
+                    "desc": "Warte auf Sprechertrennung...",
+                    "preview": self._finalize(
+                        transcription_result,
+                        enable_diarization,
+                        speaker_turns,
+                        verbose=False
+                    )
+                }
+                if diarization_future is not None:
+                    speaker_turns = diarization_future.result()
+                else:
+                    speaker_turns = self._diarize(audio, speakers, cache_keys)
+
+        except Exception as e:
+            print(f"Fehler bei der Verarbeitung: {str(e)}")
+            yield {
+                "progress": 1.0,
+                "desc": "Fehler",
+                "preview": "",
+                "done": True,
+                "final": None,
+                "transcription": None
+            }
+            return
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+        self._store_cached(
+            cache_keys,
+            transcription_result if need_transcription else None,
+            speaker_turns if need_diarization else None
+        )
+
+        final_result = self._finalize(
+            transcription_result, enable_diarization, speaker_turns
+        )
+        yield {
+            "progress": 1.0,
+            "desc": "Fertig!",
+            "preview": final_result,
+            "done": True,
+            "final": final_result,
+            "transcription": transcription_result
+        }
+
+    def two_pass(
+        self,
+        audio_file: str,
+        model_size: str = "medium",
+        preview_model: str = "base",
+        language: Optional[str] = None,
+        enable_diarization: bool = False,
+        num_speakers: Optional[int] = None,
+        min_speakers: Optional[int] = None,
+        max_speakers: Optional[int] = None,
+        window_seconds: Optional[float] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Liefert zuerst eine schnelle Vorschau und verfeinert sie danach
+
+        Der erste Durchgang transkribiert die ganze Aufnahme mit dem kleinen
+        Vorschau-Modell. Noch bevor die Vorschau geliefert wird, startet im
+        Hintergrund der zweite Durchgang: Das gewählte Modell transkribiert
+        Fenster für Fenster (siehe WhisperTranscriber.transcribe_stream) mit
+        der bereits erkannten Sprache. Pro Fenster werden nur die geänderten
+        Segmente gemeldet (siehe replace_window_segments); die Vorschau wird
+        daher nie komplett neu aufgebaut. Die Sprechertrennung läuft wie bei
+        stream() im Hintergrund, das Zusammenführen nur einmal am Ende.
+
+        Args:
+            audio_file: Pfad zur Audiodatei
+            model_size: Größe des Whisper-Modells für das Endergebnis
+            preview_model: Kleines Whisper-Modell für die Vorschau
+            language: Sprache (None/'auto' für auto-detect)
+            enable_diarization: Sprechertrennung durchführen
+            num_speakers: Erwartete Anzahl Sprecher (optional)
+            min_speakers: Mindestanzahl Sprecher (optional)
+            max_speakers: Höchstanzahl Sprecher (optional)
+            window_seconds: Fensterlänge der Verfeinerung (Standard:
+                TRANSCRIBER_STREAM_CHUNK_SECONDS, sonst 30)
+
+        Yields:
+            Dictionary mit 'progress', 'desc', 'stage' ('preview', 'refine'
+            oder 'done'), 'changed' (Anzahl geänderter Segmente) und
+            'patches': Änderungen (index, entfernt, neue Segmente) der
+            Vorschau-Segmente ('start', 'end', 'text' und, sobald die
+            Sprechertrennung vorliegt, 'speaker'), siehe apply_patches. Die
+            letzte Meldung enthält stattdessen 'done', 'final' und
+            'transcription' (None bei einem Fehler).
+        """
+        yield {
+            "progress": 0.0,
+            "desc": "Lade Audio...",
+            "stage": "preview",
+            "changed": 0,
+            "patches": []
+        }
+
+        speakers = {
+            "num_speakers": num_speakers,
+            "min_speakers": min_speakers,
+            "max_speakers": max_speakers
+        }
+        cache_keys = self._cache_keys(
+            audio_file, model_size, language, speakers, decode="two_pass"
+        )
+        transcription_result, speaker_turns = self._load_cached(
+            cache_keys, enable_diarization, speakers
+        )
+        need_transcription = transcription_result is None
+        need_diarization = enable_diarization and speaker_turns is None
+
+        executor = None
+        diarization_future = None
+        whisper_threads = None
+        try:
+            if need_transcription or need_diarization:
+                audio = load_audio(audio_file)
+                record_audio(get_duration(audio))
+                executor = ThreadPoolExecutor(max_workers=2)
+
+            if need_diarization and self.parallel:
+                whisper_threads, diarization_threads = self._thread_split()
+                diarization_future = executor.submit(run_in_context(
+                    _run_with_threads,
+                    diarization_threads,
+                    self._diarize,
+                    audio,
+                    speakers,
+                    cache_keys
+                ))
+
+            if need_transcription:
+                # Erster Durchgang: ganze Aufnahme mit dem Vorschau-Modell
+                preview_keys = self._cache_keys(audio_file, preview_model, language, speakers)
+                current, _ = self._load_cached(preview_keys, False, speakers)
+                if current is None:
+                    current = _run_with_threads(
+                        whisper_threads,
+                        self.transcriber.transcribe,
+                        audio,
+                        model_size=preview_model,
+                        language=language
+                    )
+                    if not current:
+                        raise RuntimeError("Vorschau-Transkription fehlgeschlagen")
+                    self._store_cached(preview_keys, current, None)
+                segments = current["segments"]
+                detected_language = current.get("language") or language
+
+                # Zweiter Durchgang startet sofort im Hintergrund, die
+                # Spracherkennung entfällt
+                refinement = _iterate_in_thread(
+                    executor,
+                    whisper_threads,
+                    self.transcriber.transcribe_stream,
+                    audio,
+                    model_size=model_size,
+                    language=detected_language,
+                    chunk_seconds=window_seconds
+                )
+
+                speaker_index = None
+                if enable_diarization and speaker_turns is not None:
+                    speaker_index = SpeakerIndex(speaker_turns)
+                yield {
+                    "progress": 0.2,
+                    "desc": f"Vorschau fertig, verfeinere mit '{model_size}'...",
+                    "stage": "preview",
+                    "changed": len(segments),
+                    "patches": [(0, 0, self._preview_segments(
+                        segments, enable_diarization, speaker_index
+                    ))]
+                }
+
+                window_start = 0.0
+                for update in refinement:
+                    position = update["position"]
+                    duration = update["duration"]
+                    window_end = position if position < duration else float("inf")
+                    shown = len(segments)
+                    patches = replace_window_segments(
+                        segments, update["segments"], window_start, window_end
+                    )
+                    window_start = position
+                    changed = sum(max(removed, len(new)) for _, removed, new in patches)
+
+                    relabel = False
+                    if (speaker_index is None and diarization_future is not None
+                            and diarization_future.done()):
+                        speaker_turns = diarization_future.result()
+                        if speaker_turns is not None:
+                            speaker_index = SpeakerIndex(speaker_turns)
+                            relabel = True
+
+                    if relabel:
+                        # Sprecher einmalig in alle bisherigen Segmente eintragen
+                        preview_patches = [(0, shown, self._preview_segments(
+                            segments, enable_diarization, speaker_index
+                        ))]
+                    else:
+                        preview_patches = [
+                            (index, removed, self._preview_segments(
+                                new, enable_diarization, speaker_index
+                            ))
+                            for index, removed, new in patches
+                        ]
+
+                    yield {
+                        "progress": 0.2 + 0.8 * (position / duration if duration else 1.0),
+                        "desc": (
+                            f"Verfeinert: {position:.0f}s von {duration:.0f}s "
+                            f"({changed} Segmente geändert)"
+                        ),
+                        "stage": "refine",
+                        "changed": changed,
+                        "patches": preview_patches
+                    }
+
+                for i, segment in enumerate(segments):
+                    segment["id"] = i
+                transcription_result = {
+                    "text": "".join(segment["text"] for segment in segments),
+                    "segments": segments,
+                    "language": detected_language
+                }
+
+            if need_diarization:
+                if diarization_future is not None:
+                    speaker_turns = diarization_future.result()
+                else:
+                    speaker_turns = self._diarize(audio, speakers, cache_keys)
+
+        except Exception as e:
+            print(f"Fehler bei der Verarbeitung: {str(e)}")
+            yield {
+                "progress": 1.0,
+                "desc": "Fehler",
+                "stage": "done",
+                "changed": 0,
+                "patches": [],
+                "done": True,
+                "final": None,
+                "transcription": None
+            }
+            return
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+        self._store_cached(
+            cache_keys,
+            transcription_result if need_transcription else None,
+            speaker_turns if need_diarization else None
+        )
+
+        final_result = self._finalize(
+            transcription_result, enable_diarization, speaker_turns
+        )
+        yield {
+            "progress": 1.0,
+            "desc": "Fertig!",
+            "stage": "done",
+            "changed": 0,
+            "patches": [],
+            "done": True,
+            "final": final_result,
+            "transcription": transcription_result
+        }
+
+    @staticmethod
+    def _preview_segments(
+        segments: List[Dict[str, Any]],
+        enable_diarization: bool,
+        speaker_index: Optional[SpeakerIndex]
+    ) -> List[Dict[str, Any]]:
+        """Segmente im Vorschauformat, mit Sprecher sobald die Turns vorliegen"""
+        preview = [
+            {"start": segment["start"], "end": segment["end"], "text": segment["text"]}
+            for segment in segments
+        ]
+        if not enable_diarization:
+            return preview
+
+        labels = [None] * len(segments)
+        if speaker_index is not None:
+            labels = speaker_index.lookup(
+                [segment["start"] for segment in segments],
+                [segment["end"] for segment in segments]
+            )
+        for segment, label in zip(preview, labels):
+            segment["text"] = segment["text"].strip()
+            if speaker_index is not None:
+                segment["speaker"] = label or "Unbekannt"
+        return preview
+
+    def _finalize(
+        self,
+        transcription_result: Dict[str, Any],
+        enable_diarization: bool,
+        speaker_turns: Optional[List[Dict]],
+        verbose: bool = True
+    ) -> Union[str, Dict[str, Any]]:
+        """
+        Erstellt das Endergebnis aus Transkription und Sprecher-Turns
+
+        Returns:
+            Reiner Text ohne Sprechertrennung, sonst Dictionary mit
+            Sprecher-Segmenten (ohne Turns: die Transkription selbst)
+        """
+        if not enable_diarization:
+            return transcription_result["text"]
+        if speaker_turns is None:
+            # Fallback: Transkription ohne Sprechertrennung
+            return transcription_result
+        return self.diarizer.merge(speaker_turns, transcription_result, verbose=verbose)
+
+    def _load_cached(
+        self,
+        cache_keys: Optional[Dict[str, str]],
+        enable_diarization: bool,
+        speakers: Dict[str, Optional[int]]
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[List[Dict]]]:
+        """
+        Liest Transkription und Sprecher-Turns aus dem Cache
+
+        Fehlen nur die Sprecher-Turns für diese Sprecheranzahl, liegen aber
+        Segmentierung und Embeddings der Audiodatei vor, wird lediglich das
+        Clustering neu berechnet.
+        """
+        if not cache_keys:
+            return None, None
+
+        transcription_result = self.cache.get_transcription(cache_keys["transcription"])
+        speaker_turns = None
+        if enable_diarization:
+            speaker_turns = self.cache.get_diarization(cache_keys["diarization"])
+            if speaker_turns is None:
+                speaker_turns = self._recluster_cached(cache_keys, speakers)
+        return transcription_result, speaker_turns
+
+    def _recluster_cached(
+        self,
+        cache_keys: Dict[str, str],
+        speakers: Dict[str, Optional[int]]
+    ) -> Optional[List[Dict]]:
+        """Berechnet Sprecher-Turns aus gespeicherten Zwischenergebnissen neu"""
+        arrays = self.cache.get_diarization_state(cache_keys["diarization_state"])
+        if arrays is None:
+            return None
+
+        try:
+            state = DiarizationState.from_arrays(arrays)
+            speaker_turns = self.diarizer.recluster(state, **speakers)
+        except Exception as e:
+            print(f"Fehler beim erneuten Clustering: {str(e)}")
+            return None
+
+        self.cache.put_diarization(cache_keys["diarization"], speaker_turns)
+        return speaker_turns
+
+    def _store_cached(
+        self,
+        cache_keys: Optional[Dict[str, str]],
+        transcription_result: Optional[Dict[str, Any]],
+        speaker_turns: Optional[List[Dict]]
+    ):
+        """Speichert neu berechnete Ergebnisse im Cache"""
+        if not cache_keys:
+            return
+        if transcription_result:
+            self.cache.put_transcription(cache_keys["transcription"], transcription_result)
+        if speaker_turns is not None:
+            self.cache.put_diarization(cache_keys["diarization"], speaker_turns)
+
+    def _cache_keys(
+        self,
+        audio_file: str,
+        model_size: str,
+        language: Optional[str],
+        speakers: Dict[str, Optional[int]],
+        decode: str = "transcribe"
+    ) -> Optional[Dict[str, str]]:
+        """
+        Berechnet die Cache-Schlüssel (None wenn kein Cache aktiv ist)
+
+        Der Transkriptionsschlüssel enthält neben Modell und Sprache den
+        Dekodierweg ('transcribe', 'stream' oder 'two_pass') und die
+        ergebnisrelevanten Einstellungen des Transkriptors.
+        """
+        if self.cache is None:
+            return None
+
+        audio_hash = self.cache.hash_file(audio_file)
+        return {
+            "transcription": self.cache.transcription_key(
+                audio_hash,
+                model_size,
+                language,
+                decode={"path": decode, **self.transcriber.decode_settings()}
+            ),
+            "diarization": self.cache.diarization_key(
+                audio_hash,
+                **speakers,
+                speaker_store=self.diarizer.speaker_store_revision
+            ),
+            "diarization_state": self.cache.diarization_state_key(audio_hash)
+        }
+
+    def _diarize(
+        self,
+        audio,
+        speakers: Dict[str, Optional[int]],
+        cache_keys: Optional[Dict[str, str]] = None
+    ) -> Optional[List[Dict]]:
+        """
+        Führt die Sprechertrennung aus (None bei Fehler)
+
+        Mit aktivem Cache werden zusätzlich Segmentierung und Embeddings
+        gespeichert, damit eine andere Sprecheranzahl nur neu clustert.
+        """
+        try:
+            if not cache_keys:
+                return self.diarizer.run_diarization(audio, **speakers)
+
+            speaker_turns, state = self.diarizer.run_diarization(
+                audio, **speakers, return_state=True
+            )
+        except Exception as e:
+            print(f"Fehler bei der Sprechertrennung: {str(e)}")
+            return None
+
+        if state is not None:
+            self.cache.put_diarization_state(
+                cache_keys["diarization_state"], state.to_arrays()
+            )
+        return speaker_turns
+
+    def _thread_split(self) -> Tuple[int, int]:
+        """Teilt die Torch-Threads zwischen Whisper und pyannote auf"""
+        import torch
+
+        total_threads = torch.get_num_threads()
+        whisper_threads = self.whisper_threads or max(1, (total_threads + 1) // 2)
+        diarization_threads = self.diarization_threads or max(
+            1, total_threads - whisper_threads
+        )
+        return whisper_threads, diarization_threads
+
+    def _run_parallel(
+        self,
+        audio,
+        model_size: str,
+        language: Optional[str],
+        speakers: Dict[str, Optional[int]],
+        cache_keys: Optional[Dict[str, str]],
+        progress: Callable
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[List[Dict]]]:
+        """
+        Führt Whisper und pyannote gleichzeitig aus und wartet vor dem
+        Zusammenführen auf beide Ergebnisse
+
+        Returns:
+            Tuple (Whisper-Ergebnis, Sprecher-Turns oder None)
+        """
+        progress(0.2, desc="Transkribiere Audio und trenne Sprecher...")
+        whisper_threads, diarization_threads = self._thread_split()
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            # Stufen der Worker-Threads zählen zum Profil des Auftrags
+            transcription_future = executor.submit(run_in_context(
+                _run_with_threads,
+                whisper_threads,
+                self.transcriber.transcribe,
+                audio,
+                model_size=model_size,
+                language=language
+            ))
+            diarization_future = executor.submit(run_in_context(
+                _run_with_threads,
+                diarization_threads,
+                self._diarize,
+                audio,
+                speakers,
+                cache_keys
+            ))
+
+            transcription_result = transcription_future.result()
+            progress(0.6, desc="Warte auf Sprechertrennung...")
+            speaker_turns = diarization_future.result()
+
+        return transcription_result, speaker_turns
@@ -0,0 +1,314 @@
+"""
+Reduzierte Rechengenauigkeit für Whisper auf der CPU
+
+int8: dynamische Quantisierung aller Linear-Schichten (Gewichte int8,
+Aktivierungen werden pro Aufruf quantisiert). Das quantisierte Modell wird
+auf der Festplatte zwischengespeichert, so dass spätere Ladevorgänge die
+Quantisierung überspringen.
+
+bf16: Encoder und Decoder laufen unter torch.autocast mit bfloat16, sofern
+die CPU bf16 nativ unterstützt (AVX512-BF16/AMX bzw. ARM BF16).
+"""
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Optional
+
+try:
+    from .snapshot import load_whisper_snapshot, snapshots_enabled
+except ImportError:
+    from snapshot import load_whisper_snapshot, snapshots_enabled
+
+PRECISIONS = ("fp32", "int8", "bf16")
+
+# Bereits ausgegebene Hinweise (nicht bei jedem Modellzugriff wiederholen)
+_warned = set()
+
+
+def default_precision() -> str:
+    """
+    Liest die Standard-Genauigkeit aus TRANSCRIBER_PRECISION
+
+    Returns:
+        'fp32', 'int8' oder 'bf16'
+    """
+    precision = os.getenv("TRANSCRIBER_PRECISION", "fp32").strip().lower() or "fp32"
+    if precision not in PRECISIONS:
+        raise ValueError(
+            f"Unbekannte Genauigkeit '{precision}' (erlaubt: {', '.join(PRECISIONS)})"
+        )
+    return precision
+
+
+def bf16_supported() -> bool:
+    """
+    Prüft, ob die CPU bfloat16 nativ berechnen kann
+
+    Ohne native Unterstützung emuliert Torch bf16 und ist langsamer als fp32.
+
+    Returns:
+        True falls die CPU-Flags AVX512-BF16, AMX-BF16 oder BF16 (ARM) melden
+    """
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key.strip() in ("flags", "Features"):
+                    flags = set(value.split())
+                    return bool(flags & {"avx512_bf16", "amx_bf16", "bf16"})
+    except OSError:
+        pass
+    return False
+
+
+def resolve_precision(precision: Optional[str], device: str) -> str:
+    """
+    Bestimmt die tatsächlich verwendete Genauigkeit
+
+    int8 und bf16 sind nur auf der CPU verfügbar (auf der GPU rechnet Whisper
+    bereits in fp16). Nicht unterstützte Kombinationen fallen auf fp32
+    zurück.
+
+    Args:
+        precision: Gewünschte Genauigkeit (None: TRANSCRIBER_PRECISION)
+        device: Zielgerät ('cpu' oder 'cuda')
+
+    Returns:
+        'fp32', 'int8' oder 'bf16'
+    """
+    if precision is None:
+        precision = default_precision()
+    if precision not in PRECISIONS:
+        raise ValueError(
+            f"Unbekannte Genauigkeit '{precision}' (erlaubt: {', '.join(PRECISIONS)})"
+        )
+
+    reason = None
+    if precision != "fp32" and device != "cpu":
+        reason = f"{precision} ist nur auf der CPU verfügbar"
+    elif precision == "bf16" and not bf16_supported():
+        reason = "die CPU unterstützt bf16 nicht nativ"
+
+    if reason is None:
+        return precision
+    if (precision, device) not in _warned:
+        _warned.add((precision, device))
+        print(f"Verwende fp32 statt {precision}: {reason}")
+    return "fp32"
+
+
+def quantize_int8(model):
+    """
+    Quantisiert alle Linear-Schichten dynamisch nach int8
+
+    Args:
+        model: Whisper-Modell auf der CPU
+
+    Returns:
+        Quantisiertes Modell (dasselbe Objekt)
+    """
+    import torch
+    from torch import nn
+
+    for module in model.modules():
+        if isinstance(module, nn.Linear) and type(module) is not nn.Linear:
+            # Whisper nutzt eine Linear-Unterklasse (castet nur das Gewicht
+            # auf den Eingabetyp); quantize_dynamic ersetzt ausschließlich
+            # Module vom exakten Typ nn.Linear
+            module.__class__ = nn.Linear
+
+    model.eval()
+    return torch.ao.quantization.quantize_dynamic(
+        model, {nn.Linear}, dtype=torch.qint8, inplace=True
+    )
+
+
+def enable_bf16(model):
+    """
+    Lässt Encoder und Decoder unter bf16-Autocast laufen
+
+    Die Encoder-Ausgabe wird wieder nach float32 gewandelt, da Whisper beim
+    Dekodieren den Typ der Audio-Features prüft; die Logits des Decoders sind
+    bereits float32.
+
+    Args:
+        model: Whisper-Modell auf der CPU
+
+    Returns:
+        Dasselbe Modell
+    """
+    import torch
+
+    encoder_forward = model.encoder.forward
+    decoder_forward = model.decoder.forward
+
+    def encode(*args, **kwargs):
+        with torch.autocast("cpu", dtype=torch.bfloat16):
+            return encoder_forward(*args, **kwargs).float()
+
+    def decode(*args, **kwargs):
+        with torch.autocast("cpu", dtype=torch.bfloat16):
+            return decoder_forward(*args, **kwargs)
+
+    model.encoder.forward = encode
+    model.decoder.forward = decode
+    return model
+
+
+def checkpoint_id(model_size: str) -> str:
+    """Kennung des Whisper-Checkpoints (ändert sich mit neuen Gewichten)"""
+    import whisper
+
+    url = whisper._MODELS.get(model_size)
+    if url:
+        # Die Download-URL enthält den SHA-256 des Checkpoints
+        return url.split("/")[-2]
+    if os.path.isfile(model_size):
+        stat = os.stat(model_size)
+        return f"{os.path.abspath(model_size)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return model_size
+
+
+def model_cache_dir(cache_dir: Optional[str] = None) -> Path:
+    """
+    Verzeichnis für abgeleitete Modell-Artefakte (quantisiert, exportiert)
+
+    Args:
+        cache_dir: Verzeichnis (Standard: TRANSCRIBER_MODEL_CACHE_DIR oder
+            ~/.cache/transcriber/models)
+
+    Returns:
+        Pfad des Verzeichnisses
+    """
+    if cache_dir is None:
+        cache_dir = os.getenv(
+            "TRANSCRIBER_MODEL_CACHE_DIR",
+            os.path.join(Path.home(), ".cache", "transcriber", "models")
+        )
+    return Path(cache_dir)
+
+
+def model_cache_path(
+    model_size: str,
+    variant: str,
+    extension: str = ".pt",
+    cache_dir: Optional[str] = None
+) -> Path:
+    """
+    Pfad eines abgeleiteten Modell-Artefakts
+
+    Der Dateiname enthält einen Hash aus Checkpoint, Torch-Version und
+    Quantisierungs-Backend, damit nach einem Update neu erzeugt wird.
+
+    Args:
+        model_size: Modellgröße oder Pfad zu einem Checkpoint
+        variant: Art des Artefakts, z.B. 'int8'
+        extension: Dateiendung
+        cache_dir: Verzeichnis (siehe model_cache_dir)
+
+    Returns:
+        Pfad der Datei
+    """
+    import torch
+
+    key = "|".join([
+        checkpoint_id(model_size),
+        torch.__version__,
+        torch.backends.quantized.engine
+    ])
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+    name = os.path.splitext(os.path.basename(model_size))[0]
+    return model_cache_dir(cache_dir) / f"{name}-{variant}-{digest}{extension}"
+
+
+def quantized_cache_path(model_size: str, cache_dir: Optional[str] = None) -> Path:
+    """
+    Pfad des zwischengespeicherten int8-Modells
+
+    Args:
+        model_size: Modellgröße oder Pfad zu einem Checkpoint
+        cache_dir: Verzeichnis (siehe model_cache_dir)
+
+    Returns:
+        Pfad der .pt-Datei
+    """
+    return model_cache_path(model_size, "int8", ".pt", cache_dir)
+
+
+def load_int8(model_size: str, cache_dir: Optional[str] = None):
+    """
+    Lädt ein int8-quantisiertes Whisper-Modell
+
+    Liegt das quantisierte Modell bereits im Cache, wird es direkt geladen;
+    sonst wird das fp32-Modell quantisiert und gespeichert. Der Cache enthält
+    das vollständige Modul (Pickle) und darf daher nur aus einem
+    vertrauenswürdigen Verzeichnis stammen.
+
+    Args:
+        model_size: Modellgröße oder Pfad zu einem Checkpoint
+        cache_dir: Cache-Verzeichnis (siehe quantized_cache_path)
+
+    Returns:
+        Quantisiertes Whisper-Modell auf der CPU
+    """
+    import torch
+    import whisper
+
+    path = quantized_cache_path(model_size, cache_dir)
+    if path.exists():
+        try:
+            model = torch.load(path, map_location="cpu", weights_only=False)
+            print(f"Quantisiertes Modell aus dem Cache geladen: {path}")
+            return model
+        except Exception as e:
+            print(f"Cache-Eintrag {path} unbrauchbar, quantisiere neu: {str(e)}")
+
+    print(f"Quantisiere Whisper-Modell '{model_size}' nach int8...")
+    model = quantize_int8(whisper.load_model(model_size, device="cpu"))
+
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Erst temporär schreiben, damit parallele Prozesse nie eine halbe
+        # Datei lesen
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        torch.save(model, tmp_path)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Quantisiertes Modell konnte nicht gespeichert werden: {str(e)}")
+    return model
+
+
+def load_whisper(model_size: str, device: str, precision: str = "fp32"):
+    """
+    Lädt ein Whisper-Modell in der gewünschten Genauigkeit
+
+    Mit TRANSCRIBER_MODEL_SNAPSHOTS=1 werden fp32-Gewichte auf der CPU aus
+    einem per mmap eingeblendeten Snapshot geladen (siehe snapshot.py).
+
+    Args:
+        model_size: Modellgröße oder Pfad zu einem Checkpoint
+        device: Zielgerät ('cpu' oder 'cuda')
+        precision: 'fp32', 'int8' oder 'bf16' (siehe resolve_precision)
+
+    Returns:
+        Whisper-Modell
+    """
+    import whisper
+
+    if precision == "int8":
+        return load_int8(model_size)
+
+    model = None
+    if device == "cpu" and snapshots_enabled():
+        try:
+            model = load_whisper_snapshot(
+                model_size, model_cache_path(model_size, "snapshot", ".snapshot")
+            )
+        except Exception as e:
+            print(f"Snapshot nicht verwendbar, lade Checkpoint: {str(e)}")
+    if model is None:
+        model = whisper.load_model(model_size, device=device)
+    if precision == "bf16":
+        enable_bf16(model)
+    return model
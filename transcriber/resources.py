@@ -0,0 +1,110 @@
+"""
+Speicherverbrauch des Prozesses messen (Resident Set Size)
+"""
+
+import os
+import threading
+from typing import Optional
+
+# Abtastintervall des Monitors in Sekunden
+DEFAULT_INTERVAL = 0.2
+
+
+def current_rss() -> Optional[int]:
+    """
+    Liefert den aktuell belegten physischen Speicher des Prozesses
+
+    Returns:
+        RSS in Bytes oder None, falls das System ihn nicht bereitstellt
+        (nur Linux über /proc)
+    """
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def format_bytes(num_bytes: Optional[int]) -> str:
+    """
+    Formatiert eine Speichergröße für Log-Ausgaben
+
+    Args:
+        num_bytes: Größe in Bytes (None für unbekannt)
+
+    Returns:
+        Text wie '1.4 GB'
+    """
+    if num_bytes is None:
+        return "unbekannt"
+    size = float(num_bytes)
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+class PeakMemoryMonitor:
+    """
+    Ermittelt den maximalen RSS während eines Abschnitts
+
+    Ein Hintergrund-Thread fragt den RSS in festen Abständen ab. Da der RSS
+    für den ganzen Prozess gilt, enthält der Wert bei parallel laufenden
+    Aufträgen auch deren Speicher (obere Schranke pro Auftrag).
+
+    Verwendung:
+        with PeakMemoryMonitor() as monitor:
+            ...
+        print(monitor.peak_bytes)
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL):
+        """
+        Args:
+            interval: Abtastintervall in Sekunden
+        """
+        self.interval = interval
+        self.peak_bytes: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Startet die Messung"""
+        self._stop.clear()
+        self._sample()
+        self._thread = threading.Thread(
+            target=self._run, name="rss-monitor", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> Optional[int]:
+        """
+        Beendet die Messung
+
+        Returns:
+            Maximaler RSS in Bytes (None wenn nicht messbar)
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._sample()
+        return self.peak_bytes
+
+    def __enter__(self) -> "PeakMemoryMonitor":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self):
+        rss = current_rss()
+        if rss is not None and (self.peak_bytes is None or rss > self.peak_bytes):
+            self.peak_bytes = rss
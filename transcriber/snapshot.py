@@ -0,0 +1,286 @@
+"""
+Modell-Snapshots: Gewichte als flache Datei, per mmap geladen
+
+Ein Snapshot enthält alle Parameter und Buffer eines Torch-Moduls
+hintereinander in einer Datei (JSON-Header mit Name, Typ, Form und Offset,
+danach die ausgerichteten Rohdaten). Beim Laden werden die Tensoren direkt
+auf die per mmap eingeblendete Datei gelegt: Es wird nichts deserialisiert
+oder kopiert, und alle Prozesse eines Hosts teilen sich dieselben
+physischen Seiten aus dem Page-Cache. Die Abbildung ist copy-on-write, eine
+versehentliche Änderung bleibt also im Prozess und erreicht die Datei nicht.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+MAGIC = b"TRSNAP1\n"
+# Ausrichtung der Tensordaten in Bytes
+ALIGNMENT = 64
+
+# Torch-Typen, die als Snapshot gespeichert werden können
+DTYPES = ("float32", "float16", "int64", "int32", "int8", "uint8", "bool")
+
+
+def snapshots_enabled() -> bool:
+    """Snapshots verwenden (TRANSCRIBER_MODEL_SNAPSHOTS=1)"""
+    return os.getenv("TRANSCRIBER_MODEL_SNAPSHOTS", "0") == "1"
+
+
+def _aligned(position: int) -> int:
+    return (position + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_snapshot(
+    path: Path,
+    arrays: Dict[str, np.ndarray],
+    metadata: Optional[Dict[str, Any]] = None,
+    sparse: Tuple[str, ...] = ()
+):
+    """
+    Schreibt Arrays als Snapshot-Datei
+
+    Die Datei wird erst vollständig unter einem temporären Namen geschrieben
+    und dann umbenannt, so dass parallele Prozesse nie eine halbe Datei
+    einblenden.
+
+    Args:
+        path: Zieldatei
+        arrays: Name -> zusammenhängendes Array
+        metadata: Beliebige JSON-Daten (z.B. Modell-Dimensionen)
+        sparse: Namen, die beim Laden wieder sparse werden sollen
+    """
+    tensors = {}
+    offset = 0
+    for name, array in arrays.items():
+        if array.dtype.name not in DTYPES:
+            raise ValueError(f"Typ {array.dtype} von '{name}' wird nicht unterstützt")
+        offset = _aligned(offset)
+        tensors[name] = {
+            "dtype": array.dtype.name,
+            "shape": list(array.shape),
+            "offset": offset,
+            "sparse": name in sparse
+        }
+        offset += array.nbytes
+
+    header = json.dumps({"metadata": metadata or {}, "tensors": tensors}).encode("utf-8")
+    data_start = _aligned(len(MAGIC) + 8 + len(header))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(data_start + tensors[name]["offset"])
+            f.write(np.ascontiguousarray(array).data)
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+
+
+def _read_header(path: Path) -> Tuple[int, Dict[str, Any]]:
+    """Liest nur den Header eines Snapshots"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} ist kein Modell-Snapshot")
+        (header_length,) = struct.unpack("<Q", f.read(8))
+        return header_length, json.loads(f.read(header_length).decode("utf-8"))
+
+
+def read_snapshot(path: Path) -> Tuple[Dict[str, Any], Dict[str, np.ndarray], Tuple[str, ...]]:
+    """
+    Blendet eine Snapshot-Datei per mmap ein
+
+    Args:
+        path: Snapshot-Datei
+
+    Returns:
+        Tuple (Metadaten, Name -> Array auf der eingeblendeten Datei, Namen
+        der sparse gespeicherten Tensoren)
+    """
+    header_length, header = _read_header(path)
+    with open(path, "rb") as f:
+        # ACCESS_COPY: gemeinsame Seiten, Schreibzugriffe bleiben privat
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    data_start = _aligned(len(MAGIC) + 8 + header_length)
+    arrays = {}
+    sparse = []
+    for name, info in header["tensors"].items():
+        dtype = np.dtype(info["dtype"])
+        count = int(np.prod(info["shape"], dtype=np.int64))
+        arrays[name] = np.frombuffer(
+            mapped, dtype=dtype, count=count, offset=data_start + info["offset"]
+        ).reshape(info["shape"])
+        if info.get("sparse"):
+            sparse.append(name)
+    return header["metadata"], arrays, tuple(sparse)
+
+
+def module_tensors(module) -> Dict[str, Any]:
+    """
+    Alle Parameter und Buffer eines Moduls (auch nicht persistente Buffer)
+
+    Args:
+        module: Torch-Modul
+
+    Returns:
+        Name -> Tensor
+    """
+    tensors = dict(module.named_parameters())
+    tensors.update(module.named_buffers())
+    return tensors
+
+
+def save_module(path: Path, module, metadata: Optional[Dict[str, Any]] = None):
+    """
+    Schreibt die Gewichte eines Moduls als Snapshot
+
+    Args:
+        path: Zieldatei
+        module: Torch-Modul auf der CPU
+        metadata: Zusätzliche JSON-Daten
+    """
+    arrays = {}
+    sparse = []
+    for name, tensor in module_tensors(module).items():
+        tensor = tensor.detach()
+        if tensor.is_sparse:
+            tensor = tensor.to_dense()
+            sparse.append(name)
+        arrays[name] = tensor.cpu().contiguous().numpy()
+    write_snapshot(path, arrays, metadata, tuple(sparse))
+
+
+def assign_snapshot(module, path: Path) -> Dict[str, Any]:
+    """
+    Ersetzt die Gewichte eines Moduls durch die eingeblendeten Snapshot-Daten
+
+    Die bisherigen Tensoren werden freigegeben, sobald keine andere Referenz
+    mehr besteht. Parameter erhalten requires_grad=False (nur Inferenz).
+
+    Args:
+        module: Torch-Modul mit passender Struktur (darf auf 'meta' liegen)
+        path: Snapshot-Datei
+
+    Returns:
+        Metadaten des Snapshots
+    """
+    import torch
+    from torch import nn
+
+    metadata, arrays, sparse = read_snapshot(path)
+    expected = module_tensors(module)
+    if set(arrays) != set(expected):
+        raise ValueError(f"Snapshot {path} passt nicht zum Modul")
+
+    for name, array in arrays.items():
+        tensor = torch.from_numpy(array)
+        if name in sparse:
+            tensor = tensor.to_sparse()
+        module_path, _, attribute = name.rpartition(".")
+        owner = module.get_submodule(module_path) if module_path else module
+        if attribute in owner._parameters:
+            owner._parameters[attribute] = nn.Parameter(tensor, requires_grad=False)
+        else:
+            owner._buffers[attribute] = tensor
+    return metadata
+
+
+def fingerprint(module) -> str:
+    """
+    Inhalts-Hash der Gewichte eines Moduls
+
+    Args:
+        module: Torch-Modul
+
+    Returns:
+        SHA-256 als Hex-String (Namen, Formen, Typen und Daten)
+    """
+    digest = hashlib.sha256()
+    for name, tensor in sorted(module_tensors(module).items()):
+        tensor = tensor.detach()
+        if tensor.is_sparse:
+            tensor = tensor.to_dense()
+        array = tensor.cpu().contiguous().numpy()
+        digest.update(f"{name}:{array.dtype}:{array.shape}".encode("utf-8"))
+        digest.update(array.data)
+    return digest.hexdigest()
+
+
+def load_whisper_snapshot(model_size: str, path: Path):
+    """
+    Lädt ein Whisper-Modell aus einem Snapshot (CPU, fp32)
+
+    Fehlt der Snapshot, wird das Modell einmal regulär geladen und als
+    Snapshot gespeichert. Sonst wird das Modell ohne Gewichte auf dem
+    'meta'-Gerät aufgebaut und direkt auf die eingeblendete Datei gelegt.
+
+    Args:
+        model_size: Modellgröße oder Pfad zu einem Checkpoint
+        path: Snapshot-Datei (siehe precision.model_cache_path)
+
+    Returns:
+        Whisper-Modell, dessen Gewichte auf den Snapshot zeigen
+    """
+    import torch
+    import whisper
+    from whisper.model import ModelDimensions, Whisper
+
+    if not path.exists():
+        print(f"Erstelle Snapshot für Whisper-Modell '{model_size}'...")
+        model = whisper.load_model(model_size, device="cpu")
+        save_module(path, model, {"dims": vars(model.dims)})
+        assign_snapshot(model, path)
+        return model
+
+    _, header = _read_header(path)
+    dims = ModelDimensions(**header["metadata"]["dims"])
+    try:
+        # Ohne Speicher für die (sofort ersetzten) Zufallsgewichte
+        with torch.device("meta"):
+            model = Whisper(dims)
+    except Exception:
+        model = Whisper(dims)
+    assign_snapshot(model, path)
+    return model.eval()
+
+
+def _pipeline_modules(pipeline) -> Iterator[Tuple[str, Any]]:
+    """Torch-Modelle einer pyannote-Pipeline (Segmentierung, Embedding)"""
+    segmentation = getattr(getattr(pipeline, "_segmentation", None), "model", None)
+    if segmentation is not None:
+        yield "segmentation", segmentation
+    embedding = getattr(pipeline, "_embedding", None)
+    embedding = getattr(embedding, "model_", None)
+    if embedding is not None:
+        yield "embedding", embedding
+
+
+def share_pipeline_weights(pipeline, cache_dir: Path):
+    """
+    Legt die Gewichte einer pyannote-Pipeline auf Snapshots
+
+    pyannote baut seine Modelle beim Laden selbst auf; danach werden die
+    privaten Kopien der Gewichte durch die eingeblendeten Snapshots ersetzt,
+    so dass sich alle Prozesse eines Hosts einen Satz Seiten teilen. Der
+    Dateiname enthält den Inhalts-Hash, neue Gewichte ergeben also einen
+    neuen Snapshot.
+
+    Args:
+        pipeline: Geladene pyannote-Pipeline (CPU)
+        cache_dir: Verzeichnis der Snapshots
+    """
+    for name, module in _pipeline_modules(pipeline):
+        path = cache_dir / f"pyannote-{name}-{fingerprint(module)[:16]}.snapshot"
+        if not path.exists():
+            save_module(path, module)
+        assign_snapshot(module, path)
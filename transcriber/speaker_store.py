@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Speicher für bekannte Sprecher (Enrollment) mit Embedding-Index
+
+Die Embeddings liegen normiert als float32-Matrix in einer .npy-Datei, die
+per mmap geöffnet wird; die zugehörigen Namen stehen in names.json. Ein
+Abgleich aller Cluster einer Aufnahme ist ein einziges Matrixprodukt und
+bleibt auch bei tausenden Einträgen im Millisekundenbereich.
+
+Beispiele:
+    python speaker_store.py enroll "Anna Müller" interview.wav --start 12 --end 55
+    python speaker_store.py list
+    python speaker_store.py remove "Anna Müller"
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+EMBEDDINGS_FILE = "embeddings.npy"
+NAMES_FILE = "names.json"
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Normiert Zeilen auf Länge 1 (Nullzeilen bleiben unverändert)"""
+    if matrix.size == 0:
+        return matrix
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms > 0, norms, 1.0)
+
+
+class SpeakerStore:
+    """
+    Benannte Sprecher-Embeddings für die Wiedererkennung über Aufnahmen hinweg
+
+    Pro Name können mehrere Embeddings hinterlegt werden (z.B. aus
+    verschiedenen Aufnahmen); ein Cluster wird dem Namen des ähnlichsten
+    Eintrags zugeordnet.
+    """
+
+    def __init__(
+        self,
+        store_dir: Optional[str] = None,
+        threshold: Optional[float] = None
+    ):
+        """
+        Args:
+            store_dir: Verzeichnis des Speichers (Standard:
+                TRANSCRIBER_SPEAKER_STORE_DIR oder ~/.cache/transcriber/speakers)
+            threshold: Mindest-Kosinus-Ähnlichkeit für eine Zuordnung
+                (Standard: TRANSCRIBER_SPEAKER_MATCH_THRESHOLD, sonst 0.5)
+        """
+        if store_dir is None:
+            store_dir = os.getenv("TRANSCRIBER_SPEAKER_STORE_DIR") or os.path.join(
+                Path.home(), ".cache", "transcriber", "speakers"
+            )
+        if threshold is None:
+            threshold = float(os.getenv("TRANSCRIBER_SPEAKER_MATCH_THRESHOLD", "0.5"))
+
+        self.store_dir = Path(store_dir)
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def speakers(self) -> List[str]:
+        """Alle bekannten Namen (ohne Duplikate, sortiert)"""
+        return sorted(set(self.names))
+
+    def refresh(self):
+        """Lädt den Speicher neu, falls ein anderer Prozess ihn geändert hat"""
+        if self._names_mtime() != self._mtime:
+            with self._lock:
+                self._load()
+
+    def match(self, centroids: np.ndarray) -> List[Optional[str]]:
+        """
+        Ordnet Cluster-Zentroide bekannten Sprechern zu
+
+        Jeder Name wird pro Aufnahme höchstens einmal vergeben; bei
+        Konflikten erhält ihn der ähnlichere Cluster.
+
+        Args:
+            centroids: Array (Cluster, Dimension)
+
+        Returns:
+            Name oder None (unbekannt) für jeden Cluster
+        """
+        centroids = np.asarray(centroids, dtype=np.float32)
+        num_clusters = len(centroids)
+        embeddings = self.embeddings
+        if num_clusters == 0 or embeddings is None or len(embeddings) == 0:
+            return [None] * num_clusters
+        if centroids.shape[1] != embeddings.shape[1]:
+            print(
+                f"Sprecher-Speicher passt nicht zum Embedding-Modell "
+                f"({embeddings.shape[1]} statt {centroids.shape[1]} Dimensionen)"
+            )
+            return [None] * num_clusters
+
+        queries = normalize_rows(np.nan_to_num(centroids))
+        scores = queries @ embeddings.T
+        best = np.argmax(scores, axis=1)
+        best_scores = scores[np.arange(num_clusters), best]
+
+        names = [None] * num_clusters
+        used = set()
+        for i in np.argsort(-best_scores):
+            if best_scores[i] < self.threshold:
+                break
+            name = self.names[best[i]]
+            if name not in used:
+                names[i] = name
+                used.add(name)
+        return names
+
+    def enroll(self, name: str, embedding: np.ndarray):
+        """
+        Fügt ein Embedding für einen Sprecher hinzu
+
+        Args:
+            name: Name des Sprechers
+            embedding: Embedding (Dimension,) im Raum des Diarization-Modells
+        """
+        embedding = normalize_rows(
+            np.asarray(embedding, dtype=np.float32).reshape(1, -1)
+        )
+        with self._lock:
+            if self.embeddings is not None and len(self.embeddings):
+                if self.embeddings.shape[1] != embedding.shape[1]:
+                    raise ValueError(
+                        f"Embedding hat {embedding.shape[1]} statt "
+                        f"{self.embeddings.shape[1]} Dimensionen"
+                    )
+                embeddings = np.concatenate([self.embeddings, embedding])
+            else:
+                embeddings = embedding
+            self._save(embeddings, self.names + [name])
+
+    def remove(self, name: str) -> int:
+        """
+        Entfernt alle Embeddings eines Sprechers
+
+        Args:
+            name: Name des Sprechers
+
+        Returns:
+            Anzahl entfernter Einträge
+        """
+        with self._lock:
+            keep = [i for i, existing in enumerate(self.names) if existing != name]
+            removed = len(self.names) - len(keep)
+            if removed:
+                self._save(
+                    np.asarray(self.embeddings)[keep],
+                    [self.names[i] for i in keep]
+                )
+            return removed
+
+    def _load(self):
+        """Öffnet Matrix (mmap) und Namen"""
+        names_path = self.store_dir / NAMES_FILE
+        embeddings_path = self.store_dir / EMBEDDINGS_FILE
+
+        # Vor dem Lesen, damit eine gleichzeitige Änderung erkannt wird
+        self._mtime = self._names_mtime()
+        names, embeddings = [], None
+        try:
+            with open(names_path, encoding="utf-8") as f:
+                names = json.load(f)
+            embeddings = np.load(embeddings_path, mmap_mode="r")
+        except FileNotFoundError:
+            names, embeddings = [], None
+        except (OSError, ValueError) as e:
+            print(f"Sprecher-Speicher konnte nicht geladen werden: {str(e)}")
+            names, embeddings = [], None
+
+        if embeddings is not None and len(embeddings) != len(names):
+            print("Sprecher-Speicher ist inkonsistent und wird ignoriert")
+            names, embeddings = [], None
+
+        self.names: List[str] = names
+        self.embeddings: Optional[np.ndarray] = embeddings
+        # Ändert sich mit jedem Enrollment (Teil des Diarization-Cache-Schlüssels)
+        self.revision: Optional[str] = None
+        if names:
+            digest = hashlib.sha256(json.dumps(names).encode("utf-8"))
+            digest.update(np.ascontiguousarray(embeddings).tobytes())
+            self.revision = digest.hexdigest()[:16]
+
+    def _names_mtime(self) -> Optional[float]:
+        try:
+            return (self.store_dir / NAMES_FILE).stat().st_mtime
+        except OSError:
+            return None
+
+    def _save(self, embeddings: np.ndarray, names: Sequence[str]):
+        """Schreibt Matrix und Namen atomar und öffnet sie neu"""
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+
+        # Eindeutig pro Prozess und Thread
+        suffix = f"{os.getpid()}.{threading.get_ident()}.tmp"
+        embeddings_tmp = self.store_dir / f".{EMBEDDINGS_FILE}.{suffix}"
+        with open(embeddings_tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(embeddings, dtype=np.float32))
+        os.replace(embeddings_tmp, self.store_dir / EMBEDDINGS_FILE)
+
+        names_tmp = self.store_dir / f".{NAMES_FILE}.{suffix}"
+        with open(names_tmp, "w", encoding="utf-8") as f:
+            json.dump(list(names), f, ensure_ascii=False)
+        os.replace(names_tmp, self.store_dir / NAMES_FILE)
+
+        self._load()
+
+
+def default_speaker_store() -> Optional[SpeakerStore]:
+    """
+    Erstellt den Sprecher-Speicher gemäß Konfiguration
+
+    Returns:
+        SpeakerStore oder None wenn TRANSCRIBER_SPEAKER_STORE=0 gesetzt ist
+    """
+    if os.getenv("TRANSCRIBER_SPEAKER_STORE", "1") == "0":
+        return None
+    return SpeakerStore()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Kommandozeile zum Verwalten bekannter Sprecher"""
+    parser = argparse.ArgumentParser(description="Bekannte Sprecher verwalten")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    enroll_parser = subparsers.add_parser(
+        "enroll", help="Sprecher aus einer Aufnahme hinzufügen"
+    )
+    enroll_parser.add_argument("name", help="Name des Sprechers")
+    enroll_parser.add_argument("audio", help="Audiodatei, in der nur dieser Sprecher spricht")
+    enroll_parser.add_argument("--start", type=float, help="Beginn des Ausschnitts in Sekunden")
+    enroll_parser.add_argument("--end", type=float, help="Ende des Ausschnitts in Sekunden")
+
+    subparsers.add_parser("list", help="Bekannte Sprecher anzeigen")
+
+    remove_parser = subparsers.add_parser("remove", help="Sprecher entfernen")
+    remove_parser.add_argument("name", help="Name des Sprechers")
+
+    args = parser.parse_args(argv)
+    store = SpeakerStore()
+
+    if args.command == "list":
+        for name in store.speakers:
+            print(f"{name} ({store.names.count(name)} Embeddings)")
+        return 0
+
+    if args.command == "remove":
+        removed = store.remove(args.name)
+        print(f"{removed} Embeddings von {args.name} entfernt")
+        return 0 if removed else 1
+
+    from dotenv import load_dotenv
+
+    try:
+        from .audio import SAMPLE_RATE, load_audio
+        from .diarization import SpeakerDiarizer
+    except ImportError:
+        from audio import SAMPLE_RATE, load_audio
+        from diarization import SpeakerDiarizer
+
+    load_dotenv()
+    audio = load_audio(args.audio)
+    start = int((args.start or 0.0) * SAMPLE_RATE)
+    end = int(args.end * SAMPLE_RATE) if args.end is not None else len(audio)
+
+    embedding = SpeakerDiarizer().embed(audio[start:end])
+    store.enroll(args.name, embedding)
+    print(f"{args.name} hinzugefügt ({store.names.count(args.name)} Embeddings)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,76 +2,194 @@
 Whisper-basierte Transkriptionsmodul
 """
 
-import whisper
-import torch
+import os
 import warnings
-from typing import Optional, Dict, Any
+import numpy as np
+from typing import Optional, Dict, Any, Iterator, Sequence
+
+# Whisper und Torch werden erst beim ersten Laden eines Modells importiert
+try:
+    from .audio import (
+        SAMPLE_RATE, AudioInput, describe_audio, ensure_waveform, get_duration,
+        split_audio
+    )
+    from .feature_cache import default_feature_cache
+    from .longform import LongFormTranscriber, shift_segments
+    from .metrics import stage
+    from .model_pool import ModelPool
+    from .precision import resolve_precision
+    from .vad import compact_audio, detect_speech
+except ImportError:
+    from audio import (
+        SAMPLE_RATE, AudioInput, describe_audio, ensure_waveform, get_duration,
+        split_audio
+    )
+    from feature_cache import default_feature_cache
+    from longform import LongFormTranscriber, shift_segments
+    from metrics import stage
+    from model_pool import ModelPool
+    from precision import resolve_precision
+    from vad import compact_audio, detect_speech
 
 warnings.filterwarnings("ignore")
 
+# Zeichen des vorherigen Abschnitts, die beim Streaming als Kontext
+# (initial_prompt) weitergegeben werden
+STREAM_PROMPT_CHARS = 200
+
 
 class WhisperTranscriber:
     """Klasse für Audio-Transkription mit OpenAI Whisper"""
 
-    def __init__(self):
-        self.model = None
+    def __init__(self, pool: Optional[ModelPool] = None):
+        """
+        Args:
+            pool: Optionaler Modell-Pool (Standard: neuer ModelPool)
+        """
         self.current_model_size = None
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        print(f"Whisper wird auf {self.device} ausgeführt")
+        self.pool = pool or ModelPool()
+        self.long_form = LongFormTranscriber(precision=self.pool.precision)
+        # Ab dieser Länge (Sekunden) wird im Long-Form-Modus transkribiert
+        self.long_form_min_seconds = float(
+            os.getenv("TRANSCRIBER_LONG_FORM_MIN_SECONDS", "0")
+        )
+        # Stille vor der Dekodierung entfernen (Voice Activity Detection)
+        self.vad = os.getenv("TRANSCRIBER_VAD", "0") == "1"
+        # Mel-Fenster und Encoder-Ausgaben pro Aufnahme wiederverwenden
+        self.feature_cache = default_feature_cache(namespace=self.pool.precision)
+        # Gleichzeitige Anfragen gemeinsam im Batch transkribieren; der
+        # Feature-Cache nutzt dieselben festen 30-Sekunden-Fenster und greift
+        # daher nur in der Batch-Engine und in transcribe_tasks(). Der
+        # normale Weg über model.transcribe bleibt unverändert.
+        self.batch_engine = None
+        self._tasks_engine = None
+        if os.getenv("TRANSCRIBER_BATCH_ENGINE", "0") == "1":
+            self.batch_engine = self._create_batch_engine()
 
-    def load_model(self, model_size: str = "base"):
+    def _create_batch_engine(self, max_wait: Optional[float] = None):
+        """Erstellt die Batch-Engine (importiert Torch und Whisper)"""
+        try:
+            from .batch_engine import BatchTranscriptionEngine
+        except ImportError:
+            from batch_engine import BatchTranscriptionEngine
+        return BatchTranscriptionEngine(
+            self.load_model, max_wait=max_wait, feature_cache=self.feature_cache
+        )
+
+    @property
+    def device(self) -> str:
+        """Gerät, auf dem Whisper läuft ('cuda' oder 'cpu')"""
+        return self.pool.device
+
+    def load_model(self, model_size: str = "base", precision: Optional[str] = None):
         """
-        Lädt das Whisper-Modell
+        Lädt das Whisper-Modell (aus dem Modell-Pool)
 
         Args:
             model_size: Größe des Modells (tiny, base, small, medium, large)
+            precision: 'fp32', 'int8' (dynamisch quantisiert) oder 'bf16'
+                (Standard: TRANSCRIBER_PRECISION); int8 und bf16 nur auf der CPU
+
+        Returns:
+            Geladenes Whisper-Modell
         """
-        if self.model is None or self.current_model_size != model_size:
-            print(f"Lade Whisper-Modell '{model_size}'...")
-            self.model = whisper.load_model(model_size, device=self.device)
-            self.current_model_size = model_size
-            print("Modell geladen!")
+        # Keine eigene Referenz auf das Modell: nur der Pool hält es, damit
+        # Idle-TTL und LRU-Verdrängung den Speicher freigeben können
+        model = self.pool.get(model_size, precision)
+        self.current_model_size = model_size
+        return model
 
+    @stage("transcribe")
     def transcribe(
         self,
-        audio_path: str,
+        audio: AudioInput,
         model_size: str = "base",
         language: Optional[str] = None,
         task: str = "transcribe",
+        long_form: Optional[bool] = None,
+        vad: Optional[bool] = None,
         **kwargs
     ) -> Optional[Dict[str, Any]]:
         """
         Transkribiert eine Audiodatei
 
         Args:
-            audio_path: Pfad zur Audiodatei
+            audio: Pfad zur Audiodatei oder dekodierte Waveform
+                (16 kHz mono float32, siehe audio.load_audio)
             model_size: Größe des Whisper-Modells
             language: Sprache (None für auto-detect, oder z.B. 'de', 'en')
             task: 'transcribe' oder 'translate' (übersetzt nach Englisch)
+            long_form: Parallele Chunk-Transkription erzwingen (True) oder
+                verbieten (False). None entscheidet anhand der Dauer
+                (TRANSCRIBER_LONG_FORM_MIN_SECONDS).
+            vad: Bereiche ohne Sprache vor der Dekodierung entfernen
+                (Standard: TRANSCRIBER_VAD). Zeitstempel beziehen sich
+                weiterhin auf die Original-Aufnahme, die übersprungene Dauer
+                steht unter result['vad'].
             **kwargs: Zusätzliche Parameter für whisper.transcribe()
 
         Returns:
             Dictionary mit Transkriptionsergebnissen oder None bei Fehler
         """
         try:
-            # Lade Modell falls noch nicht geladen
-            self.load_model(model_size)
-
-            # Bereite Parameter vor
-            transcribe_params = {
-                "audio": audio_path,
-                "task": task,
-                "verbose": False,
-                **kwargs
-            }
+            # Lade Modell falls noch nicht geladen (lokale Referenz für die
+            # Dauer dieser Anfrage)
+            model = self.load_model(model_size)
+
+            if vad is None:
+                vad = self.vad
+
+            time_map = None
+            if vad:
+                audio = ensure_waveform(audio)
+                audio, time_map = compact_audio(audio, detect_speech(audio))
+                vad_stats = time_map.stats()
+                print(
+                    f"VAD: {vad_stats['skipped_seconds']:.1f}s von "
+                    f"{vad_stats['total_seconds']:.1f}s ohne Sprache übersprungen "
+                    f"({vad_stats['skipped_ratio']:.0%})"
+                )
+
+            if self._use_long_form(audio, long_form):
+                audio = ensure_waveform(audio)
+                if not language or language == "auto":
+                    # Einmal erkennen, damit alle Chunks dieselbe Sprache nutzen
+                    language = self.detect_language(audio, model)
 
-            # Füge Sprache hinzu wenn spezifiziert
-            if language and language != "auto":
-                transcribe_params["language"] = language
+                print(f"Transkribiere {describe_audio(audio)} (Long-Form)...")
+                result = self.long_form.transcribe(
+                    audio, model_size, language, task=task, **kwargs
+                )
+            elif self.batch_engine is not None and not kwargs:
+                # Fenster werden mit denen anderer Anfragen gebündelt
+                audio = ensure_waveform(audio)
+                print(f"Transkribiere {describe_audio(audio)} (Batch)...")
+                result = self.batch_engine.transcribe(
+                    audio,
+                    model_size=model_size,
+                    language=language if language != "auto" else None,
+                    task=task
+                )
+            else:
+                # Bereite Parameter vor
+                transcribe_params = {
+                    "audio": audio,
+                    "task": task,
+                    "verbose": False,
+                    **kwargs
+                }
 
-            # Transkribiere
-            print(f"Transkribiere {audio_path}...")
-            result = self.model.transcribe(**transcribe_params)
+                # Füge Sprache hinzu wenn spezifiziert
+                if language and language != "auto":
+                    transcribe_params["language"] = language
+
+                # Transkribiere
+                print(f"Transkribiere {describe_audio(audio)}...")
+                result = model.transcribe(**transcribe_params)
+
+            if time_map is not None:
+                # Zeitstempel zurück auf die Original-Aufnahme abbilden
+                result = time_map.remap_result(result)
 
             print("Transkription abgeschlossen!")
             return result
@@ -80,9 +198,213 @@ class WhisperTranscriber:
             print(f"Fehler bei der Transkription: {str(e)}")
             return None
 
+    def transcribe_stream(
+        self,
+        audio: AudioInput,
+        model_size: str = "base",
+        language: Optional[str] = None,
+        task: str = "transcribe",
+        chunk_seconds: Optional[float] = None,
+        vad: Optional[bool] = None,
+        **kwargs
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Transkribiert abschnittsweise und liefert Segmente, sobald ein
+        Abschnitt fertig ist
+
+        Die Waveform wird in Sprechpausen in Abschnitte geteilt, die
+        nacheinander transkribiert werden. Das Ende des vorherigen Abschnitts
+        wird als initial_prompt weitergegeben, damit der Kontext erhalten
+        bleibt.
+
+        Args:
+            audio: Pfad zur Audiodatei oder dekodierte Waveform
+            model_size: Größe des Whisper-Modells
+            language: Sprache (None/'auto' wird einmal vorab erkannt)
+            task: 'transcribe' oder 'translate'
+            chunk_seconds: Abschnittslänge in Sekunden (Standard:
+                TRANSCRIBER_STREAM_CHUNK_SECONDS, sonst 30)
+            vad: Bereiche ohne Sprache überspringen (Standard: TRANSCRIBER_VAD)
+            **kwargs: Zusätzliche Parameter für whisper.transcribe()
+
+        Yields:
+            Dictionary mit 'segments' (neue Segmente in Originalzeit),
+            'position' (verarbeitete Sekunden), 'duration' und 'language'
+        """
+        if chunk_seconds is None:
+            chunk_seconds = float(os.getenv("TRANSCRIBER_STREAM_CHUNK_SECONDS", "30"))
+        if vad is None:
+            vad = self.vad
+
+        model = self.load_model(model_size)
+        audio = ensure_waveform(audio)
+        duration = get_duration(audio)
+
+        time_map = None
+        if vad:
+            audio, time_map = compact_audio(audio, detect_speech(audio))
+
+        if len(audio) == 0:
+            yield {
+                "segments": [],
+                "position": duration,
+                "duration": duration,
+                "language": language
+            }
+            return
+
+        if not language or language == "auto":
+            language = self.detect_language(audio, model)
+
+        transcribe_params = {"task": task, "verbose": None, "language": language, **kwargs}
+        chunks = split_audio(audio, chunk_seconds)
+        print(f"Transkribiere {describe_audio(audio)} in {len(chunks)} Abschnitten...")
+
+        previous_text = ""
+        for start, end, _, _ in chunks:
+            chunk_params = dict(transcribe_params)
+            if previous_text and "initial_prompt" not in kwargs:
+                chunk_params["initial_prompt"] = previous_text[-STREAM_PROMPT_CHARS:]
+
+            result = model.transcribe(audio[start:end], **chunk_params)
+            previous_text = result.get("text", "")
+
+            segments = shift_segments(result.get("segments", []), start / SAMPLE_RATE)
+            position = end / SAMPLE_RATE
+            if time_map is not None:
+                segments = time_map.remap_result({"segments": segments})["segments"]
+                position = time_map.to_original(position)
+            if end == len(audio):
+                position = duration
+
+            yield {
+                "segments": segments,
+                "position": position,
+                "duration": duration,
+                "language": language
+            }
+
+    @stage("transcribe")
+    def transcribe_tasks(
+        self,
+        audio: AudioInput,
+        model_size: str = "base",
+        language: Optional[str] = None,
+        tasks: Sequence[str] = ("transcribe", "translate"),
+        vad: Optional[bool] = None
+    ) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Transkribiert und übersetzt mit einem Encoder-Durchlauf
+
+        Die Aufnahme wird in feste 30-Sekunden-Fenster geteilt (wie in der
+        Batch-Engine); jedes Fenster wird einmal kodiert und für jeden Task
+        dekodiert. Die Sprache wird einmal erkannt und für alle Tasks
+        verwendet.
+
+        Args:
+            audio: Pfad zur Audiodatei oder dekodierte Waveform
+            model_size: Größe des Whisper-Modells
+            language: Sprache (None für auto-detect)
+            tasks: Tasks, z.B. ('transcribe', 'translate')
+            vad: Bereiche ohne Sprache vor der Dekodierung entfernen
+                (Standard: TRANSCRIBER_VAD)
+
+        Returns:
+            Dictionary Task -> Whisper-Ergebnis oder None bei Fehler
+        """
+        try:
+            # Ohne Batch-Engine eine eigene, die transcribe() nicht umleitet
+            engine = self.batch_engine
+            if engine is None:
+                if self._tasks_engine is None:
+                    self._tasks_engine = self._create_batch_engine(max_wait=0.0)
+                engine = self._tasks_engine
+            if vad is None:
+                vad = self.vad
+
+            audio = ensure_waveform(audio)
+            time_map = None
+            if vad:
+                audio, time_map = compact_audio(audio, detect_speech(audio))
+
+            print(f"Transkribiere {describe_audio(audio)} ({', '.join(tasks)})...")
+            results = engine.submit(
+                audio,
+                model_size=model_size,
+                language=language if language != "auto" else None,
+                tasks=tuple(tasks)
+            ).result()
+            if len(tasks) == 1:
+                results = {tasks[0]: results}
+
+            if time_map is not None:
+                results = {
+                    task: time_map.remap_result(result) for task, result in results.items()
+                }
+
+            print("Transkription abgeschlossen!")
+            return results
+
+        except Exception as e:
+            print(f"Fehler bei der Transkription: {str(e)}")
+            return None
+
+    def detect_language(self, audio: np.ndarray, model) -> str:
+        """
+        Erkennt die Sprache anhand der ersten 30 Sekunden
+
+        Args:
+            audio: Waveform (16 kHz mono float32)
+            model: Geladenes Whisper-Modell
+
+        Returns:
+            Sprachcode, z.B. 'de'
+        """
+        if not model.is_multilingual:
+            return "en"
+
+        import whisper
+
+        mel = whisper.log_mel_spectrogram(
+            whisper.pad_or_trim(audio),
+            model.dims.n_mels
+        ).to(model.device)
+        _, probs = model.detect_language(mel)
+        return max(probs, key=probs.get)
+
+    def decode_settings(self) -> Dict[str, Any]:
+        """
+        Einstellungen, die das Ergebnis von transcribe() beeinflussen
+
+        Der Dekodierweg (Long-Form, Batch-Engine oder model.transcribe)
+        ergibt sich aus diesen Einstellungen und der Aufnahme selbst; sie
+        gehören daher in den Schlüssel des Ergebnis-Caches.
+
+        Returns:
+            Dictionary mit tatsächlicher Genauigkeit, VAD und Dekodierweg
+        """
+        return {
+            "precision": resolve_precision(self.pool.precision, self.device),
+            "vad": self.vad,
+            "long_form_min_seconds": (
+                self.long_form_min_seconds if self.device == "cpu" else 0.0
+            ),
+            "batch_engine": self.batch_engine is not None
+        }
+
+    def _use_long_form(self, audio: AudioInput, long_form: Optional[bool]) -> bool:
+        """Entscheidet, ob der Long-Form-Modus verwendet wird"""
+        if self.device != "cpu" or long_form is False:
+            return False
+        if long_form:
+            return True
+        if self.long_form_min_seconds <= 0 or not isinstance(audio, np.ndarray):
+            return False
+        return get_duration(audio) >= self.long_form_min_seconds
+
     def transcribe_with_timestamps(
         self,
-        audio_path: str,
+        audio: AudioInput,
         model_size: str = "base",
         language: Optional[str] = None
     ) -> Optional[Dict[str, Any]]:
@@ -90,7 +412,7 @@ class WhisperTranscriber:
         Transkribiert mit detaillierten Zeitstempeln pro Wort
 
         Args:
-            audio_path: Pfad zur Audiodatei
+            audio: Pfad zur Audiodatei oder dekodierte Waveform
             model_size: Größe des Whisper-Modells
             language: Sprache
 
@@ -98,7 +420,7 @@ class WhisperTranscriber:
             Dictionary mit detaillierten Zeitstempeln
         """
         return self.transcribe(
-            audio_path,
+            audio,
             model_size=model_size,
             language=language,
             word_timestamps=True
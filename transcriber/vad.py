@@ -0,0 +1,217 @@
+"""
+Voice Activity Detection (VAD) mit NumPy
+
+Erkennt Sprachbereiche über Frame-Energie und spektrale Flachheit, damit
+Stille, Pausen und Rauschen nicht durch Whisper laufen müssen.
+"""
+
+from typing import Any, Dict, List, Tuple
+import numpy as np
+
+try:
+    from .audio import SAMPLE_RATE, frame_energy_db
+except ImportError:
+    from audio import SAMPLE_RATE, frame_energy_db
+
+
+def spectral_flatness(audio: np.ndarray, frame_seconds: float = 0.03) -> np.ndarray:
+    """
+    Berechnet die spektrale Flachheit pro Frame
+
+    Werte nahe 1 bedeuten rauschartiges Signal, Sprache liegt deutlich
+    darunter.
+
+    Args:
+        audio: Waveform (16 kHz)
+        frame_seconds: Framelänge in Sekunden
+
+    Returns:
+        Flachheit pro Frame (0..1)
+    """
+    frame_length = max(1, int(frame_seconds * SAMPLE_RATE))
+    num_frames = len(audio) // frame_length
+    if num_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+
+    frames = audio[:num_frames * frame_length].reshape(num_frames, frame_length)
+    power = np.abs(np.fft.rfft(frames * np.hanning(frame_length), axis=1)) ** 2 + 1e-12
+    geometric_mean = np.exp(np.mean(np.log(power), axis=1))
+    return geometric_mean / np.mean(power, axis=1)
+
+
+def detect_speech(
+    audio: np.ndarray,
+    frame_seconds: float = 0.03,
+    threshold_db: float = 12.0,
+    max_flatness: float = 0.6,
+    min_speech_seconds: float = 0.25,
+    min_silence_seconds: float = 1.0,
+    padding_seconds: float = 0.2
+) -> List[Tuple[int, int]]:
+    """
+    Findet Sprachbereiche in einer Waveform
+
+    Ein Frame gilt als Sprache, wenn seine Energie mindestens threshold_db
+    über dem geschätzten Grundrauschen liegt und er nicht rauschartig ist.
+    Kurze Pausen werden überbrückt, kurze Ausreißer verworfen.
+
+    Args:
+        audio: Waveform (16 kHz)
+        frame_seconds: Framelänge in Sekunden
+        threshold_db: Abstand zum Grundrauschen in dB
+        max_flatness: Maximale spektrale Flachheit für Sprache
+        min_speech_seconds: Mindestlänge eines Sprachbereichs
+        min_silence_seconds: Kürzere Pausen werden überbrückt
+        padding_seconds: Rand, der um jeden Sprachbereich erhalten bleibt
+
+    Returns:
+        Liste von (start, end) in Samples, sortiert und überlappungsfrei
+    """
+    energy = frame_energy_db(audio, frame_seconds)
+    if len(energy) == 0:
+        return []
+
+    noise_floor = np.percentile(energy, 10)
+    is_speech = (energy > noise_floor + threshold_db) & (
+        spectral_flatness(audio, frame_seconds) < max_flatness
+    )
+
+    # Übergänge zwischen Stille und Sprache finden
+    padded = np.concatenate(([False], is_speech, [False])).astype(np.int8)
+    changes = np.flatnonzero(np.diff(padded))
+    regions = list(zip(changes[0::2], changes[1::2]))
+
+    # Kurze Pausen überbrücken
+    min_silence = int(min_silence_seconds / frame_seconds)
+    merged = []
+    for start, end in regions:
+        if merged and start - merged[-1][1] < min_silence:
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+
+    # Kurze Ausreißer verwerfen, Rand hinzufügen, in Samples umrechnen
+    min_speech = int(min_speech_seconds / frame_seconds)
+    frame_length = int(frame_seconds * SAMPLE_RATE)
+    padding = int(padding_seconds * SAMPLE_RATE)
+
+    speech = []
+    for start, end in merged:
+        if end - start < min_speech:
+            continue
+        start = max(0, start * frame_length - padding)
+        end = min(len(audio), end * frame_length + padding)
+        if speech and start <= speech[-1][1]:
+            speech[-1] = (speech[-1][0], end)
+        else:
+            speech.append((start, end))
+
+    return [(int(start), int(end)) for start, end in speech]
+
+
+class TimeMap:
+    """Bildet Zeitpunkte der verkürzten Waveform auf die Originalzeit ab"""
+
+    def __init__(self, regions: List[Tuple[int, int]], total_samples: int):
+        """
+        Args:
+            regions: Beibehaltene Bereiche (start, end) in Samples
+            total_samples: Länge der Original-Waveform
+        """
+        lengths = np.array([end - start for start, end in regions], dtype=np.int64)
+
+        self.original_starts = np.array(
+            [start for start, _ in regions], dtype=np.float64
+        ) / SAMPLE_RATE
+        # Exklusive kumulative Summe: Start jedes Bereichs in der verkürzten
+        # Waveform
+        self.compact_starts = (np.cumsum(lengths) - lengths).astype(np.float64) / SAMPLE_RATE
+
+        self.total_seconds = total_samples / SAMPLE_RATE
+        self.speech_seconds = float(lengths.sum()) / SAMPLE_RATE
+
+    def to_original(self, t: float, is_end: bool = False) -> float:
+        """
+        Wandelt einen Zeitpunkt der verkürzten Waveform um
+
+        Args:
+            t: Zeit in der verkürzten Waveform (Sekunden)
+            is_end: Endzeitpunkt; liegt er genau auf einer Bereichsgrenze,
+                wird er dem vorherigen Bereich zugeordnet statt über die
+                übersprungene Stille hinweg auf den Start des nächsten
+
+        Returns:
+            Zeit in der Original-Aufnahme (Sekunden)
+        """
+        if len(self.compact_starts) == 0:
+            return t
+        side = "left" if is_end else "right"
+        i = max(0, int(np.searchsorted(self.compact_starts, t, side=side)) - 1)
+        return float(self.original_starts[i] + (t - self.compact_starts[i]))
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Liefert, wie viel Audio übersprungen wurde
+
+        Returns:
+            Dictionary mit Gesamt-, Sprach- und übersprungener Dauer sowie
+            dem übersprungenen Anteil
+        """
+        skipped = self.total_seconds - self.speech_seconds
+        return {
+            "total_seconds": self.total_seconds,
+            "speech_seconds": self.speech_seconds,
+            "skipped_seconds": skipped,
+            "skipped_ratio": skipped / self.total_seconds if self.total_seconds else 0.0
+        }
+
+    def remap_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Überträgt Segment- und Wortzeitstempel auf die Originalzeit
+
+        Args:
+            result: Whisper-Ergebnis der verkürzten Waveform
+
+        Returns:
+            Whisper-Ergebnis mit Originalzeitstempeln und VAD-Statistik
+        """
+        segments = []
+        for segment in result.get("segments", []):
+            segment = {
+                **segment,
+                "start": self.to_original(segment["start"]),
+                "end": self.to_original(segment["end"], is_end=True)
+            }
+            if segment.get("words"):
+                segment["words"] = [
+                    {
+                        **word,
+                        "start": self.to_original(word["start"]),
+                        "end": self.to_original(word["end"], is_end=True)
+                    }
+                    for word in segment["words"]
+                ]
+            segments.append(segment)
+
+        return {**result, "segments": segments, "vad": self.stats()}
+
+
+def compact_audio(
+    audio: np.ndarray,
+    regions: List[Tuple[int, int]]
+) -> Tuple[np.ndarray, TimeMap]:
+    """
+    Entfernt alle Bereiche ohne Sprache
+
+    Args:
+        audio: Waveform (16 kHz)
+        regions: Sprachbereiche aus detect_speech()
+
+    Returns:
+        Tuple (verkürzte Waveform, TimeMap zur Rückabbildung)
+    """
+    if regions:
+        compact = np.concatenate([audio[start:end] for start, end in regions])
+    else:
+        compact = audio[:0]
+    return compact, TimeMap(regions, len(audio))
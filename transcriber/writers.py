@@ -0,0 +1,374 @@
+"""
+Streaming-Writer für die Exportformate
+
+Jeder Writer schreibt ein Transkript Segment für Segment direkt in seine
+Datei, ohne das Dokument vorher als String aufzubauen. Mehrere Writer
+lassen sich in einem Durchlauf über die Segmente füttern (siehe
+ExportManager.export_formats). Für einzelne Formate gibt es zusätzlich
+Generatoren (srt_cues, vtt_cues, jsonl_lines), die Zeile für Zeile liefern.
+
+Das Spaltenformat (.npz) enthält die Arrays 'start', 'end' (float64,
+Sekunden), 'speaker' (int32, Index in 'speakers', -1 ohne Sprecher),
+'speakers' (Namen), 'text_offsets' (int64, Anfang jedes Segments in 'text'
+plus Gesamtlänge) und 'text' (UTF-8-Bytes aller Segmenttexte). Es lässt
+sich direkt mit numpy.load lesen, siehe load_columnar.
+"""
+
+import json
+import os
+import shutil
+import zipfile
+from array import array
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+try:
+    from .pdf_stream import StreamingPdfWriter
+except ImportError:
+    from pdf_stream import StreamingPdfWriter
+
+
+def format_minutes(seconds: float) -> str:
+    """Zeit als MM:SS (TXT und PDF)"""
+    minutes = int(seconds // 60)
+    secs = int(seconds % 60)
+    return f"{minutes:02d}:{secs:02d}"
+
+
+def format_timestamp(seconds: float, separator: str = ",") -> str:
+    """
+    Zeit als HH:MM:SS,mmm (SRT) bzw. HH:MM:SS.mmm (WebVTT)
+
+    Args:
+        seconds: Zeit in Sekunden
+        separator: Trennzeichen vor den Millisekunden
+    """
+    milliseconds = max(0, int(round(seconds * 1000)))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    secs, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{milliseconds:03d}"
+
+
+def format_srt_cue(index: int, segment: Dict[str, Any]) -> str:
+    """Ein SRT-Untertitel (Nummerierung ab 1), Sprecher als Präfix"""
+    text = segment.get("text", "").strip()
+    if segment.get("speaker"):
+        text = f"{segment['speaker']}: {text}"
+    return (
+        f"{index}\n"
+        f"{format_timestamp(segment.get('start', 0))} --> "
+        f"{format_timestamp(segment.get('end', 0))}\n"
+        f"{text}\n\n"
+    )
+
+
+def format_vtt_cue(segment: Dict[str, Any]) -> str:
+    """Ein WebVTT-Cue, Sprecher als Voice-Tag (<v Name>)"""
+    text = _escape_vtt(segment.get("text", "").strip())
+    if segment.get("speaker"):
+        text = f"<v {_escape_vtt(segment['speaker'])}>{text}"
+    return (
+        f"{format_timestamp(segment.get('start', 0), '.')} --> "
+        f"{format_timestamp(segment.get('end', 0), '.')}\n"
+        f"{text}\n\n"
+    )
+
+
+def format_jsonl_line(index: int, segment: Dict[str, Any]) -> str:
+    """Ein Segment als JSON-Zeile mit Sprecher und (falls vorhanden) Wörtern"""
+    record = {
+        "id": index,
+        "start": segment.get("start", 0),
+        "end": segment.get("end", 0),
+        "speaker": segment.get("speaker"),
+        "text": segment.get("text", "").strip()
+    }
+    if segment.get("words"):
+        record["words"] = [
+            {key: word[key] for key in ("word", "start", "end", "speaker") if key in word}
+            for word in segment["words"]
+        ]
+    return json.dumps(record, ensure_ascii=False, default=float) + "\n"
+
+
+def srt_cues(segments: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Liefert die SRT-Datei Untertitel für Untertitel"""
+    for index, segment in enumerate(segments, 1):
+        yield format_srt_cue(index, segment)
+
+
+def vtt_cues(segments: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Liefert die WebVTT-Datei Cue für Cue (beginnend mit dem Header)"""
+    yield "WEBVTT\n\n"
+    for segment in segments:
+        yield format_vtt_cue(segment)
+
+
+def jsonl_lines(segments: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Liefert eine JSON-Zeile pro Segment"""
+    for index, segment in enumerate(segments):
+        yield format_jsonl_line(index, segment)
+
+
+def _escape_vtt(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+class SegmentWriter:
+    """
+    Basisklasse: schreibt ein Transkript Segment für Segment in eine Datei
+
+    Unterklassen setzen 'extension' und implementieren write_segment; Formate
+    ohne Zeitstempel überschreiben zusätzlich write_text.
+    """
+
+    extension = ""
+    # Format braucht Segmente mit Zeitstempeln (nicht nur Text)
+    needs_segments = True
+
+    def __init__(self, path: str, title: str):
+        """
+        Args:
+            path: Ausgabepfad
+            title: Titel des Dokuments
+        """
+        self.path = path
+        self.title = title
+        self._file = open(path, "w", encoding="utf-8", newline="\n")
+
+    def write_segment(self, segment: Dict[str, Any]):
+        raise NotImplementedError
+
+    def write_text(self, text: str):
+        """Schreibt ein Transkript ohne Segmente (nur Formate ohne Zeitstempel)"""
+        raise ValueError(f"Format {self.extension} benötigt Segmente mit Zeitstempeln")
+
+    def close(self):
+        self._file.close()
+
+
+class TxtWriter(SegmentWriter):
+    """Lesbarer Text mit Kopf- und Fußzeile (Format wie bisher)"""
+
+    extension = "txt"
+    needs_segments = False
+
+    def __init__(self, path: str, title: str):
+        super().__init__(path, title)
+        date_str = datetime.now().strftime("%d.%m.%Y %H:%M")
+        self._file.write(
+            "=" * 80 + "\n"
+            f"{title}\n"
+            + "=" * 80 + "\n\n"
+            f"Erstellt am: {date_str}\n"
+            + "-" * 80 + "\n\n"
+        )
+        self._first = True
+
+    def write_segment(self, segment: Dict[str, Any]):
+        timestamp = (
+            f"[{format_minutes(segment.get('start', 0))} - "
+            f"{format_minutes(segment.get('end', 0))}]"
+        )
+        # Leerzeile zwischen den Segmenten
+        prefix = "" if self._first else "\n"
+        self._first = False
+        self._file.write(
+            f"{prefix}{timestamp}\n"
+            f"{segment.get('speaker', 'Unbekannt')}:\n"
+            f"{segment.get('text', '')}\n"
+        )
+
+    def write_text(self, text: str):
+        self._file.write(text)
+
+    def close(self):
+        self._file.write(
+            "\n\n" + "=" * 80 + "\n"
+            "Ende der Transkription\n"
+            + "=" * 80 + "\n"
+        )
+        super().close()
+
+
+class SrtWriter(SegmentWriter):
+    """SubRip-Untertitel"""
+
+    extension = "srt"
+
+    def __init__(self, path: str, title: str):
+        super().__init__(path, title)
+        self._index = 0
+
+    def write_segment(self, segment: Dict[str, Any]):
+        self._index += 1
+        self._file.write(format_srt_cue(self._index, segment))
+
+
+class VttWriter(SegmentWriter):
+    """WebVTT-Untertitel"""
+
+    extension = "vtt"
+
+    def __init__(self, path: str, title: str):
+        super().__init__(path, title)
+        self._file.write("WEBVTT\n\n")
+
+    def write_segment(self, segment: Dict[str, Any]):
+        self._file.write(format_vtt_cue(segment))
+
+
+class JsonlWriter(SegmentWriter):
+    """JSON Lines: ein Segment pro Zeile, mit Sprecher und Wörtern"""
+
+    extension = "jsonl"
+
+    def __init__(self, path: str, title: str):
+        super().__init__(path, title)
+        self._index = 0
+
+    def write_segment(self, segment: Dict[str, Any]):
+        self._file.write(format_jsonl_line(self._index, segment))
+        self._index += 1
+
+
+class PdfWriter(SegmentWriter):
+    """PDF, seitenweise geschrieben (siehe pdf_stream)"""
+
+    extension = "pdf"
+    needs_segments = False
+
+    def __init__(self, path: str, title: str):
+        self.path = path
+        self.title = title
+        self._pdf = StreamingPdfWriter(path, title)
+        date_str = datetime.now().strftime("%d.%m.%Y %H:%M")
+        self._pdf.write_header(f"Erstellt am: {date_str}")
+
+    def write_segment(self, segment: Dict[str, Any]):
+        self._pdf.write_segment(segment, format_minutes)
+
+    def write_text(self, text: str):
+        self._pdf.write_text(text)
+
+    def close(self):
+        self._pdf.close()
+
+
+class ColumnarWriter(SegmentWriter):
+    """
+    Kompaktes Spaltenformat (.npz) für Indexer und Player
+
+    Die Texte werden während des Schreibens in eine temporäre Datei
+    ausgelagert, im Speicher liegen nur die Zahlenspalten (20 Bytes pro
+    Segment).
+    """
+
+    extension = "npz"
+
+    def __init__(self, path: str, title: str):
+        self.path = path
+        self.title = title
+        self._text_path = f"{path}.text.tmp"
+        self._file = open(self._text_path, "wb")
+        self._starts = array("d")
+        self._ends = array("d")
+        self._speaker_ids = array("i")
+        self._offsets = array("q", [0])
+        self._speakers: Dict[str, int] = {}
+
+    def write_segment(self, segment: Dict[str, Any]):
+        speaker = segment.get("speaker")
+        if speaker is None:
+            speaker_id = -1
+        else:
+            speaker_id = self._speakers.setdefault(speaker, len(self._speakers))
+
+        text = segment.get("text", "").strip().encode("utf-8")
+        self._file.write(text)
+        self._starts.append(segment.get("start", 0))
+        self._ends.append(segment.get("end", 0))
+        self._speaker_ids.append(speaker_id)
+        self._offsets.append(self._offsets[-1] + len(text))
+
+    def close(self):
+        self._file.close()
+        try:
+            columns = {
+                "start": np.frombuffer(self._starts, dtype=np.float64),
+                "end": np.frombuffer(self._ends, dtype=np.float64),
+                "speaker": np.frombuffer(self._speaker_ids, dtype=np.int32),
+                "speakers": np.array(list(self._speakers), dtype=np.str_),
+                "text_offsets": np.frombuffer(self._offsets, dtype=np.int64)
+            }
+            # Unkomprimiert: Spalten lassen sich nach dem Entpacken per mmap lesen
+            with zipfile.ZipFile(self.path, "w", zipfile.ZIP_STORED, allowZip64=True) as archive:
+                for name, values in columns.items():
+                    with archive.open(f"{name}.npy", "w", force_zip64=True) as f:
+                        np.lib.format.write_array(f, values, allow_pickle=False)
+
+                # Textblock aus der temporären Datei kopieren
+                with archive.open("text.npy", "w", force_zip64=True) as f:
+                    np.lib.format.write_array_header_1_0(f, {
+                        "descr": "|u1",
+                        "fortran_order": False,
+                        "shape": (self._offsets[-1],)
+                    })
+                    with open(self._text_path, "rb") as text_file:
+                        shutil.copyfileobj(text_file, f)
+        finally:
+            os.remove(self._text_path)
+
+
+def load_columnar(path: str) -> List[Dict[str, Any]]:
+    """
+    Liest eine mit ColumnarWriter geschriebene Datei als Segmentliste
+
+    Args:
+        path: Pfad zur .npz-Datei
+
+    Returns:
+        Liste von Segmenten mit 'start', 'end', 'speaker', 'text'
+    """
+    with np.load(path, allow_pickle=False) as data:
+        starts, ends = data["start"], data["end"]
+        speaker_ids, speakers = data["speaker"], data["speakers"]
+        offsets, text = data["text_offsets"], data["text"].tobytes()
+
+    return [
+        {
+            "start": float(starts[i]),
+            "end": float(ends[i]),
+            "speaker": str(speakers[speaker_ids[i]]) if speaker_ids[i] >= 0 else None,
+            "text": text[offsets[i]:offsets[i + 1]].decode("utf-8")
+        }
+        for i in range(len(starts))
+    ]
+
+
+# Format -> Writer-Klasse
+WRITERS = {
+    writer.extension: writer
+    for writer in (PdfWriter, TxtWriter, SrtWriter, VttWriter, JsonlWriter, ColumnarWriter)
+}
+
+
+def open_writer(fmt: str, path: str, title: str) -> SegmentWriter:
+    """
+    Erstellt den Writer für ein Format
+
+    Args:
+        fmt: Format ('pdf', 'txt', 'srt', 'vtt', 'jsonl', 'npz')
+        path: Ausgabepfad
+        title: Titel des Dokuments
+
+    Returns:
+        Geöffneter Writer
+    """
+    writer_class: Optional[type] = WRITERS.get(fmt)
+    if writer_class is None:
+        raise ValueError(f"Unbekanntes Exportformat: {fmt}")
+    return writer_class(path, title)